@@ -0,0 +1,72 @@
+import threading
+
+import pytest
+
+from tradegeek.batch import BatchQueue
+from tradegeek.bench import synthetic_ohlcv
+from tradegeek.strategies import RsiStrategy, SmaCross
+
+FILES = 4
+
+
+@pytest.fixture
+def paths(tmp_path):
+    paths = []
+    for i in range(FILES):
+        path = str(tmp_path / f"SYM{i:03d}.csv")
+        synthetic_ohlcv(300, seed=30 + i).to_csv(path)
+        paths.append(path)
+    return paths
+
+
+def queue(paths, strategies=None):
+    strategies = strategies or {'SmaCross': (SmaCross, {'printlog': False})}
+    return BatchQueue(paths, strategies, max_workers=1, loaders=1)
+
+
+def test_every_pair_is_run_once(paths):
+    strategies = {'SmaCross': (SmaCross, {'printlog': False}), 'RsiStrategy': (RsiStrategy, {'printlog': False})}
+    seen = []
+    results = queue(paths, strategies).run(on_result=lambda row, done, total: seen.append((done, total)))
+
+    assert len(results) == FILES * 2
+    assert results['error'].isna().all()
+    assert set(zip(results['symbol'], results['strategy'])) == {
+        (f"SYM{i:03d}", name) for i in range(FILES) for name in strategies}
+    assert seen == [(done, FILES * 2) for done in range(1, FILES * 2 + 1)]
+
+
+def test_cancel_drops_the_runs_not_started(paths):
+    batch = queue(paths)
+    results = batch.run(on_result=lambda row, done, total: batch.cancel())
+    # One worker: the run that finished first is the only one started
+    assert len(results) == 1
+
+
+def test_cancel_event_stops_the_batch(paths):
+    cancel = threading.Event()
+    results = queue(paths).run(on_result=lambda row, done, total: cancel.set(), cancel=cancel)
+    assert len(results) == 1
+
+
+def test_pause_holds_back_the_runs_until_resumed(paths):
+    batch = queue(paths)
+    rows = []
+    during_pause = []
+
+    def resume_later():
+        during_pause.append(len(rows))
+        batch.resume()
+
+    def on_result(row, done, total):
+        rows.append(row)
+        if done == 1:
+            batch.pause()
+            assert batch.paused
+            threading.Timer(1.0, resume_later).start()
+
+    results = batch.run(on_result=on_result)
+
+    assert during_pause == [1]
+    assert not batch.paused
+    assert len(results) == FILES
@@ -0,0 +1,118 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradegeek import data
+from tradegeek.data import DataCache, load_price_data
+
+
+def write_csv(path, index):
+    rng = np.random.default_rng(3)
+    close = 100.0 + rng.normal(0.0, 1.0, len(index)).cumsum()
+    df = pd.DataFrame({'Open': close, 'High': close + 1.0, 'Low': close - 1.0, 'Close': close,
+                       'Volume': rng.integers(100, 10000, len(index)).astype(float),
+                       'Note': 'x'}, index=index.rename('Date'))
+    df.to_csv(path)
+    return path
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return write_csv(str(tmp_path / 'AAA.csv'), pd.date_range('2020-01-01', periods=50, freq='D'))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DataCache(str(tmp_path / 'cache'))
+
+
+def assert_same_frame(a, b):
+    assert list(a.columns) == list(b.columns)
+    assert (a.index == b.index).all()
+    assert str(a.index.tz) == str(b.index.tz)
+    np.testing.assert_array_equal(a.to_numpy(), b.to_numpy())
+
+
+def test_cache_round_trip(csv_path, cache):
+    miss, info = load_price_data(csv_path, cache)
+    assert not info['cached']
+    assert 'Note' not in miss.columns
+    hit, info = load_price_data(csv_path, cache)
+    assert info['cached']
+    assert_same_frame(hit, miss)
+
+
+def test_cache_round_trip_keeps_timezone(tmp_path, cache):
+    index = pd.date_range('2021-03-01 09:30', periods=40, freq='h', tz='America/New_York')
+    path = write_csv(str(tmp_path / 'TZ.csv'), index)
+    miss = cache.store(path, data.read_price_csv(path))
+    hit = cache.load(path)
+    assert str(hit.index.tz) == str(miss.index.tz)
+    assert_same_frame(hit, miss)
+
+
+def test_cache_misses_after_the_file_changes(csv_path, cache):
+    load_price_data(csv_path, cache)
+    st = os.stat(csv_path)
+    os.utime(csv_path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert cache.load(csv_path) is None
+    assert not load_price_data(csv_path, cache)[1]['cached']
+    assert load_price_data(csv_path, cache)[1]['cached']
+
+
+def test_failed_store_leaves_nothing_and_keeps_the_parsed_frame(csv_path, cache, monkeypatch):
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(DataCache, '_write_entry', fail)
+    df, info = load_price_data(csv_path, cache)
+    assert not info['cached']
+    assert 'Close' in df.columns
+    assert os.listdir(cache.cache_dir) == []
+
+
+def test_evict_removes_stale_temp_dirs(csv_path, cache):
+    load_price_data(csv_path, cache)
+    stale = os.path.join(cache.cache_dir, 'abc' + data.CACHE_TMP_SUFFIX + 'old')
+    fresh = os.path.join(cache.cache_dir, 'def' + data.CACHE_TMP_SUFFIX + 'new')
+    os.makedirs(stale)
+    os.makedirs(fresh)
+    past = os.path.getmtime(stale) - data.CACHE_TMP_MAX_AGE - 1
+    os.utime(stale, (past, past))
+
+    cache.evict()
+    assert not os.path.exists(stale)
+    assert os.path.exists(fresh)
+    assert len(cache.entries()) == 1
+
+
+@pytest.mark.parametrize('name, values, ok', [
+    ('Close', np.array([101.25, 99.5, np.nan]), True),
+    ('Close', np.array([data.FLOAT32_PRICE_MAX * 2]), False),
+    ('Volume', np.array([1000.0, 2 ** 24, np.nan]), True),
+    ('Volume', np.array([2 ** 24 + 1.0]), False),
+    ('openinterest', np.array([0.5]), True),
+    ('Open', np.array([]), True),
+])
+def test_float32_ok(name, values, ok):
+    assert data._float32_ok(name, values) is ok
+
+
+def test_chunked_loader_matches_read_price_csv(tmp_path):
+    path = write_csv(str(tmp_path / 'BIG.csv'), pd.date_range('2020-01-01', periods=1000, freq='h'))
+    # An exact volume past float32's integer range in the last chunk only
+    df = pd.read_csv(path)
+    df.loc[len(df) - 1, 'Volume'] = 2.0 ** 24 + 1
+    df.to_csv(path, index=False)
+
+    expected = data.read_price_csv(path).drop(columns='Note')
+    chunked = data.read_price_csv_chunked(path, chunksize=300)
+    assert list(chunked.columns) == list(expected.columns)
+    assert (chunked.index == expected.index).all()
+    assert chunked['Close'].dtype == np.float32
+    assert chunked['Volume'].dtype == np.float64
+    np.testing.assert_array_equal(chunked['Volume'].to_numpy(), expected['Volume'].to_numpy())
+    for name in ('Open', 'High', 'Low', 'Close'):
+        np.testing.assert_allclose(chunked[name].to_numpy(), expected[name].to_numpy(), atol=0.005)
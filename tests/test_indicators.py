@@ -0,0 +1,58 @@
+import pytest
+
+from tradegeek.bench import synthetic_ohlcv
+from tradegeek.data import freeze_frame
+from tradegeek.engine import build_cerebro
+from tradegeek.indicators import INDICATOR_CACHE, data_fingerprint
+from tradegeek.strategies import SmaCross
+
+
+@pytest.fixture
+def bars():
+    return freeze_frame(synthetic_ohlcv(300, seed=1))
+
+
+def run_smacross(df):
+    cerebro = build_cerebro({'SYM': df}, "Daily", 10000.0, 0.001, 0.0, stdstats=False)
+    cerebro.addstrategy(SmaCross, printlog=False)
+    return cerebro.run()[0].broker.getvalue()
+
+
+def test_fingerprint_is_by_value(bars):
+    assert data_fingerprint(bars) == data_fingerprint(bars.copy())
+    assert data_fingerprint(bars) != data_fingerprint(synthetic_ohlcv(300, seed=2))
+    # Columns the feed does not read do not count
+    assert data_fingerprint(bars) == data_fingerprint(bars.assign(Note="x"))
+
+
+def test_frozen_frames_cannot_change_under_their_fingerprint(bars):
+    before = data_fingerprint(bars)
+    with pytest.raises(ValueError):
+        bars.iloc[0, 0] = 1.0
+    bars['Close'] = bars['Close'] * 2.0
+    assert data_fingerprint(bars) != before
+
+
+def test_writable_frames_are_hashed_again(bars):
+    df = bars.copy()
+    before = data_fingerprint(df)
+    df.iloc[10, df.columns.get_loc('Close')] += 1.0
+    assert data_fingerprint(df) != before
+
+
+def test_indicator_cache_hits_only_on_the_same_data(bars):
+    INDICATOR_CACHE.clear()
+    first = run_smacross(bars)
+    assert INDICATOR_CACHE.hits == 0
+    misses = INDICATOR_CACHE.misses
+    assert misses > 0
+
+    assert run_smacross(bars) == first
+    assert INDICATOR_CACHE.hits == misses
+    assert INDICATOR_CACHE.misses == misses
+
+    other = freeze_frame(synthetic_ohlcv(300, seed=2))
+    run_smacross(other)
+    assert INDICATOR_CACHE.hits == misses
+    assert INDICATOR_CACHE.misses == 2 * misses
+    INDICATOR_CACHE.clear()
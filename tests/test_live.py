@@ -0,0 +1,57 @@
+import json
+import threading
+
+import pytest
+
+from tradegeek import cli, live
+from tradegeek.bench import synthetic_ohlcv
+from tradegeek.data import read_price_csv
+from tradegeek.engine import build_cerebro, collect_results
+from tradegeek.strategies import SmaCross
+
+HISTORY = 250
+NEW = 150
+
+
+def full_run(path):
+    cerebro = build_cerebro({'SYM': read_price_csv(path)}, "Daily", 10000.0, 0.001, 0.0, stdstats=False)
+    cerebro.addstrategy(SmaCross, printlog=False)
+    return collect_results(cerebro.run()[0], cerebro)
+
+
+def test_follow_matches_a_full_run(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / 'SYM.csv')
+    synthetic_ohlcv(HISTORY + NEW, seed=11).to_csv(path)
+    expected = full_run(path)
+    with open(path) as f:
+        header, *rows = f.readlines()
+    with open(path, 'w') as f:
+        f.writelines([header] + rows[:HISTORY])
+
+    # Append the rest once the history is loaded, as another process would
+    def follow_then_append(*args, **kwargs):
+        follow_csv_files(*args, **kwargs)
+
+        def append():
+            with open(path, 'a') as f:
+                for row in rows[HISTORY:]:
+                    f.write(row)
+                    f.flush()
+
+        threading.Thread(target=append, daemon=True).start()
+
+    follow_csv_files = live.follow_csv_files
+    monkeypatch.setattr(live, 'follow_csv_files', follow_then_append)
+    status = cli.main(['live', '--data', path, '--follow', '--no-cache', '--max-bars', str(NEW),
+                       '--param', 'printlog=False'])
+    assert status == 0
+    output = json.loads(capsys.readouterr().out)
+
+    assert output['live']['history_bars'] == HISTORY
+    assert output['live']['bars_received'] == NEW
+    result = output['results']
+    assert expected['total_trades'] > 0
+    for key in ('total_trades', 'won', 'lost'):
+        assert result[key] == expected[key]
+    assert result['final_value'] == pytest.approx(expected['final_value'], abs=1e-6)
+    assert result['pnl_net'] == pytest.approx(expected['pnl_net'], abs=1e-6)
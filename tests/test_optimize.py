@@ -0,0 +1,46 @@
+import pytest
+
+from tradegeek import optimize
+from tradegeek.optimize import expand_grid, parse_param_range
+from tradegeek.strategies import SmaCross
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("5..8", [5, 6, 7, 8]),
+    ("10..30:10", [10, 20, 30]),
+    ("0.5..1.5:0.5", [0.5, 1.0, 1.5]),
+    ("10, 20,30", [10, 20, 30]),
+    ("true,False", [True, False]),
+    ("7", [7]),
+    ("", [14]),
+    ("  ", [14]),
+])
+def test_parse_param_range(text, expected):
+    assert parse_param_range(text, 14) == expected
+
+
+@pytest.mark.parametrize('text', ["5..1", "1..5:0", "1..5:-1"])
+def test_parse_param_range_rejects_bad_ranges(text):
+    with pytest.raises(ValueError):
+        parse_param_range(text, 14)
+
+
+def test_expand_grid():
+    grid = expand_grid({'fast_period': [5, 10], 'slow_period': [20, 30, 40]})
+    assert len(grid) == 6
+    assert grid[0] == {'fast_period': 5, 'slow_period': 20}
+    assert grid[-1] == {'fast_period': 10, 'slow_period': 40}
+    assert expand_grid({'period': [3]}) == [{'period': 3}]
+
+
+def test_sweep_run_records_vectorized_errors(monkeypatch):
+    def broken(*args, **kwargs):
+        raise ZeroDivisionError("division by zero")
+
+    monkeypatch.setattr(optimize, 'shared_dataframe', lambda frame: frame)
+    monkeypatch.setattr(optimize, 'run_vectorized', broken)
+    monkeypatch.setattr(optimize, '_SWEEP_STATE', {})
+    optimize._sweep_init({'SYM': None}, SmaCross, "Daily", 10000.0, 0.001, 0.0, vectorized=True)
+
+    result = optimize._sweep_run({'fast_period': 5})
+    assert result == {'error': "division by zero", 'engine': "vectorized", 'params': {'fast_period': 5}}
@@ -0,0 +1,118 @@
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+from tradegeek import registry
+from tradegeek.registry import StrategyRegistry, strategy_info, strategy_source
+
+PLUGIN = '''
+import backtrader as bt
+
+from tradegeek.strategies import SmaCross
+
+
+class _Base(bt.Strategy):
+    params = (('size', 1),)
+
+
+class Breakout(_Base):
+    """Buys new highs."""
+    params = (('lookback', {lookback}),)
+    sweep_ranges = {{'lookback': '10..30:10'}}
+
+
+class FastCross(SmaCross):
+    params = (('fast_period', 5),)
+
+
+class NotAStrategy:
+    pass
+'''
+
+
+def write_plugin(directory, name, lookback=20):
+    path = os.path.join(directory, f"{name}.py")
+    with open(path, 'w') as f:
+        f.write(textwrap.dedent(PLUGIN.format(lookback=lookback)))
+    return path
+
+
+@pytest.fixture
+def plugin_dir(tmp_path):
+    directory = tmp_path / 'strategies'
+    directory.mkdir()
+    return str(directory)
+
+
+def test_importing_the_registry_registers_no_plugin_package():
+    code = "import sys, tradegeek.registry; print('tradegeek.plugins' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == "False"
+
+
+def test_plugins_are_found_without_importing_them(tmp_path, plugin_dir):
+    write_plugin(plugin_dir, 'plug_found')
+    reg = StrategyRegistry([plugin_dir], index_path=str(tmp_path / 'index.json'))
+
+    assert reg.names(plugins=False) == registry.strategy_registry().names(plugins=False)
+    assert reg.names()[-2:] == ['Breakout', 'FastCross']
+    breakout = reg.get('Breakout')
+    assert breakout.params == [('lookback', 20), ('size', 1)]
+    assert breakout.sweep_ranges == {'lookback': '10..30:10'}
+    assert breakout.doc == "Buys new highs."
+    # Inherits the bundled SmaCross params after its own
+    assert dict(reg.get('FastCross').params)['slow_period'] == 30
+    assert 'tradegeek.plugins.plug_found' not in sys.modules
+
+    cls = breakout.load()
+    assert cls.__module__ == 'tradegeek.plugins.plug_found'
+    assert cls.params.lookback == 20
+    assert strategy_source(cls) is not None
+    assert strategy_source(reg.get('SmaCross').load()) is None
+
+
+def test_rescan_picks_up_changed_files(tmp_path, plugin_dir):
+    path = write_plugin(plugin_dir, 'plug_changed')
+    index = str(tmp_path / 'index.json')
+    assert dict(StrategyRegistry([plugin_dir], index_path=index).get('Breakout').params)['lookback'] == 20
+
+    write_plugin(plugin_dir, 'plug_changed', lookback=55)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    # A fresh registry reads the changed file again rather than the index
+    assert dict(StrategyRegistry([plugin_dir], index_path=index).get('Breakout').params)['lookback'] == 55
+
+    os.remove(path)
+    reg = StrategyRegistry([plugin_dir], index_path=index)
+    assert 'Breakout' not in reg
+
+
+def test_broken_files_and_taken_names_are_skipped(tmp_path, plugin_dir):
+    with open(os.path.join(plugin_dir, 'broken.py'), 'w') as f:
+        f.write("class Broken(:\n")
+    with open(os.path.join(plugin_dir, 'taken.py'), 'w') as f:
+        f.write("import backtrader as bt\n\n\nclass SmaCross(bt.Strategy):\n    pass\n")
+    reg = StrategyRegistry([plugin_dir], index_path=str(tmp_path / 'index.json'))
+    reg.scan()
+    reasons = dict(reg.errors)
+    assert set(reasons) == {os.path.join(plugin_dir, 'broken.py'), os.path.join(plugin_dir, 'taken.py')}
+    assert reg.get('SmaCross').bundled
+
+
+def test_index_is_written_only_with_a_plugin_dir(tmp_path, plugin_dir):
+    missing = StrategyRegistry([str(tmp_path / 'none')], index_path=str(tmp_path / 'a.json'))
+    missing.scan()
+    assert not os.path.exists(tmp_path / 'a.json')
+
+    present = StrategyRegistry([plugin_dir], index_path=str(tmp_path / 'b.json'))
+    present.scan()
+    assert os.path.exists(tmp_path / 'b.json')
+
+
+def test_unknown_strategy_names_raise():
+    with pytest.raises(KeyError):
+        strategy_info("NoSuchStrategy")
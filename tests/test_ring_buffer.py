@@ -0,0 +1,62 @@
+import backtrader as bt
+import numpy as np
+import pytest
+
+from tradegeek import engine
+from tradegeek.analytics import equity_from_record
+from tradegeek.bench import synthetic_ohlcv
+from tradegeek.engine import build_cerebro, collect_results
+from tradegeek.strategies import SmaCross
+
+PARAMS = {'fast_period': 5, 'slow_period': 20, 'printlog': False}
+
+
+@pytest.fixture(scope='module')
+def bars():
+    # Long enough for TrimHistory to prune several times
+    return synthetic_ohlcv(4000, seed=21)
+
+
+def run(df, ring):
+    cerebro = build_cerebro({'SYM': df}, "Daily", 10000.0, 0.001, 0.05, stdstats=False, ring=ring)
+    cerebro.addstrategy(SmaCross, **PARAMS)
+    strat = cerebro.run()[0]
+    result = collect_results(strat, cerebro)
+    equity = equity_from_record(strat.analyzers.recorder.get_analysis()) if ring else None
+    return strat, result, equity
+
+
+def assert_same_results(result, expected):
+    for key in ('total_trades', 'won', 'lost', 'drawdown_len'):
+        assert result[key] == expected[key]
+    for key in ('final_value', 'pnl_net', 'max_drawdown', 'sharpe'):
+        assert result[key] == pytest.approx(expected[key], abs=1e-9)
+
+
+def test_trim_history_runs_on_the_tested_release_only(monkeypatch):
+    assert engine.trim_history_supported() == (bt.__version__ == engine.TRIM_HISTORY_VERSION)
+    monkeypatch.setattr(bt, '__version__', "1.9.99.0")
+    assert not engine.trim_history_supported()
+
+
+@pytest.mark.skipif(not engine.trim_history_supported(), reason="TrimHistory is off on this Backtrader")
+def test_trimmed_run_matches_the_untrimmed_one(bars, monkeypatch):
+    trimmed, trimmed_result, trimmed_equity = run(bars, ring=True)
+    assert hasattr(trimmed.analyzers, 'trimhistory')
+
+    monkeypatch.setattr(engine, 'trim_history_supported', lambda: False)
+    untrimmed, untrimmed_result, untrimmed_equity = run(bars, ring=True)
+    assert not hasattr(untrimmed.analyzers, 'trimhistory')
+
+    assert untrimmed_result['total_trades'] > 20
+    assert len(trimmed.broker.orders) < len(untrimmed.broker.orders)
+    assert_same_results(trimmed_result, untrimmed_result)
+    for key in ('datetime', 'value'):
+        np.testing.assert_array_equal(np.asarray(trimmed_equity[key]), np.asarray(untrimmed_equity[key]))
+    assert list(trimmed_equity['trades']) == list(untrimmed_equity['trades'])
+
+
+def test_ring_buffer_run_matches_a_normal_run(bars):
+    _, ring_result, _ = run(bars, ring=True)
+    _, normal_result, _ = run(bars, ring=False)
+    assert_same_results(ring_result, normal_result)
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from tradegeek.bench import synthetic_ohlcv
+from tradegeek.data import read_price_csv
+from tradegeek.registry import RUN_DEFAULTS
+from tradegeek.scanner import SCAN_WINDOWS, scan_file, scan_signals, scan_window
+from tradegeek.strategies import SmaCross
+from tradegeek.vectorized import VECTOR_SIGNALS, vectorized_signals
+
+BARS = 1200
+
+
+def defaults(strat_class):
+    return dict(strat_class.params._getpairs(), **RUN_DEFAULTS)
+
+
+@pytest.fixture(scope='module')
+def history(tmp_path_factory):
+    """
+    The full history and, for a sample of bars (every bar where a strategy
+    signals and a sparse grid between), a file ending on that bar.
+    """
+    directory = tmp_path_factory.mktemp('scan')
+    path = str(directory / 'FULL.csv')
+    synthetic_ohlcv(BARS, seed=12).to_csv(path)
+    df = read_price_csv(path)
+    with open(path) as f:
+        header, *rows = f.readlines()
+
+    signals, ends = {}, set(range(50, BARS + 1, 25))
+    for strat_class in VECTOR_SIGNALS:
+        *_, entry, exit_ = vectorized_signals(df, strat_class, defaults(strat_class))
+        signals[strat_class] = entry, exit_
+        ends.update(int(i) + 1 for i in np.flatnonzero(entry | exit_))
+    files = {}
+    for end in sorted(ends):
+        files[end] = str(directory / f"E{end:04d}.csv")
+        with open(files[end], 'w') as f:
+            f.writelines([header] + rows[:end])
+    return signals, files
+
+
+def test_every_vectorized_strategy_has_a_window():
+    assert set(SCAN_WINDOWS) == set(VECTOR_SIGNALS)
+
+
+@pytest.mark.parametrize('strat_class', list(VECTOR_SIGNALS), ids=lambda cls: cls.__name__)
+def test_last_bar_signal_matches_the_full_history(history, strat_class):
+    (entry, exit_), files = history[0][strat_class], history[1]
+    params = defaults(strat_class)
+    bars = scan_window(strat_class, params)
+    # The windows must be shorter than the history for the tail reads to count
+    assert bars < BARS // 2
+
+    found = 0
+    for end, path in files.items():
+        row = scan_file(path, strat_class, params, bars)
+        expected = 'buy' if entry[end - 1] else 'close' if exit_[end - 1] else None
+        assert row['signal'] == expected, f"bar {end}"
+        assert row['bars'] == min(bars, end)
+        if expected is not None:
+            found += 1
+            assert row['strength'] >= 0.0
+    assert found > 5
+
+
+def test_scan_signals_lists_the_triggered_files(history):
+    (entry, exit_), files = history[0][SmaCross], history[1]
+    signals, errors = scan_signals(list(files.values()), SmaCross, defaults(SmaCross), max_workers=2)
+
+    assert errors == []
+    expected = {f"E{end:04d}": 'buy' if entry[end - 1] else 'close'
+                for end in files if entry[end - 1] or exit_[end - 1]}
+    assert dict(zip(signals['symbol'], signals['signal'])) == expected
+    assert list(signals['signal']) == sorted(signals['signal'], key=lambda signal: signal != 'buy')
@@ -0,0 +1,65 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradegeek import shared
+from tradegeek.bench import synthetic_ohlcv
+from tradegeek.indicators import data_fingerprint
+from tradegeek.shared import SharedMarketData, attach, shared_dataframe
+
+
+@pytest.fixture
+def frames():
+    daily = synthetic_ohlcv(200, seed=4)
+    intraday = synthetic_ohlcv(120, timeframe="Hourly", seed=5)
+    intraday.index = intraday.index.tz_localize('UTC').tz_convert('America/New_York')
+    intraday['Volume'] = intraday['Volume'].astype(np.float32)
+    return {'DAY': daily, 'HOUR': intraday}
+
+
+def _close_sum(frame):
+    return float(shared_dataframe(frame)['Close'].sum())
+
+
+def test_shared_frames_read_back_unchanged(frames):
+    with SharedMarketData(frames) as data:
+        for symbol, df in frames.items():
+            frame = data.frames[symbol]
+            assert len(frame) == len(df)
+            assert frame.fingerprint == data_fingerprint(df)
+            back = shared_dataframe(frame)
+            assert back is shared_dataframe(frame)
+            assert str(back.index.tz) == str(df.index.tz)
+            assert (back.index == df.index).all()
+            assert back['Volume'].dtype == df['Volume'].dtype
+            np.testing.assert_array_equal(back.to_numpy(), df.to_numpy())
+            _, _, columns = attach(frame)
+            assert not columns['Close'].flags.writeable
+
+
+def test_workers_attach_to_the_same_memory(frames):
+    with SharedMarketData(frames) as data, ProcessPoolExecutor(max_workers=1) as pool:
+        result = pool.submit(_close_sum, data.frames['DAY']).result()
+    assert result == pytest.approx(frames['DAY']['Close'].sum())
+
+
+def test_close_unlinks_the_blocks(frames):
+    data = SharedMarketData(frames)
+    names = [frame.shm_name for frame in data.frames.values()]
+    shared_dataframe(data.frames['DAY'])
+    data.close()
+    for name in names:
+        assert name not in shared._OWNED and name not in shared._ATTACHED
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+def test_a_failed_share_releases_what_was_shared(frames):
+    bad = dict(frames, BAD=pd.DataFrame({'Close': [1.0]}, index=['not a date']))
+    before = set(shared._OWNED)
+    with pytest.raises(Exception):
+        SharedMarketData(bad)
+    assert set(shared._OWNED) == before
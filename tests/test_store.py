@@ -0,0 +1,93 @@
+import json
+import os
+
+import pytest
+
+from tradegeek import cli
+from tradegeek.bench import synthetic_ohlcv
+from tradegeek.store import ResultsStore, run_key, run_keys
+from tradegeek.strategies import RsiStrategy, SmaCross
+
+SETTINGS = (10000.0, 0.001, 0.0)
+PARAMS = {'fast_period': 10, 'slow_period': 30, 'printlog': False}
+SUMMARY = {'final_value': 10100.0, 'sharpe': 0.5, 'max_drawdown': 3.0, 'drawdown_len': 12,
+           'total_trades': 4, 'won': 3, 'lost': 1, 'pnl_net': 100.0}
+
+
+@pytest.fixture
+def data():
+    return {'SYM': synthetic_ohlcv(200, seed=3)}
+
+
+def key(data, **changes):
+    args = dict(dataframes=data, strat_class=SmaCross, params=PARAMS, timeframe="Daily", settings=SETTINGS,
+                engine="backtrader")
+    args.update(changes)
+    return run_key(**args)
+
+
+def test_run_key_is_stable_for_equal_inputs(data):
+    assert key(data) == key({'SYM': data['SYM'].copy()})
+    # Logging does not change the results
+    assert key(data) == key(data, params=dict(PARAMS, printlog=True))
+
+
+@pytest.mark.parametrize('changes', [
+    {'params': dict(PARAMS, fast_period=11)},
+    {'strat_class': RsiStrategy},
+    {'timeframe': "Weekly"},
+    {'settings': (10000.0, 0.002, 0.0)},
+    {'engine': "vectorized"},
+    {'portfolio': True},
+    {'extra_timeframes': ("Weekly",)},
+], ids=lambda changes: next(iter(changes)))
+def test_run_key_changes_with_any_input(data, changes):
+    assert key(data) != key(data, **changes)
+
+
+def test_run_key_changes_with_the_data(data):
+    other = data['SYM'].copy()
+    other.iloc[-1, other.columns.get_loc('Close')] += 0.01
+    assert key(data) != key({'SYM': other})
+    assert key(data) != key({'OTHER': data['SYM']})
+
+
+def test_run_keys_lists_the_fallback_engine(data):
+    keys = run_keys(data, SmaCross, PARAMS, "Daily", SETTINGS, vectorized=True)
+    assert list(keys) == ["vectorized", "backtrader"]
+    assert keys["backtrader"] == key(data)
+    assert list(run_keys(data, SmaCross, PARAMS, "Daily", SETTINGS, vectorized=False)) == ["backtrader"]
+
+
+def test_store_keeps_one_run_per_key(tmp_path, data):
+    store = ResultsStore(str(tmp_path / 'results.sqlite'))
+    k = key(data)
+    first = store.put(k, "SmaCross", "backtrader", ["SYM"], "Daily", PARAMS, SETTINGS, SUMMARY)
+    second = store.put(k, "SmaCross", "backtrader", ["SYM"], "Daily", PARAMS, SETTINGS,
+                       dict(SUMMARY, final_value=10200.0))
+    assert first == second
+    assert len(store) == 1
+    assert store.get(k)['summary']['final_value'] == 10200.0
+    assert store.get_many([k, "missing"]) == {k: ("backtrader", store.get(k)['summary'])}
+    store.close()
+
+
+def test_cli_uses_the_store_only_when_asked(tmp_path, capsys):
+    path = str(tmp_path / 'SYM.csv')
+    synthetic_ohlcv(300, seed=8).to_csv(path)
+    db = str(tmp_path / 'results.sqlite')
+    argv = ['run', '--data', path, '--no-cache', '--param', 'printlog=False']
+
+    assert cli.main(argv) == 0
+    assert 'run_id' not in json.loads(capsys.readouterr().out)
+
+    assert cli.main(argv + ['--store', db]) == 0
+    first = json.loads(capsys.readouterr().out)
+    assert first['from_store'] is False
+    assert cli.main(argv + ['--store', db]) == 0
+    captured = capsys.readouterr()
+    second = json.loads(captured.out)
+    assert second['from_store'] is True and second['run_id'] == first['run_id']
+    assert f"stored run #{first['run_id']}" in captured.err
+    assert second['results']['final_value'] == first['results']['final_value']
+    assert os.path.exists(db)
@@ -0,0 +1,50 @@
+import pytest
+
+from tradegeek.bench import synthetic_ohlcv
+from tradegeek.engine import build_cerebro, collect_results
+from tradegeek.registry import RUN_DEFAULTS
+from tradegeek.strategies import (SmaCross, RsiStrategy, SmaRsiCombo, BollingerBandStrategy,
+                                  MACDStrategy, MyNewStrategy)
+from tradegeek.vectorized import VECTOR_SIGNALS, run_vectorized
+
+CASH = 10000.0
+COMMISSION = 0.001
+
+# Params that trade on the synthetic bars below.
+PARAMS = {
+    SmaCross: {},
+    RsiStrategy: {},
+    SmaRsiCombo: {'rsi_upper': 60},
+    BollingerBandStrategy: {},
+    MACDStrategy: {},
+    MyNewStrategy: {},
+}
+
+
+@pytest.fixture(scope='module')
+def bars():
+    return synthetic_ohlcv(1500, seed=7)
+
+
+def backtrader_run(df, strat_class, params, slippage_pct):
+    cerebro = build_cerebro({'SYM': df}, "Daily", CASH, COMMISSION, slippage_pct, stdstats=False)
+    cerebro.addstrategy(strat_class, **params)
+    return collect_results(cerebro.run()[0], cerebro)
+
+
+def test_every_vectorized_strategy_is_covered():
+    assert set(PARAMS) == set(VECTOR_SIGNALS)
+
+
+@pytest.mark.parametrize('slippage_pct', [0.0, 0.1])
+@pytest.mark.parametrize('strat_class', list(PARAMS), ids=lambda cls: cls.__name__)
+def test_vectorized_matches_backtrader(bars, strat_class, slippage_pct):
+    params = dict(strat_class.params._getpairs(), **RUN_DEFAULTS, **PARAMS[strat_class])
+    expected = backtrader_run(bars, strat_class, params, slippage_pct)
+    result = run_vectorized(bars, strat_class, params, CASH, COMMISSION, slippage_pct)
+
+    assert expected['total_trades'] > 0
+    assert result['total_trades'] == expected['total_trades']
+    assert (result['won'], result['lost']) == (expected['won'], expected['lost'])
+    assert result['final_value'] == pytest.approx(expected['final_value'], abs=1e-6)
+    assert result['pnl_net'] == pytest.approx(expected['pnl_net'], abs=1e-6)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tradegeek.strategies import SmaCross
+from tradegeek.walkforward import run_walk_forward, walk_forward_windows
+
+
+def test_windows_advance_by_the_test_length():
+    assert walk_forward_windows(300, 100, 50) == [(0, 100, 150), (50, 150, 200), (100, 200, 250),
+                                                  (150, 250, 300)]
+
+
+def test_windows_with_a_step_and_a_short_last_test():
+    assert walk_forward_windows(260, 100, 50, step_bars=70) == [(0, 100, 150), (70, 170, 220),
+                                                                (140, 240, 260)]
+
+
+def test_last_test_window_needs_two_bars():
+    assert walk_forward_windows(101, 100, 50) == []
+    assert walk_forward_windows(102, 100, 50) == [(0, 100, 102)]
+
+
+def test_windows_reject_empty_lengths():
+    with pytest.raises(ValueError):
+        walk_forward_windows(300, 100, 0)
+
+
+def test_skipped_folds_and_stitched_run():
+    # Oscillates around 100, then around 200: with 150 of cash the first
+    # two folds trade, the third is rejected for margin in its test window
+    # and the fourth cannot be scored on its train window
+    i = np.arange(300)
+    close = np.where(i < 200, 100.0, 200.0) + 5.0 * np.sin(i / 4.0)
+    df = pd.DataFrame({'Open': close, 'High': close + 0.5, 'Low': close - 0.5, 'Close': close, 'Volume': 1000.0},
+                      index=pd.date_range('2020-01-01', periods=300, freq='D', name='Date'))
+    combos = [dict(fast_period=fast, slow_period=10, printlog=False) for fast in (3, 5)]
+
+    folds, oos = run_walk_forward(df, SmaCross, combos, 100, 50, rank_by="Net PnL", initial_cash=150.0,
+                                  max_workers=1)
+
+    assert list(folds['fold']) == [1, 2, 3, 4]
+    assert list(folds['test_start']) == [df.index[100], df.index[150], df.index[200], df.index[250]]
+    assert list(folds['test_end']) == [df.index[149], df.index[199], df.index[249], df.index[299]]
+    assert folds['skipped'].iloc[:2].isna().all()
+    assert folds['skipped'].iloc[2] == "an order would be rejected for margin in the test window"
+    assert folds['skipped'].iloc[3] == "no combination could be scored on the train window"
+
+    assert oos['skipped_folds'] == [3, 4]
+    assert len(oos['equity']) == len(oos['index']) == 100
+    assert oos['index'][0] == df.index[100] and oos['index'][-1] == df.index[199]
+    # Every stitched trade is closed, so the gain is the net PnL
+    assert oos['won'] + oos['lost'] == oos['total_trades']
+    assert oos['final_value'] - 150.0 == pytest.approx(oos['pnl_net'])
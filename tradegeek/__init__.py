@@ -0,0 +1,31 @@
+"""
+TradeGeek: Backtrader strategies with a Tkinter front end and a headless
+command line runner.
+
+Submodules are imported on demand so that headless use never loads
+tkinter or matplotlib:
+
+- strategies: the bundled bt.Strategy classes and their default params
+- registry: strategy discovery (bundled and plugins) without importing them
+- plugins: the package plugin strategy files are imported into
+- engine: Cerebro construction and analyzer summaries
+- analytics: post-run metrics (rolling, per symbol) from a recorded run
+- indicators: cached drop-in versions of the bt.ind classes used
+- vectorized: NumPy fast path for the bundled strategies
+- optimize: parallel parameter sweeps
+- walkforward: rolling train/test walk-forward analysis
+- batch: pausable queue of independent per-file backtests on a worker pool
+- scanner: latest buy/close signals across many files, from their last bars
+- profiling: opt-in stage timing and cProfile capture
+- data: CSV loading and the on-disk cache
+- resample: OHLCV aggregation to coarser timeframes, cached per symbol
+- shared: loaded bars in shared memory for the worker processes
+- montecarlo: bootstrap and shuffle confidence intervals for a run
+- tradelog: buffered strategy event log and trade blotter
+- live: incremental live/paper mode fed by local stand-in bar sources
+- store: SQLite results database that reuses runs with identical inputs
+- bench: per-stage benchmarks on synthetic data
+- cli: ``python -m tradegeek`` entry point
+- chart: the embedded, downsampled result chart
+- gui: the Tkinter application
+"""
@@ -0,0 +1,392 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+
+# --------------------------------------------------------------
+# ANALYTICS
+# (run metrics computed once, vectorized, from the recorded equity curve and trades)
+# --------------------------------------------------------------
+
+# One closed trade. ``symbol`` indexes the record's 'symbols', ``opened``
+# and ``closed`` are Backtrader date numbers, ``size`` and ``price`` those
+# of the opening fill and ``bars`` the bars it was held.
+TRADE_DTYPE = np.dtype([
+    ('symbol', 'i4'),
+    ('opened', 'f8'),
+    ('closed', 'f8'),
+    ('bars', 'i4'),
+    ('size', 'f8'),
+    ('price', 'f8'),
+    ('pnl', 'f8'),
+    ('pnl_net', 'f8'),
+])
+
+# One order fill; ``size`` is negative for sells.
+FILL_DTYPE = np.dtype([
+    ('datetime', 'f8'),
+    ('symbol', 'i4'),
+    ('size', 'f8'),
+    ('price', 'f8'),
+    ('commission', 'f8'),
+])
+
+# Backtrader date number of 1970-01-01
+_BT_EPOCH = 719163.0
+
+# Default rolling window, as a fraction of a year of bars
+_ROLLING_YEARS = 0.25
+
+
+def date_numbers(index):
+    """
+    Backtrader date numbers of a DatetimeIndex, in UTC as date2num gives
+    them.
+    """
+    stamps = index.tz_convert('UTC').tz_localize(None) if index.tz is not None else index
+    return stamps.to_numpy(dtype='datetime64[ns]').view(np.int64) / 86400e9 + _BT_EPOCH
+
+
+def drawdown_stats(value):
+    """
+    Max drawdown in percent and the longest run of bars below the peak,
+    as bt.analyzers.DrawDown reports them.
+    """
+    peak = np.maximum.accumulate(value)
+    drawdown = 100.0 * (peak - value) / peak
+    idx = np.arange(len(value))
+    last_flat = np.maximum.accumulate(np.where(drawdown == 0.0, idx, -1))
+    return drawdown.max(), int((idx - last_flat).max())
+
+
+def yearly_sharpe(index, value, initial_cash, riskfreerate=0.01):
+    """
+    Same figure as bt.analyzers.SharpeRatio with its defaults: yearly
+    returns, population stddev, not annualized.
+    """
+    years = pd.DatetimeIndex(index).year.to_numpy()
+    last_of_year = np.flatnonzero(np.append(years[1:] != years[:-1], True))
+    year_end = value[last_of_year]
+    returns = (year_end / np.append(initial_cash, year_end[:-1]) - 1.0).tolist()
+    if not returns:
+        return None
+    # Plain Python on the handful of yearly returns so a zero stddev comes
+    # out exactly zero, as in backtrader.mathsupport. The rate goes through
+    # the analyzer's (identity) yearly conversion, which moves it by an ulp.
+    rate = pow(1.0 + riskfreerate, 1.0) - 1.0
+    excess = [r - rate for r in returns]
+    avg = math.fsum(excess) / len(excess)
+    retdev = math.sqrt(math.fsum((r - avg) ** 2 for r in excess) / len(excess))
+    if retdev == 0.0:
+        return None
+    return avg / retdev
+
+
+def _num(value):
+    """
+    A metric as a JSON-ready float: None where it is undefined.
+    """
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _ratio(a, b):
+    return _num(a / b) if b else None
+
+
+def _years(datetimes):
+    # Backtrader date numbers count days
+    return (datetimes[-1] - datetimes[0]) / 365.25 if len(datetimes) > 1 else 0.0
+
+
+def _steps_per_year(record):
+    years = _years(record['datetime'])
+    return len(record['value']) / years if years > 0 else 1.0
+
+
+def bar_returns(record):
+    """
+    The return of every bar of a record, the first against the initial
+    cash.
+    """
+    value = record['value']
+    previous = np.concatenate(([record['initial_cash']], value[:-1]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return value / previous - 1.0
+
+
+def rolling_metrics(record, window=None):
+    """
+    Rolling figures over the last ``window`` bars at every bar of a record
+    (default: about a quarter of a year of bars): 'return' in percent,
+    annualized 'volatility' in percent and annualized 'sharpe'. The first
+    ``window`` - 1 bars are NaN. All come from running sums, so the cost
+    does not depend on the window.
+    """
+    returns = bar_returns(record)
+    n = len(returns)
+    steps_per_year = _steps_per_year(record)
+    if window is None:
+        window = max(2, int(round(steps_per_year * _ROLLING_YEARS)))
+    window = min(int(window), n)
+
+    out = {name: np.full(n, np.nan) for name in ('return', 'volatility', 'sharpe')}
+    out['window'] = window
+    if window < 2:
+        return out
+
+    # Sums of the demeaned returns keep the variance clear of cancellation
+    centered = returns - returns.mean()
+    sums = np.concatenate(([0.0], np.cumsum(centered)))
+    squares = np.concatenate(([0.0], np.cumsum(centered * centered)))
+    mean = (sums[window:] - sums[:-window]) / window
+    var = np.maximum((squares[window:] - squares[:-window]) / window - mean * mean, 0.0)
+    std = np.sqrt(var)
+    mean += returns.mean()
+
+    growth = np.concatenate(([0.0], np.cumsum(np.log1p(returns))))
+    out['return'][window - 1:] = 100.0 * np.expm1(growth[window:] - growth[:-window])
+    out['volatility'][window - 1:] = 100.0 * std * math.sqrt(steps_per_year)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = mean / std * math.sqrt(steps_per_year)
+    sharpe[~(std > 1e-12)] = np.nan
+    out['sharpe'][window - 1:] = sharpe
+    return out
+
+
+def _trade_stats(pnls):
+    wins = pnls[pnls >= 0.0]
+    losses = pnls[pnls < 0.0]
+    gross_loss = -losses.sum()
+    return {
+        'win_rate': _ratio(100.0 * len(wins), len(pnls)),
+        'profit_factor': _ratio(wins.sum(), gross_loss),
+        'avg_trade': _num(pnls.mean()) if len(pnls) else None,
+        'avg_win': _num(wins.mean()) if len(wins) else None,
+        'avg_loss': _num(losses.mean()) if len(losses) else None,
+    }
+
+
+def run_metrics(record, window=None):
+    """
+    Metrics of a recorded run (engine.RunRecorder, or vectorized_record()).
+
+    Returns the collect_results keys, computed as the Backtrader analyzers
+    do (plus 'per_symbol' for a portfolio record), and under 'analytics':
+    return, CAGR, volatility, annualized Sharpe and Sortino of the bar
+    returns (no risk-free rate, as in the Monte Carlo report), Calmar,
+    ulcer index, exposure and time in market, annual turnover, trade
+    statistics, the range of the rolling Sharpe (see rolling_metrics) and
+    the same breakdown per symbol.
+    """
+    initial_cash = record['initial_cash']
+    datetimes, value = record['datetime'], record['value']
+    trades, fills, symbols = record['trades'], record['fills'], record['symbols']
+    if not len(value):
+        raise ValueError("The run recorded no bars")
+
+    max_drawdown, drawdown_len = drawdown_stats(value)
+    pnls = trades['pnl_net']
+    won = int((pnls >= 0.0).sum())
+    index = (np.round((datetimes - _BT_EPOCH) * 86400e6).astype('i8')).astype('M8[us]')
+    summary = {
+        'final_value': float(value[-1]),
+        'sharpe': yearly_sharpe(index, value, initial_cash),
+        'max_drawdown': float(max_drawdown),
+        'drawdown_len': drawdown_len,
+        'total_trades': int(record['opened']),
+        'won': won,
+        'lost': len(pnls) - won,
+        # Summed in order, as TradeAnalyzer does
+        'pnl_net': float(np.cumsum(pnls)[-1]) if len(pnls) else 0.0,
+    }
+
+    years = _years(datetimes)
+    steps_per_year = _steps_per_year(record)
+    returns = bar_returns(record)
+    mean, std = returns.mean(), returns.std()
+    downside = math.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+    total_return = value[-1] / initial_cash - 1.0
+    cagr = (value[-1] / initial_cash) ** (1.0 / years) - 1.0 if years > 0 and value[-1] > 0 else math.nan
+    peak = np.maximum(np.maximum.accumulate(value), initial_cash)
+    underwater = 100.0 * (1.0 - value / peak)
+    notional = np.abs(fills['size'] * fills['price'])
+    mean_value = value.mean()
+    rolling = rolling_metrics(record, window)
+    rolling_sharpe = rolling['sharpe'][np.isfinite(rolling['sharpe'])]
+
+    analytics = {
+        'bars': len(value),
+        'years': years,
+        'total_return': _num(100.0 * total_return),
+        'cagr': _num(100.0 * cagr),
+        'volatility': _num(100.0 * std * math.sqrt(steps_per_year)),
+        'sharpe_annualized': _ratio(mean * math.sqrt(steps_per_year), std) if std > 1e-12 else None,
+        'sortino': _ratio(mean * math.sqrt(steps_per_year), downside) if downside > 1e-12 else None,
+        'calmar': _ratio(100.0 * cagr, max_drawdown) if max_drawdown > 0 else None,
+        'ulcer_index': _num(math.sqrt(np.mean(underwater * underwater))),
+        'exposure': _num(100.0 * record['exposure'].mean()),
+        'time_in_market': _num(100.0 * (record['exposure'] > 0.0).mean()),
+        'turnover': _ratio(notional.sum() / mean_value, years) if years > 0 else None,
+        'commission': _num(fills['commission'].sum()),
+        'closed_trades': len(pnls),
+        **_trade_stats(pnls),
+        'best_trade': _num(pnls.max()) if len(pnls) else None,
+        'worst_trade': _num(pnls.min()) if len(pnls) else None,
+        'avg_bars_held': _num(trades['bars'].mean()) if len(trades) else None,
+        'rolling_window': rolling['window'],
+        'rolling_sharpe_min': _num(rolling_sharpe.min()) if len(rolling_sharpe) else None,
+        'rolling_sharpe_median': _num(np.median(rolling_sharpe)) if len(rolling_sharpe) else None,
+        'rolling_sharpe_max': _num(rolling_sharpe.max()) if len(rolling_sharpe) else None,
+    }
+
+    # Per symbol: one bincount per figure rather than a loop over symbols
+    count = len(symbols)
+    sym = trades['symbol']
+    closed = np.bincount(sym, minlength=count)
+    wins = np.bincount(sym, weights=pnls >= 0.0, minlength=count).astype(int)
+    net = np.bincount(sym, weights=pnls, minlength=count)
+    gross_win = np.bincount(sym, weights=np.maximum(pnls, 0.0), minlength=count)
+    gross_loss = -np.bincount(sym, weights=np.minimum(pnls, 0.0), minlength=count)
+    traded = np.bincount(fills['symbol'], weights=notional, minlength=count)
+    breakdown = {}
+    for i, name in enumerate(symbols):
+        breakdown[name] = {
+            'trades': int(closed[i]),
+            'won': int(wins[i]),
+            'lost': int(closed[i] - wins[i]),
+            'pnl_net': float(net[i]),
+            'win_rate': _ratio(100.0 * wins[i], closed[i]),
+            'profit_factor': _ratio(gross_win[i], gross_loss[i]),
+            'avg_trade': _ratio(net[i], closed[i]),
+            'exposure': _num(100.0 * record['symbol_exposure'][i]),
+            'turnover': _ratio(traded[i] / mean_value, years) if years > 0 else None,
+        }
+    analytics['per_symbol'] = breakdown
+
+    if record.get('portfolio'):
+        summary['per_symbol'] = {name: {k: stats[k] for k in ('trades', 'won', 'lost', 'pnl_net')}
+                                 for name, stats in breakdown.items()}
+    summary['analytics'] = analytics
+    return summary
+
+
+def vectorized_record(df, summary, symbol, initial_cash, commission, stake=1):
+    """
+    The record of a run_vectorized(..., with_trades=True) run on ``df``,
+    for run_metrics(): its equity curve, fills and trades in the shape
+    engine.RunRecorder gives them.
+    """
+    datetimes = date_numbers(df.index)
+    value = np.asarray(summary['equity'], dtype=np.float64)
+    close = df[{c.lower(): c for c in df.columns}['close']].to_numpy(dtype=np.float64)
+    buys, sells = np.asarray(summary['buys']), np.asarray(summary['sells'])
+    buy_px, sell_px = np.asarray(summary['buy_prices']), np.asarray(summary['sell_prices'])
+
+    fills = np.zeros(len(buys) + len(sells), dtype=FILL_DTYPE)
+    bars = np.concatenate((buys, sells))
+    order = np.argsort(bars, kind='stable')
+    fills['datetime'] = datetimes[bars][order]
+    fills['size'] = np.concatenate((np.full(len(buys), float(stake)), np.full(len(sells), -float(stake))))[order]
+    fills['price'] = np.concatenate((buy_px, sell_px))[order]
+    fills['commission'] = np.abs(fills['size'] * fills['price']) * commission
+
+    pnls = np.asarray(summary['trade_pnls'], dtype=np.float64)
+    closed = len(pnls)
+    trades = np.zeros(closed, dtype=TRADE_DTYPE)
+    trades['opened'] = datetimes[buys[:closed]]
+    trades['closed'] = datetimes[sells[:closed]]
+    trades['bars'] = sells[:closed] - buys[:closed]
+    trades['size'] = stake
+    trades['price'] = buy_px[:closed]
+    trades['pnl'] = stake * (sell_px[:closed] - buy_px[:closed])
+    trades['pnl_net'] = pnls
+
+    held = np.zeros(len(value))
+    np.add.at(held, buys, 1.0)
+    np.add.at(held, sells, -1.0)
+    held = np.cumsum(held) * stake
+    exposure = np.abs(held * close) / value
+    return {
+        'initial_cash': initial_cash,
+        'symbols': [symbol],
+        'portfolio': False,
+        'datetime': datetimes,
+        'value': value,
+        'exposure': exposure,
+        'symbol_exposure': np.array([exposure.mean()]),
+        'fills': fills,
+        'trades': trades,
+        'opened': len(buys),
+    }
+
+
+def equity_from_record(record):
+    """
+    A record in the shape of the engine.EquityCurve analysis, for the
+    chart, the Monte Carlo input and the results store.
+    """
+    from backtrader.utils import num2date
+
+    fills = record['fills']
+    first = fills[fills['symbol'] == 0]
+    trades = record['trades']
+    symbols = record['symbols']
+    return {
+        'datetime': record['datetime'],
+        'value': record['value'],
+        'fills': [(num2date(dt), price, size > 0) for dt, price, size
+                  in zip(first['datetime'].tolist(), first['price'].tolist(), first['size'].tolist())],
+        'trades': trades['pnl_net'].tolist(),
+        'closes': [(symbols[i], closed) for i, closed in zip(trades['symbol'].tolist(), trades['closed'].tolist())],
+    }
+
+
+# Metric -> (label, format), in report order
+_REPORT = (
+    ('total_return', "Total return %", "{:.2f}"),
+    ('cagr', "CAGR %", "{:.2f}"),
+    ('volatility', "Volatility % (ann.)", "{:.2f}"),
+    ('sharpe_annualized', "Sharpe (ann.)", "{:.2f}"),
+    ('sortino', "Sortino (ann.)", "{:.2f}"),
+    ('calmar', "Calmar", "{:.2f}"),
+    ('ulcer_index', "Ulcer index", "{:.2f}"),
+    ('exposure', "Exposure %", "{:.1f}"),
+    ('time_in_market', "Time in market %", "{:.1f}"),
+    ('turnover', "Turnover (per year)", "{:.2f}"),
+    ('commission', "Commission paid", "{:.2f}"),
+    ('win_rate', "Win rate %", "{:.1f}"),
+    ('profit_factor', "Profit factor", "{:.2f}"),
+    ('avg_trade', "Avg trade", "{:.2f}"),
+    ('avg_win', "Avg win", "{:.2f}"),
+    ('avg_loss', "Avg loss", "{:.2f}"),
+    ('best_trade', "Best trade", "{:.2f}"),
+    ('worst_trade', "Worst trade", "{:.2f}"),
+    ('avg_bars_held', "Avg bars held", "{:.1f}"),
+)
+
+
+def format_analytics(analytics):
+    """
+    Text report of the 'analytics' of a run_metrics summary for the log
+    pane.
+    """
+    lines = ["Analytics:"]
+    for key, label, fmt in _REPORT:
+        value = analytics.get(key)
+        lines.append(f"  {label:<22}{'-' if value is None else fmt.format(value):>12}")
+    rolling = [analytics.get(f'rolling_sharpe_{k}') for k in ('min', 'median', 'max')]
+    if rolling[0] is not None:
+        lines.append(f"  Rolling Sharpe ({analytics['rolling_window']} bars): "
+                     + " / ".join(f"{v:.2f}" for v in rolling) + " (min / median / max)")
+    per_symbol = analytics.get('per_symbol', {})
+    if len(per_symbol) > 1:
+        lines.append(f"  {'Symbol':<12}{'Trades':>8}{'Win %':>8}{'PF':>8}{'Net PnL':>12}{'Expo %':>8}")
+        for name, stats in sorted(per_symbol.items(), key=lambda kv: kv[1]['pnl_net'], reverse=True):
+            cells = [(stats['win_rate'], "{:.1f}"), (stats['profit_factor'], "{:.2f}"),
+                     (stats['pnl_net'], "{:.2f}"), (stats['exposure'], "{:.1f}")]
+            widths = (8, 8, 12, 8)
+            lines.append(f"  {name:<12}{stats['trades']:>8}" + "".join(
+                f"{'-' if v is None else fmt.format(v):>{w}}" for (v, fmt), w in zip(cells, widths)))
+    return "\n".join(lines) + "\n"
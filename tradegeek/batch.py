@@ -0,0 +1,258 @@
+import collections
+import glob
+import os
+import signal
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from .data import load_price_data, symbol_from_path
+from .engine import build_cerebro, collect_results
+from .resample import resample_to, resolve_timeframe
+from .store import run_keys
+from .vectorized import VECTOR_SIGNALS, run_vectorized
+
+
+# --------------------------------------------------------------
+# BATCH QUEUE
+# (one independent backtest per file and strategy on a bounded worker pool)
+# --------------------------------------------------------------
+
+# Columns of the summary table, in display order
+BATCH_COLUMNS = ['symbol', 'strategy', 'engine', 'bars', 'final_value', 'sharpe', 'max_drawdown',
+                 'total_trades', 'pnl_net', 'seconds', 'from_store', 'error']
+
+
+def batch_files(specs):
+    """
+    The CSV files named by ``specs``: each one a directory (every *.csv
+    directly in it), a glob pattern or a file. Sorted within each spec,
+    duplicates dropped. Raises ValueError if nothing matches.
+    """
+    paths = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            matches = glob.glob(os.path.join(glob.escape(spec), "*.csv"))
+        else:
+            matches = glob.glob(spec)
+        paths.extend(sorted(path for path in matches if os.path.isfile(path)))
+    paths = list(dict.fromkeys(os.path.abspath(path) for path in paths))
+    if not paths:
+        raise ValueError(f"No CSV files found in {', '.join(specs)}")
+    return paths
+
+
+def _batch_load(path, strategies, timeframe, settings, vectorized, cache, compact, keyed):
+    """
+    Loader-thread half of a file's runs: load and resample it once for
+    all its strategies, and hash the run keys while at it.
+    """
+    df, _ = load_price_data(path, cache=cache, compact=compact)
+    symbol = symbol_from_path(path)
+    timeframe = resolve_timeframe({symbol: df}, timeframe)
+    # Not through RESAMPLE_CACHE: each frame is used by this batch only
+    df = resample_to(df, timeframe, cache=None)
+    keys = {}
+    if keyed:
+        for name, (strat_class, params) in strategies.items():
+            keys[name] = run_keys({symbol: df}, strat_class, params, timeframe, settings,
+                                  vectorized and strat_class in VECTOR_SIGNALS)
+    return symbol, df, timeframe, keys
+
+
+def _batch_init():
+    # Ctrl-C reaches the whole process group; the parent cancels the batch
+    # and the runs in progress finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _batch_run(symbol, df, strat_class, params, timeframe, settings, vectorized):
+    started = time.perf_counter()
+    result = None
+    if vectorized and strat_class in VECTOR_SIGNALS:
+        try:
+            result = run_vectorized(df, strat_class, params, *settings)
+            del result['equity']
+            result['engine'] = "vectorized"
+        except ValueError:
+            pass  # fall through to the Backtrader run
+    if result is None:
+        try:
+            initial_cash, commission, slippage_pct = settings
+            cerebro = build_cerebro({symbol: df}, timeframe, initial_cash, commission, slippage_pct,
+                                    stdstats=False, analytics=True)
+            cerebro.addstrategy(strat_class, **params)
+            strat = cerebro.run()[0]
+            result = collect_results(strat, cerebro)
+            del result['analytics']
+        except Exception as e:
+            result = {'error': str(e)}
+        result['engine'] = "backtrader"
+    result.setdefault('error', None)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+
+class BatchQueue:
+    """
+    One independent backtest per (file, strategy) pair, for running a
+    strategy over every file of a directory rather than loading them all
+    into one Cerebro.
+
+    ``strategies`` maps a strategy name to (class, params). Loader threads
+    read (through ``cache``, a DataCache) and resample the files ahead of
+    the runs, which go to a pool of ``max_workers`` processes, so the I/O
+    of the next files overlaps the runs of the current ones. At most one
+    run per worker is handed to the pool and at most ``max_workers`` runs
+    wait loaded beside it, which bounds the frames held in memory.
+
+    pause() holds back the runs not yet started (the ones running finish
+    and are reported); resume() carries on. With a ``store`` (a
+    store.ResultsStore) runs already in it are not run again and every new
+    one is recorded as it finishes, so running a stopped batch again picks
+    up where it left off.
+    """
+
+    def __init__(self, paths, strategies, timeframe=None, settings=(10000.0, 0.001, 0.0), vectorized=False,
+                 max_workers=None, loaders=2, cache=None, compact=False, store=None):
+        self.paths = list(paths)
+        self.strategies = dict(strategies)
+        self.timeframe = timeframe
+        self.settings = tuple(settings)
+        self.vectorized = vectorized
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.loaders = max(1, loaders)
+        self.cache = cache
+        self.compact = compact
+        self.store = store
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._cancel = threading.Event()
+
+    def __len__(self):
+        return len(self.paths) * len(self.strategies)
+
+    @property
+    def paused(self):
+        return not self._resumed.is_set()
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._resumed.set()
+
+    def _row(self, path, symbol, name, timeframe, bars, summary, **extra):
+        row = {'symbol': symbol, 'strategy': name, 'path': path, 'timeframe': timeframe, 'bars': bars,
+               'from_store': False, 'error': None}
+        row.update((k, v) for k, v in summary.items() if not isinstance(v, (dict, list, np.ndarray)))
+        row.update(extra)
+        return row
+
+    def run(self, on_result=None, cancel=None):
+        """
+        Run the batch and return one row per run as a DataFrame, in the
+        order they finished (unranked; see optimize.rank_sweep_results).
+
+        ``on_result`` is called as on_result(row, done, total) for each run
+        as it finishes. Setting ``cancel`` (a threading.Event) or calling
+        cancel() drops the runs not yet started and returns the finished
+        ones.
+        """
+        rows = []
+        total = len(self)
+        files = iter(self.paths)
+        # Loaded runs waiting for a worker: (path, symbol, df, timeframe, name, {engine: key})
+        ready = collections.deque()
+        loads = {}  # future -> path
+        runs = {}  # future -> (path, symbol, timeframe, bars, name, {engine: key})
+
+        def finish(row):
+            rows.append(row)
+            if on_result is not None:
+                on_result(row, len(rows), total)
+
+        def stopped():
+            return self._cancel.is_set() or (cancel is not None and cancel.is_set())
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_batch_init) as pool, \
+                ThreadPoolExecutor(max_workers=self.loaders, thread_name_prefix="batch-load") as loader:
+            # Start the workers before any loader thread exists: forking
+            # while other threads run can copy a lock in a held state
+            pool.submit(os.getpid).result()
+            try:
+                while not stopped():
+                    if not self.paused:
+                        while ready and len(runs) < self.max_workers:
+                            path, symbol, df, timeframe, name, keys = ready.popleft()
+                            strat_class, params = self.strategies[name]
+                            future = pool.submit(_batch_run, symbol, df, strat_class, params, timeframe,
+                                                 self.settings, self.vectorized)
+                            runs[future] = (path, symbol, timeframe, len(df), name, keys)
+                        while len(loads) < self.loaders and len(ready) < self.max_workers:
+                            path = next(files, None)
+                            if path is None:
+                                break
+                            future = loader.submit(_batch_load, path, self.strategies, self.timeframe,
+                                                   self.settings, self.vectorized, self.cache, self.compact,
+                                                   self.store is not None)
+                            loads[future] = path
+                    if not (runs or loads):
+                        if not self.paused:
+                            break
+                        self._resumed.wait(0.1)
+                        continue
+
+                    done, _ = wait(list(runs) + list(loads), timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        if future in loads:
+                            self._loaded(loads.pop(future), future, ready, finish)
+                        else:
+                            self._finished(runs.pop(future), future, finish)
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        return pd.DataFrame(rows)
+
+    def _loaded(self, path, future, ready, finish):
+        try:
+            symbol, df, timeframe, keys = future.result()
+        except Exception as e:
+            symbol = symbol_from_path(path)
+            for name in self.strategies:
+                finish(self._row(path, symbol, name, None, 0, {}, error=f"Cannot load: {e}"))
+            return
+        stored = {}
+        if keys:
+            stored = self.store.get_many(key for engine_keys in keys.values() for key in engine_keys.values())
+        for name in self.strategies:
+            engine_keys = keys.get(name, {})
+            found = next((stored[key] for key in engine_keys.values() if key in stored), None)
+            if found is None:
+                ready.append((path, symbol, df, timeframe, name, engine_keys))
+            else:
+                engine, summary = found
+                finish(self._row(path, symbol, name, timeframe, len(df), summary, engine=engine,
+                                 from_store=True))
+
+    def _finished(self, job, future, finish):
+        path, symbol, timeframe, bars, name, keys = job
+        try:
+            result = future.result()
+        except Exception as e:  # the worker died (BrokenProcessPool) or the result did not unpickle
+            result = {'error': str(e) or type(e).__name__, 'engine': None}
+        if self.store is not None and result['error'] is None:
+            strat_class, params = self.strategies[name]
+            summary = {k: v for k, v in result.items() if k not in ('error', 'engine', 'seconds')}
+            # Committed run by run, so a batch stopped half way keeps its runs
+            engine = result['engine']
+            self.store.put(keys[engine], strat_class.__name__, engine, [symbol], timeframe, params, self.settings,
+                           summary)
+        finish(self._row(path, symbol, name, timeframe, bars, result))
@@ -0,0 +1,336 @@
+import datetime
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# --------------------------------------------------------------
+# BENCHMARK SUITE
+# (per-stage timings on synthetic data, compared against a saved baseline)
+# --------------------------------------------------------------
+
+BENCH_FORMAT = 1
+
+# Timeframe name as used by build_cerebro -> pandas frequency of the bars
+BENCH_FREQUENCIES = {
+    "Daily": "D",
+    "Hourly": "h",
+    "Minutes": "min",
+}
+
+BENCH_STAGES = ('load', 'build', 'run', 'analyze', 'plot')
+
+# Grids for ``python -m tradegeek bench --preset``; cases larger than
+# max_total_bars (bars x symbols) are skipped.
+BENCH_PRESETS = {
+    "quick": dict(timeframes=["Daily"], bars=[10_000], symbols=[1, 10], max_total_bars=100_000),
+    "full": dict(timeframes=["Daily", "Hourly", "Minutes"], bars=[10_000, 100_000, 1_000_000, 10_000_000],
+                 symbols=[1, 10, 100, 500], max_total_bars=10_000_000),
+}
+
+# A stage only counts as a regression when it also got slower by this
+# many seconds; sub-frame stages are all noise.
+REGRESSION_MIN_SECONDS = 0.05
+
+
+def parse_count(text):
+    """
+    Parse a bar or symbol count such as ``10000``, ``10k`` or ``1.5M``.
+    """
+    text = str(text).strip().lower().replace('_', '')
+    scale = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    if scale > 1:
+        text = text[:-1]
+    count = int(float(text) * scale)
+    if count < 1:
+        raise ValueError(f"count must be at least 1, got '{text}'")
+    return count
+
+
+def synthetic_ohlcv(n_bars, timeframe="Daily", seed=0, start="2000-01-03"):
+    """
+    Random-walk OHLCV bars in the layout read_price_csv returns: a
+    DatetimeIndex named Date and Open/High/Low/Close/Volume columns, with
+    High and Low enclosing Open and Close. The same seed gives the same bars.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, n_bars)))
+    open_ = np.empty(n_bars)
+    open_[0] = 100.0
+    open_[1:] = close[:-1] * np.exp(rng.normal(0.0, 0.002, n_bars - 1))
+    spread = np.abs(rng.normal(0.0, 0.004, (2, n_bars)))
+    high = np.maximum(open_, close) * (1.0 + spread[0])
+    low = np.minimum(open_, close) * (1.0 - spread[1])
+    volume = rng.integers(1_000, 100_000, n_bars).astype(np.float64)
+
+    index = pd.date_range(start, periods=n_bars, freq=BENCH_FREQUENCIES[timeframe], name="Date")
+    return pd.DataFrame({'Open': open_.round(4), 'High': high.round(4), 'Low': low.round(4),
+                         'Close': close.round(4), 'Volume': volume}, index=index)
+
+
+def write_synthetic_csvs(directory, n_bars, n_symbols, timeframe="Daily"):
+    """
+    Write ``n_symbols`` synthetic CSVs (SYM000.csv, ...) into ``directory``
+    and return their paths. Symbol i always gets seed i.
+    """
+    paths = []
+    for i in range(n_symbols):
+        path = os.path.join(directory, f"SYM{i:03d}.csv")
+        synthetic_ohlcv(n_bars, timeframe, seed=i).to_csv(path)
+        paths.append(path)
+    return paths
+
+
+def bench_cases(strategies, timeframes, bars, symbols, engines=("backtrader",), max_total_bars=None):
+    """
+    Expand the benchmark grid into case dicts, dropping cases bigger than
+    ``max_total_bars`` and vectorized cases with more than one symbol (the
+    vectorized engine trades a single symbol). Cases sharing a dataset are
+    adjacent.
+    """
+    cases = []
+    for timeframe, n_bars, n_symbols, strategy, engine in itertools.product(timeframes, bars, symbols,
+                                                                             strategies, engines):
+        if max_total_bars is not None and n_bars * n_symbols > max_total_bars:
+            continue
+        if engine == "vectorized" and n_symbols > 1:
+            continue
+        cases.append(dict(strategy=strategy, engine=engine, timeframe=timeframe, bars=n_bars,
+                          symbols=n_symbols))
+    return cases
+
+
+def case_id(case):
+    return f"{case['strategy']}/{case['engine']}/{case['timeframe']}/{case['bars']}x{case['symbols']}"
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1024 ** 2 if sys.platform == 'darwin' else 1024)
+
+
+def _plot_stage(series, title):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from .chart import ResultChart
+
+    fig = Figure(figsize=(10, 6), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ResultChart(fig, canvas).show(title, **series)
+    canvas.draw()
+
+
+def _bench_case(case, paths, repeat, plot):
+    """
+    Worker side of run_benchmarks: run one case ``repeat`` times in this
+    (fresh) process and return the fastest time of each stage plus the
+    process's peak RSS. The indicator cache is cleared before every
+    repetition, so each one is a cold run.
+    """
+    from .chart import backtest_series, vectorized_series
+    from .data import load_price_data, symbol_from_path
+    from .engine import EquityCurve, build_cerebro, collect_results
+    from .indicators import INDICATOR_CACHE
+    from .registry import get_strategy_and_params
+    from .vectorized import run_vectorized
+
+    if plot:
+        # Keep the one-off matplotlib import and font setup out of the
+        # first plot timing
+        _plot_stage({}, "warm-up")
+
+    StratClass, params = get_strategy_and_params(case['strategy'])
+    portfolio = case['symbols'] > 1
+    if portfolio:
+        params = dict(params, portfolio=True)
+    initial_cash, commission, slippage_pct = 100_000.0, 0.001, 0.0
+    title = case_id(case)
+
+    best = {}
+    summary = None
+    for _ in range(repeat):
+        INDICATOR_CACHE.clear()
+        timings = {}
+        clock = time.perf_counter()
+
+        def lap(stage):
+            nonlocal clock
+            now = time.perf_counter()
+            timings[stage] = now - clock
+            clock = now
+
+        dataframes = {symbol_from_path(path): load_price_data(path)[0] for path in paths}
+        lap('load')
+        df = next(iter(dataframes.values()))
+
+        if case['engine'] == "vectorized":
+            summary = run_vectorized(df, StratClass, params, initial_cash, commission, slippage_pct,
+                                     with_trades=True)
+            lap('run')
+            series = vectorized_series(df, summary)
+            summary = {k: v for k, v in summary.items() if k in ('final_value', 'total_trades')}
+            lap('analyze')
+        else:
+            cerebro = build_cerebro(dataframes, case['timeframe'], initial_cash, commission, slippage_pct,
+                                    portfolio=portfolio)
+            cerebro.addstrategy(StratClass, **params)
+            cerebro.addanalyzer(EquityCurve, _name='equity')
+            lap('build')
+            strat = cerebro.run()[0]
+            lap('run')
+            summary = collect_results(strat, cerebro)
+            series = backtest_series(df, strat.analyzers.equity.get_analysis())
+            lap('analyze')
+
+        if plot:
+            _plot_stage(series, title)
+            lap('plot')
+
+        for stage, seconds in timings.items():
+            best[stage] = min(seconds, best.get(stage, seconds))
+        del dataframes, series
+
+    return {
+        'id': title,
+        **case,
+        'stages': {stage: best[stage] for stage in BENCH_STAGES if stage in best},
+        'peak_rss_mb': _peak_rss_mb(),
+        'final_value': summary['final_value'],
+        'total_trades': summary['total_trades'],
+    }
+
+
+def run_benchmarks(cases, repeat=3, plot=True, work_dir=None, progress=None, cancel=None):
+    """
+    Run every case and return the report dict that save_report writes.
+
+    Each case runs in a freshly spawned process so its peak RSS is its own;
+    the CSVs of a dataset are generated once (untimed) and shared by the
+    cases that use it. ``progress`` is called as progress(done, total,
+    result) after each case; setting ``cancel`` (a threading.Event) stops
+    after the current case.
+    """
+    results = []
+    own_dir = work_dir is None
+    work_dir = work_dir or tempfile.mkdtemp(prefix="tradegeek-bench-")
+    context = multiprocessing.get_context('spawn')
+    try:
+        for (timeframe, n_bars), group in itertools.groupby(cases, key=lambda c: (c['timeframe'], c['bars'])):
+            group = list(group)
+            data_dir = os.path.join(work_dir, f"{timeframe}-{n_bars}")
+            os.makedirs(data_dir, exist_ok=True)
+            paths = write_synthetic_csvs(data_dir, n_bars, max(c['symbols'] for c in group), timeframe)
+
+            for case in group:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    try:
+                        result = executor.submit(_bench_case, case, paths[:case['symbols']], repeat,
+                                                 plot).result()
+                    except Exception as e:
+                        result = {'id': case_id(case), **case, 'error': f"{type(e).__name__}: {e}"}
+                results.append(result)
+                if progress is not None:
+                    progress(len(results), len(cases), result)
+                if cancel is not None and cancel.is_set():
+                    return _report(results, repeat)
+            shutil.rmtree(data_dir, ignore_errors=True)
+    finally:
+        if own_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return _report(results, repeat)
+
+
+def _report(results, repeat):
+    import backtrader as bt
+
+    return {
+        'format': BENCH_FORMAT,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'backtrader': bt.__version__,
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def save_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def load_report(path):
+    with open(path) as f:
+        report = json.load(f)
+    if report.get('format') != BENCH_FORMAT:
+        raise ValueError(f"{path} is not a TradeGeek benchmark report (format {BENCH_FORMAT})")
+    return report
+
+
+def compare_reports(report, baseline, threshold=0.2, min_seconds=REGRESSION_MIN_SECONDS):
+    """
+    Compare two reports case by case. Returns a list of regressions, each
+    {'id', 'metric', 'baseline', 'current', 'ratio'}, for every stage time
+    or peak RSS that grew by more than ``threshold`` (0.2 = 20%). Stage
+    times must also have grown by at least ``min_seconds``. Cases missing
+    from either report are ignored.
+    """
+    previous = {r['id']: r for r in baseline['results'] if 'error' not in r}
+    regressions = []
+    for result in report['results']:
+        base = previous.get(result['id'])
+        if base is None or 'error' in result:
+            continue
+
+        pairs = [(stage, base['stages'].get(stage), seconds, min_seconds)
+                 for stage, seconds in result['stages'].items()]
+        pairs.append(('peak_rss_mb', base.get('peak_rss_mb'), result.get('peak_rss_mb'), 0.0))
+        for metric, old, new, floor in pairs:
+            if old is None or new is None or old <= 0:
+                continue
+            if new > old * (1.0 + threshold) and new - old >= floor:
+                regressions.append({'id': result['id'], 'metric': metric, 'baseline': old, 'current': new,
+                                    'ratio': new / old})
+    return regressions
+
+
+def format_report(report):
+    """
+    Plain-text table of a report: one row per case, seconds per stage.
+    """
+    rows = []
+    for result in report['results']:
+        row = {'case': result['id']}
+        if 'error' in result:
+            row['error'] = result['error']
+        else:
+            row.update(result['stages'])
+            row['peak_rss_mb'] = result['peak_rss_mb']
+        rows.append(row)
+    if not rows:
+        return "No benchmark cases ran."
+    return pd.DataFrame(rows).to_string(index=False, float_format=lambda x: f"{x:.3f}", na_rep="-")
@@ -0,0 +1,205 @@
+import datetime
+
+import backtrader as bt
+import matplotlib.dates as mdates
+import numpy as np
+
+from .montecarlo import MC_METRICS
+
+
+# --------------------------------------------------------------
+# EMBEDDED CHART
+# (price, trades and equity drawn straight from the run results)
+# --------------------------------------------------------------
+
+def minmax_downsample(x, y, buckets):
+    """
+    Reduce a series to at most four points per bucket (first, min, max and
+    last of each of ``buckets`` equal slices) in time order. With one
+    bucket per pixel the line looks the same as the full series: no spike
+    or drop is lost, unlike plain decimation.
+    """
+    n = len(y)
+    if n <= 4 * buckets:
+        return x, y
+
+    size = -(-n // buckets)
+    count = -(-n // size)
+    padded = np.full(count * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(count, size)
+    nan = np.isnan(blocks)
+    lows = np.where(nan, np.inf, blocks).argmin(axis=1)
+    highs = np.where(nan, -np.inf, blocks).argmax(axis=1)
+
+    starts = np.arange(count) * size
+    ends = np.minimum(starts + size, n) - 1
+    idx = np.sort(np.stack([starts, starts + lows, starts + highs, ends], axis=1), axis=1).ravel()
+    idx = idx[np.append(True, idx[1:] != idx[:-1])]
+    return x[idx], y[idx]
+
+
+def date_numbers(index):
+    """
+    Matplotlib date numbers for a DatetimeIndex without going through
+    Python datetimes (tz-aware indexes are plotted in UTC).
+    """
+    return mdates.date2num(np.asarray(index.values, dtype='datetime64[ns]'))
+
+
+_SAMPLE_DT = datetime.datetime(2000, 1, 1)
+# Backtrader counts days from 0001-01-01, matplotlib from its date epoch
+_BT_TO_MPL = mdates.date2num(_SAMPLE_DT) - bt.date2num(_SAMPLE_DT)
+
+
+def backtest_series(df, equity):
+    """
+    Chart series for a Backtrader run: the close of ``df`` (the first
+    feed) and the EquityCurve analysis of the run.
+    """
+    fills = [(mdates.date2num(dt), price, isbuy) for dt, price, isbuy in equity['fills']]
+    return {
+        'price': (date_numbers(df.index), _close(df)),
+        'value': (np.asarray(equity['datetime']) + _BT_TO_MPL, np.asarray(equity['value'])),
+        'fills': fills,
+    }
+
+
+def vectorized_series(df, summary):
+    """
+    Chart series for a run_vectorized(..., with_trades=True) summary.
+    """
+    x = date_numbers(df.index)
+    close = _close(df)
+    fills = [(x[i], price, True) for i, price in zip(summary['buys'], summary['buy_prices'])]
+    fills += [(x[i], price, False) for i, price in zip(summary['sells'], summary['sell_prices'])]
+    return {'price': (x, close), 'value': (x, summary['equity']), 'fills': fills}
+
+
+def walk_forward_series(df, oos):
+    """
+    Chart series for run_walk_forward: the full price history and the
+    stitched out-of-sample value.
+    """
+    return {'price': (date_numbers(df.index), _close(df)),
+            'value': (date_numbers(oos['index']), oos['equity'])}
+
+
+def _close(df):
+    cols = {c.lower(): c for c in df.columns}
+    return df[cols['close']].to_numpy(dtype=np.float64)
+
+
+class ResultChart:
+    """
+    Price with trade markers above the portfolio value, in a figure that
+    is built once. New results only replace the data of the existing
+    artists, and every change of the x-range (a new result, zoom, pan,
+    the toolbar's home button) re-samples the visible part of each series
+    to the axes' pixel width.
+    """
+
+    def __init__(self, fig, canvas):
+        self.fig = fig
+        self.canvas = canvas
+        self.series = {}
+        self.fills = (np.empty(0), np.empty(0), np.empty(0, dtype=bool))
+        self._build()
+
+    def _build(self):
+        self.fig.clear()
+        self.price_ax = self.fig.add_subplot(211)
+        self.value_ax = self.fig.add_subplot(212, sharex=self.price_ax)
+        self.price_line, = self.price_ax.plot([], [], lw=1, label="Close")
+        self.buy_markers, = self.price_ax.plot([], [], '^', color='green', ms=6, ls='none', label="Buy")
+        self.sell_markers, = self.price_ax.plot([], [], 'v', color='red', ms=6, ls='none', label="Sell")
+        self.value_line, = self.value_ax.plot([], [], lw=1, label="Portfolio Value")
+        for ax in (self.price_ax, self.value_ax):
+            ax.xaxis_date()
+            ax.grid()
+            ax.legend(loc='upper left')
+            # Shared axes only notify the one that was zoomed or panned
+            ax.callbacks.connect('xlim_changed', lambda ax: self.resample())
+
+    def show(self, title, price=None, value=None, fills=()):
+        """
+        Display new results. ``price`` and ``value`` are (x, y) arrays with
+        x in matplotlib date numbers; ``fills`` holds (x, price, is_buy).
+        """
+        # Something else drew on the figure since the last result
+        if self.price_ax not in self.fig.axes:
+            self._build()
+
+        self.series = {self.price_line: price, self.value_line: value}
+        fills = sorted(fills)
+        self.fills = (np.array([f[0] for f in fills], dtype=np.float64),
+                      np.array([f[1] for f in fills], dtype=np.float64),
+                      np.array([f[2] for f in fills], dtype=bool))
+        self.price_ax.set_title(title)
+
+        starts = [data[0][0] for data in self.series.values() if data is not None and len(data[0])]
+        ends = [data[0][-1] for data in self.series.values() if data is not None and len(data[0])]
+        if starts:
+            # Forget the previous result's zoom history
+            toolbar = self.canvas.toolbar
+            if toolbar is not None:
+                toolbar.update()
+            self.price_ax.set_xlim(min(starts), max(ends) if max(ends) > min(starts) else min(starts) + 1)
+        else:
+            self.resample()
+        self.canvas.draw_idle()
+
+    def resample(self):
+        lo, hi = self.price_ax.get_xlim()
+        buckets = max(1, int(self.price_ax.bbox.width))
+
+        for line, data in self.series.items():
+            if data is None:
+                line.set_data([], [])
+                continue
+            x, y = data
+            start = max(int(np.searchsorted(x, lo)) - 1, 0)
+            stop = min(int(np.searchsorted(x, hi)) + 1, len(x))
+            xs, ys = minmax_downsample(x[start:stop], y[start:stop], buckets)
+            line.set_data(xs, ys)
+            self._fit_y(line.axes, ys)
+
+        fx, fy, is_buy = self.fills
+        visible = (fx >= lo) & (fx <= hi)
+        self.buy_markers.set_data(fx[visible & is_buy], fy[visible & is_buy])
+        self.sell_markers.set_data(fx[visible & ~is_buy], fy[visible & ~is_buy])
+
+    @staticmethod
+    def _fit_y(ax, ys):
+        if not len(ys) or np.isnan(ys).all():
+            return
+        low, high = np.nanmin(ys), np.nanmax(ys)
+        pad = (high - low) * 0.05 or abs(high) * 0.01 or 1.0
+        ax.set_ylim(low - pad, high + pad)
+
+
+def draw_monte_carlo(fig, result, title="", bins=60):
+    """
+    Histograms of a montecarlo.run_monte_carlo result, one per statistic,
+    with the confidence interval (dashed) and the observed run (red).
+    Replaces whatever the figure showed; ResultChart.show() rebuilds its
+    axes on the next result.
+    """
+    fig.clear()
+    for i, (name, label) in enumerate(MC_METRICS):
+        ax = fig.add_subplot(1, len(MC_METRICS), i + 1)
+        values = result[name][np.isfinite(result[name])]
+        if len(values):
+            counts, edges = np.histogram(values, bins=bins)
+            ax.stairs(counts, edges, fill=True, alpha=0.6)
+        interval = result['intervals'][name]
+        for bound in (interval['low'], interval['high']):
+            if bound is not None:
+                ax.axvline(bound, color='black', ls='--', lw=1)
+        if result['observed'][name] is not None:
+            ax.axvline(result['observed'][name], color='red', lw=1.5)
+        ax.set_title(label, fontsize=9)
+        ax.tick_params(labelsize=8)
+        ax.grid(alpha=0.3)
+    fig.suptitle(title or f"Monte Carlo ({result['simulations']:,} paths, "
+                          f"{result['level'] * 100:g}% interval)", fontsize=10)
@@ -0,0 +1,968 @@
+import argparse
+import datetime
+import json
+import sys
+
+
+# --------------------------------------------------------------
+# HEADLESS COMMAND LINE
+# (python -m tradegeek ...; tkinter/matplotlib are never imported unless asked for)
+# --------------------------------------------------------------
+
+# engine.TIMEFRAMES names, listed here so that --help does not import Backtrader
+TIMEFRAME_CHOICES = ["Minutes", "5 Minutes", "15 Minutes", "Hourly", "4 Hours", "Daily", "Weekly"]
+# store.SORT_COLUMNS, likewise
+SORT_CHOICES = ["final_value", "sharpe", "max_drawdown", "pnl_net", "total_trades", "created"]
+
+
+def _split_param(text):
+    name, sep, value = text.partition('=')
+    if not sep or not name:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got '{text}'")
+    return name.strip(), value.strip()
+
+
+def _add_market_args(parser, timeframe=True, data=True):
+    if data:
+        parser.add_argument("--data", nargs="+", required=True, metavar="CSV",
+                            help="one or more price CSVs with a Date or Datetime column")
+    if timeframe:
+        parser.add_argument("--timeframe", choices=TIMEFRAME_CHOICES, default=None,
+                            help="resample finer data to this timeframe (default: run the data as loaded)")
+    else:
+        parser.set_defaults(timeframe=None)
+    parser.add_argument("--cash", type=float, default=10000.0, help="initial cash (default: 10000)")
+    parser.add_argument("--commission", type=float, default=0.1,
+                        help="commission in percent, as in the GUI (default: 0.1)")
+    parser.add_argument("--slippage", type=float, default=0.0, help="slippage in percent (default: 0)")
+    parser.add_argument("--compact", action="store_true",
+                        help="load with the chunked float32 loader")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the on-disk data cache")
+
+
+def _add_store_args(parser):
+    parser.add_argument("--store", nargs="?", const="", default=None, metavar="DB",
+                        help="reuse runs with identical inputs from the results database and record new ones "
+                             "(default DB: ~/.tradegeek/results.sqlite)")
+
+
+def _add_analytics_args(parser):
+    parser.add_argument("--analytics", action="store_true",
+                        help="record the run and compute the extended metrics afterwards, in place of the "
+                             "per-bar analyzers; adds them to the JSON as 'analytics'")
+    parser.add_argument("--rolling-window", type=int, default=None, metavar="BARS",
+                        help="window of the rolling metrics (default: about a quarter of a year)")
+
+
+def _add_ring_arg(parser):
+    parser.add_argument("--ring-buffer", action="store_true",
+                        help="bound the memory of a long run: keep only the bars each line looks back on "
+                             "(Backtrader's exactbars) and record the equity curve and trades in compact "
+                             "arrays; slower per bar, no candlestick plot. Adds the savings to the JSON as "
+                             "'memory'")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="tradegeek", description="TradeGeek backtesting.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="backtest one strategy and print the analyzer summary as JSON")
+    run.add_argument("--strategy", default="SmaCross")
+    run.add_argument("--param", action="append", type=_split_param, default=[], metavar="NAME=VALUE",
+                     help="override a strategy parameter (repeatable)")
+    _add_market_args(run)
+    run.add_argument("--extra-timeframe", action="append", choices=TIMEFRAME_CHOICES, default=[],
+                     metavar="TIMEFRAME",
+                     help="also feed each symbol at this coarser timeframe, for strategies that use it "
+                          "(repeatable)")
+    run.add_argument("--vectorized", action="store_true",
+                     help="use the NumPy engine when the strategy supports it")
+    run.add_argument("--portfolio", action="store_true",
+                     help="trade every loaded symbol with equal-weight sizing and report per-symbol stats")
+    run.add_argument("--plot", action="store_true", help="plot the result (imports matplotlib)")
+    run.add_argument("--profile", action="store_true",
+                     help="time each stage, add it to the JSON as 'profile' and print a summary to stderr")
+    run.add_argument("--cprofile", default=None, metavar="FILE",
+                     help="also record the run with cProfile into FILE (implies --profile)")
+    run.add_argument("--log", default=None, metavar="FILE",
+                     help="append the strategy log to FILE instead of writing it to stderr")
+    run.add_argument("--blotter", default=None, metavar="FILE",
+                     help="write the logged fills and closed trades to FILE (.csv, or .parquet with pyarrow)")
+    run.add_argument("--monte-carlo", type=int, default=0, metavar="N",
+                     help="resample the result N times and add the confidence intervals as 'monte_carlo'")
+    run.add_argument("--mc-method", choices=["shuffle", "bootstrap", "block"], default="shuffle",
+                     help="shuffle or bootstrap the closed trades, or block-bootstrap the bar returns "
+                          "(default: shuffle)")
+    run.add_argument("--mc-level", type=float, default=95.0,
+                     help="confidence level in percent (default: 95)")
+    run.add_argument("--mc-block", type=int, default=None, metavar="BARS",
+                     help="block length for --mc-method block (default: cube root of the bar count)")
+    run.add_argument("--seed", type=int, default=None, help="random seed for --monte-carlo")
+    _add_analytics_args(run)
+    _add_ring_arg(run)
+    _add_store_args(run)
+    run.set_defaults(func=cmd_run)
+
+    wf = sub.add_parser("walkforward",
+                        help="optimize on rolling train windows and report the out-of-sample results")
+    wf.add_argument("--strategy", default="SmaCross")
+    wf.add_argument("--range", action="append", type=_split_param, default=[], metavar="NAME=SPEC",
+                    dest="param_ranges",
+                    help="parameter range as in the GUI, e.g. fast_period=5..20:5 (repeatable)")
+    wf.add_argument("--train", type=int, required=True, help="train window length in bars")
+    wf.add_argument("--test", type=int, required=True, help="test window length in bars")
+    wf.add_argument("--step", type=int, default=None, help="bars between folds (default: --test)")
+    wf.add_argument("--rank-by", choices=["Sharpe", "Net PnL", "Max DrawDown"], default="Sharpe")
+    wf.add_argument("--workers", type=int, default=None)
+    _add_market_args(wf)
+    wf.set_defaults(func=cmd_walkforward)
+
+    live = sub.add_parser("live",
+                          help="run a strategy through the loaded history, then on bars as they arrive")
+    live.add_argument("--strategy", default="SmaCross")
+    live.add_argument("--param", action="append", type=_split_param, default=[], metavar="NAME=VALUE",
+                      help="override a strategy parameter (repeatable)")
+    _add_market_args(live, timeframe=False)
+    source = live.add_mutually_exclusive_group(required=True)
+    source.add_argument("--follow", action="store_true",
+                        help="take new bars from rows appended to the --data files")
+    source.add_argument("--connect", default=None, metavar="HOST:PORT",
+                        help="take new bars from a 'tradegeek replay' server")
+    live.add_argument("--until", default=None, metavar="DATE",
+                      help="use only the bars up to DATE as history")
+    live.add_argument("--portfolio", action="store_true",
+                      help="trade every loaded symbol with equal-weight sizing and report per-symbol stats")
+    live.add_argument("--max-bars", type=int, default=None, metavar="N",
+                      help="stop after N new bars (default: when the source ends, or on Ctrl-C)")
+    live.add_argument("--poll", type=float, default=0.01, metavar="SECONDS",
+                      help="how often --follow checks the files (default: 0.01)")
+    live.add_argument("--log", default=None, metavar="FILE",
+                      help="append the strategy log to FILE instead of writing it to stderr")
+    _add_analytics_args(live)
+    _add_ring_arg(live)
+    live.set_defaults(func=cmd_live)
+
+    batch = sub.add_parser("batch",
+                           help="backtest every CSV of a folder or glob on its own, on a worker pool, "
+                                "and print the summary table as JSON")
+    batch.add_argument("--data", nargs="+", required=True, metavar="DIR|GLOB|CSV",
+                       help="folders (every *.csv in them), glob patterns or price CSVs")
+    batch.add_argument("--strategy", nargs="+", default=["SmaCross"],
+                       help="strategies to run; each file is run with each of them (default: SmaCross)")
+    batch.add_argument("--param", action="append", type=_split_param, default=[], metavar="NAME=VALUE",
+                       help="override a parameter of every strategy that has it (repeatable)")
+    _add_market_args(batch, data=False)
+    batch.add_argument("--vectorized", action="store_true",
+                       help="use the NumPy engine for the strategies that support it")
+    batch.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    batch.add_argument("--loaders", type=int, default=2,
+                       help="threads loading the next files while the workers run (default: 2)")
+    batch.add_argument("--rank-by", choices=["Sharpe", "Net PnL", "Max DrawDown"], default="Sharpe")
+    batch.add_argument("--out", default=None, metavar="CSV",
+                       help="also write the summary table to CSV, a row as each run finishes")
+    _add_store_args(batch)
+    batch.set_defaults(func=cmd_batch)
+
+    scan = sub.add_parser("scan",
+                          help="list the symbols whose latest bar triggers a strategy's buy or close, "
+                               "strongest first, reading only the last bars of each file")
+    scan.add_argument("--data", nargs="+", required=True, metavar="DIR|GLOB|CSV",
+                      help="folders (every *.csv in them), glob patterns or price CSVs")
+    scan.add_argument("--strategy", default="SmaCross", help="a bundled strategy (default: SmaCross)")
+    scan.add_argument("--param", action="append", type=_split_param, default=[], metavar="NAME=VALUE",
+                      help="override a strategy parameter (repeatable)")
+    scan.add_argument("--signal", choices=["buy", "close", "both"], default="both",
+                      help="signals to list (default: both)")
+    scan.add_argument("--limit", type=int, default=None, metavar="N", help="list at most N symbols per signal")
+    scan.add_argument("--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    scan.set_defaults(func=cmd_scan)
+
+    replay = sub.add_parser("replay", help="serve the bars of price CSVs over a local socket for 'live'")
+    replay.add_argument("--data", nargs="+", required=True, metavar="CSV",
+                        help="price CSVs to replay, interleaved in time order")
+    replay.add_argument("--start", default=None, metavar="DATE", help="send only the bars from DATE on")
+    replay.add_argument("--interval", type=float, default=1.0, metavar="SECONDS",
+                        help="pause between bar timestamps (default: 1)")
+    replay.add_argument("--host", default="127.0.0.1")
+    replay.add_argument("--port", type=int, default=9750)
+    replay.add_argument("--no-cache", action="store_true", help="bypass the on-disk data cache")
+    replay.set_defaults(func=cmd_replay, timeframe=None, compact=False)
+
+    results = sub.add_parser("results", help="list the runs in the results database as JSON, best first")
+    results.add_argument("--strategy", default=None, help="only runs of this strategy")
+    results.add_argument("--symbol", default=None, help="only runs that traded this symbol")
+    results.add_argument("--sort", choices=SORT_CHOICES, default="sharpe", help="(default: sharpe)")
+    results.add_argument("--ascending", action="store_true", help="lowest first")
+    results.add_argument("--limit", type=int, default=20, help="runs to list (default: 20)")
+    results.add_argument("--show", type=int, default=None, metavar="ID",
+                         help="print one run in full, with its closed trades")
+    results.add_argument("--delete", type=int, default=None, metavar="ID", help="remove one run")
+    results.add_argument("--clear", action="store_true", help="remove every run")
+    results.add_argument("--store", default="", metavar="DB",
+                         help="results database (default: ~/.tradegeek/results.sqlite)")
+    results.set_defaults(func=cmd_results)
+
+    bench = sub.add_parser("bench", help="time the load/build/run/analyze/plot stages on synthetic data")
+    bench.add_argument("--preset", choices=["quick", "full"], default="quick",
+                       help="grid to run unless overridden below (default: quick)")
+    bench.add_argument("--strategy", nargs="+", default=None, help="strategies to run (default: all)")
+    bench.add_argument("--timeframe", nargs="+", choices=["Daily", "Hourly", "Minutes"], default=None)
+    bench.add_argument("--bars", nargs="+", default=None, metavar="N", help="bar counts, e.g. 10k 1M")
+    bench.add_argument("--symbols", nargs="+", default=None, metavar="N", help="symbol counts, e.g. 1 100")
+    bench.add_argument("--max-total-bars", default=None, metavar="N",
+                       help="skip cases with more than N bars x symbols")
+    bench.add_argument("--vectorized", action="store_true",
+                       help="also run the single-symbol cases on the NumPy engine")
+    bench.add_argument("--repeat", type=int, default=3,
+                       help="runs per case; the fastest time of each stage is kept (default: 3)")
+    bench.add_argument("--no-plot", action="store_true", help="skip the plot stage")
+    bench.add_argument("--out", default="bench.json", help="report file to write (default: bench.json)")
+    bench.add_argument("--baseline", default=None, metavar="JSON",
+                       help="earlier report to compare against; regressions give exit status 1")
+    bench.add_argument("--threshold", type=float, default=20.0,
+                       help="slowdown in percent that counts as a regression (default: 20)")
+    bench.set_defaults(func=cmd_bench)
+
+    strategies = sub.add_parser("strategies",
+                                help="list the bundled and plugin strategies with their parameters as JSON")
+    strategies.add_argument("--load", action="store_true",
+                            help="import every strategy to check it loads and to complete its parameters")
+    strategies.set_defaults(func=cmd_strategies)
+
+    gui = sub.add_parser("gui", help="start the Tkinter application")
+    gui.set_defaults(func=cmd_gui)
+
+    return parser
+
+
+def load_dataframes(args, profile=None):
+    """
+    Load every --data file and bring it to --timeframe. Returns
+    (dataframes, timeframe name).
+    """
+    from .data import DataCache, load_price_data, symbol_from_path
+    from .profiling import stage
+    from .resample import resample_dataframes, resolve_timeframe
+
+    cache = None if args.no_cache else DataCache()
+    dataframes = {}
+    with stage(profile, 'load'):
+        for file_path in args.data:
+            df, _ = load_price_data(file_path, cache=cache, compact=args.compact, profile=profile)
+            dataframes[symbol_from_path(file_path)] = df
+    timeframe = resolve_timeframe(dataframes, args.timeframe)
+    with stage(profile, 'resample'):
+        dataframes = resample_dataframes(dataframes, timeframe)
+    return dataframes, timeframe
+
+
+def resolve_strategy(name, overrides=(), partial=False):
+    """
+    The class and params of strategy ``name`` with ``overrides`` (NAME,
+    VALUE pairs) applied, or None (after printing why) if the strategy is
+    unknown or cannot be loaded, or if it takes no param of that name.
+    With ``partial`` overrides the strategy does not take are ignored.
+    """
+    from .registry import get_strategy_and_params, strategy_names
+
+    if name not in strategy_names():
+        print(f"Unknown strategy '{name}'. Bundled: {', '.join(strategy_names(plugins=False))} "
+              "(`tradegeek strategies` lists the plugins too)", file=sys.stderr)
+        return None
+
+    overrides = dict(overrides)
+    try:
+        if partial:
+            _, params = get_strategy_and_params(name)
+            overrides = {k: v for k, v in overrides.items() if k in params}
+        StratClass, params = get_strategy_and_params(name, overrides)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return None
+    unknown = sorted(set(overrides) - set(params))
+    if unknown:
+        print(f"Unknown parameter(s) for {name}: {', '.join(unknown)}", file=sys.stderr)
+        return None
+    return StratClass, params
+
+
+def open_results_store(args):
+    """
+    The results store, or None without --store or if it cannot be opened
+    (after saying so).
+    """
+    if args.store is None:
+        return None
+    import sqlite3
+
+    from .store import ResultsStore
+
+    try:
+        return ResultsStore(args.store or None)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Results store unavailable ({e}); the run is not recorded.", file=sys.stderr)
+        return None
+
+
+def _use_vectorized(args, StratClass, dataframes):
+    """
+    Whether the run can go through the vectorized engine as --vectorized
+    asks (saying why not if it cannot).
+    """
+    if not args.vectorized:
+        return False
+    from .vectorized import vectorized_unsupported
+
+    unsupported = vectorized_unsupported(StratClass, dataframes, args.portfolio, args.extra_timeframe)
+    if unsupported is not None:
+        print(f"{unsupported}; using Backtrader.", file=sys.stderr)
+        return False
+    return True
+
+
+def _stored_run(args, store, keys, params, profile):
+    """
+    The store record of an earlier run with the same inputs, or None if
+    there is none or this run has to happen anyway: profiles, plots and
+    logs need the run itself, and a run stored without the analytics is
+    run again to get them.
+    """
+    if profile or args.plot or args.blotter or args.log or params.get('printlog'):
+        return None
+    for key in keys.values():
+        record = store.get(key, curves=args.monte_carlo > 0)
+        if record is not None and not (args.analytics and 'analytics' not in record['summary']):
+            return record
+    return None
+
+
+def _run_vectorized(args, StratClass, params, dataframes, settings, profile, store):
+    """
+    The vectorized run for cmd_run: (summary, Monte Carlo samples, equity
+    to store), or None (after saying why) if the engine rejects the run.
+    """
+    from .profiling import capture, stage
+    from .vectorized import run_vectorized
+
+    initial_cash, commission, slippage_pct = settings
+    symbol, df = next(iter(dataframes.items()))
+    with_trades = args.monte_carlo > 0 or store is not None or args.analytics
+    samples = stored_equity = None
+    try:
+        with stage(profile, 'run'), capture(profile):
+            summary = run_vectorized(df, StratClass, params, initial_cash, commission, slippage_pct,
+                                     with_trades=with_trades)
+    except ValueError as e:
+        print(f"Vectorized engine unavailable ({e}), falling back to Backtrader.", file=sys.stderr)
+        return None
+    if args.monte_carlo > 0:
+        from .montecarlo import vectorized_samples
+
+        samples = vectorized_samples(df, summary, initial_cash)
+    if store is not None:
+        from .store import vectorized_equity
+
+        stored_equity = vectorized_equity(df, summary, symbol)
+    if args.analytics:
+        from .analytics import run_metrics, vectorized_record
+
+        with stage(profile, 'analyze'):
+            run_record = vectorized_record(df, summary, symbol, initial_cash, commission)
+            summary['analytics'] = run_metrics(run_record, args.rolling_window)['analytics']
+    if with_trades:
+        for name in ('buys', 'buy_prices', 'sells', 'sell_prices', 'trade_pnls'):
+            del summary[name]
+    if profile is not None:
+        profile.bars = len(df)
+
+    if args.blotter:
+        print("The vectorized engine logs no trades; no blotter written.", file=sys.stderr)
+    equity = summary.pop('equity')
+    if args.plot:
+        import matplotlib.pyplot as plt
+
+        plt.plot(df.index, equity, label="Portfolio Value")
+        plt.legend()
+        plt.title(f"{args.strategy} on {symbol}")
+        plt.grid()
+        plt.show()
+    return summary, samples, stored_equity
+
+
+def _run_backtrader(args, StratClass, params, dataframes, timeframe, settings, profile, store):
+    """
+    The Backtrader run for cmd_run: (summary, Monte Carlo samples, equity
+    to store, ring-buffer memory use), or None (after saying why) if the
+    run cannot be set up.
+    """
+    from .engine import EquityCurve, buffer_usage, build_cerebro, collect_results, instrument_cerebro
+    from .profiling import capture, stage
+    from .strategies import trade_logging
+    from .tradelog import TradeLog
+
+    initial_cash, commission, slippage_pct = settings
+    samples = stored_equity = memory = None
+    # Ring-buffer runs are always recorded
+    recorded = args.analytics or args.ring_buffer
+    with stage(profile, 'build'):
+        try:
+            cerebro = build_cerebro(dataframes, timeframe, initial_cash, commission, slippage_pct,
+                                    stdstats=args.plot and not args.ring_buffer, portfolio=args.portfolio,
+                                    extra_timeframes=tuple(args.extra_timeframe), analytics=args.analytics,
+                                    ring=args.ring_buffer)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return None
+        cerebro.addstrategy(StratClass, **params)
+        # The run record holds the equity curve already
+        if (args.monte_carlo > 0 or store is not None) and not recorded:
+            cerebro.addanalyzer(EquityCurve, _name='equity')
+        instrument_cerebro(cerebro, profile)
+    # Batched off the run thread; stderr keeps stdout to the JSON
+    try:
+        trade_log = TradeLog(write=None if args.log else sys.stderr.write, path=args.log)
+    except OSError as e:
+        print(f"Cannot open the log file: {e}", file=sys.stderr)
+        return None
+    with stage(profile, 'run'), capture(profile), trade_logging(trade_log):
+        strat = cerebro.run()[0]
+    if args.blotter:
+        try:
+            trade_log.export_blotter(args.blotter)
+        except (OSError, ValueError) as e:
+            print(f"Cannot write the blotter: {e}", file=sys.stderr)
+    with stage(profile, 'analyze'):
+        summary = collect_results(strat, cerebro, args.rolling_window)
+        if not args.analytics:
+            summary.pop('analytics', None)
+        if args.ring_buffer:
+            memory = buffer_usage(strat)
+        if recorded:
+            from .analytics import equity_from_record
+
+            equity = equity_from_record(strat.analyzers.recorder.get_analysis())
+        elif args.monte_carlo > 0 or store is not None:
+            equity = strat.analyzers.equity.get_analysis()
+        if store is not None:
+            stored_equity = equity
+        if args.monte_carlo > 0:
+            from .montecarlo import backtest_samples
+
+            samples = backtest_samples(equity, initial_cash)
+    if profile is not None:
+        profile.bars = sum(len(df) for df in dataframes.values())
+    if args.plot and args.ring_buffer:
+        # Backtrader cannot plot lines it did not keep; draw the record
+        import matplotlib.pyplot as plt
+
+        from .chart import ResultChart, backtest_series
+
+        with stage(profile, 'plot'):
+            fig = plt.figure()
+            chart = ResultChart(fig, fig.canvas)
+            chart.show(f"{args.strategy} on {next(iter(dataframes))}",
+                       **backtest_series(next(iter(dataframes.values())), equity))
+        plt.show()
+    elif args.plot:
+        with stage(profile, 'plot'):
+            cerebro.plot(style='candlestick')
+    return summary, samples, stored_equity, memory
+
+
+def _report_run(args, output, samples, profile):
+    """
+    Print the analytics, Monte Carlo and profile summaries of a run to
+    stderr (adding the last two to ``output``) and ``output`` as JSON.
+    """
+    from .profiling import stage
+
+    summary = output['results']
+    if args.analytics and 'analytics' in summary:
+        from .analytics import format_analytics
+
+        print(format_analytics(summary['analytics']), end="", file=sys.stderr)
+    if samples is not None:
+        from .montecarlo import format_monte_carlo, monte_carlo_summary, run_monte_carlo
+
+        try:
+            with stage(profile, 'monte_carlo'):
+                result = run_monte_carlo(samples, args.mc_method, args.monte_carlo, args.mc_level / 100.0,
+                                         block=args.mc_block, seed=args.seed)
+        except ValueError as e:
+            print(f"Monte Carlo unavailable: {e}", file=sys.stderr)
+        else:
+            output['monte_carlo'] = monte_carlo_summary(result)
+            print(format_monte_carlo(result), end="", file=sys.stderr)
+    if profile is not None:
+        output['profile'] = profile.to_dict()
+        print(profile.format(), end="", file=sys.stderr)
+    print(json.dumps(output, indent=2))
+
+
+def cmd_run(args):
+    from .profiling import RunProfile
+
+    resolved = resolve_strategy(args.strategy, args.param)
+    if resolved is None:
+        return 2
+    StratClass, params = resolved
+    if args.portfolio:
+        params = dict(params, portfolio=True)
+
+    profile = None
+    if args.profile or args.cprofile:
+        profile = RunProfile(args.strategy, cprofile_path=args.cprofile)
+    dataframes, timeframe = load_dataframes(args, profile)
+    settings = (args.cash, args.commission / 100.0, args.slippage)
+    vectorized = _use_vectorized(args, StratClass, dataframes)
+
+    summary = samples = memory = run_id = stored_equity = None
+    engine = "backtrader"
+    store = open_results_store(args)
+    if store is not None:
+        from .store import run_keys
+
+        keys = run_keys(dataframes, StratClass, params, timeframe, settings, vectorized, args.portfolio,
+                        tuple(args.extra_timeframe))
+        record = _stored_run(args, store, keys, params, profile)
+        if record is not None:
+            summary, engine, run_id = record['summary'], record['engine'], record['id']
+            print(f"Same inputs as stored run #{run_id}; reusing its results.", file=sys.stderr)
+            if args.monte_carlo > 0:
+                from .montecarlo import backtest_samples
+
+                samples = backtest_samples(record['equity'], settings[0])
+
+    if summary is None and vectorized:
+        result = _run_vectorized(args, StratClass, params, dataframes, settings, profile, store)
+        if result is not None:
+            summary, samples, stored_equity = result
+            engine = "vectorized"
+    if summary is None:
+        result = _run_backtrader(args, StratClass, params, dataframes, timeframe, settings, profile, store)
+        if result is None:
+            return 2
+        summary, samples, stored_equity, memory = result
+
+    reused = run_id is not None
+    if store is not None and not reused:
+        import sqlite3
+
+        try:
+            run_id = store.put(keys[engine], StratClass.__name__, engine, list(dataframes), timeframe, params,
+                               settings, summary, args.portfolio, equity=stored_equity)
+        except sqlite3.Error as e:
+            print(f"Cannot record the run in the results store: {e}", file=sys.stderr)
+
+    output = {
+        'strategy': args.strategy,
+        'params': params,
+        'symbols': list(dataframes),
+        'timeframe': timeframe,
+        'engine': engine,
+        'results': summary,
+    }
+    if run_id is not None:
+        output.update(run_id=run_id, from_store=reused)
+    if memory is not None:
+        output['memory'] = memory
+    _report_run(args, output, samples, profile)
+    return 0
+
+
+def cmd_live(args):
+    import signal
+    import time
+
+    from .data import symbol_from_path
+    from .engine import LiveData, buffer_usage, build_cerebro, collect_results
+    from .live import LiveBars, connect_bar_stream, csv_offsets, follow_csv_files, latency_stats
+    from .strategies import trade_logging
+    from .tradelog import TradeLog
+
+    resolved = resolve_strategy(args.strategy, args.param)
+    if resolved is None:
+        return 2
+    StratClass, params = resolved
+    if args.portfolio:
+        params = dict(params, portfolio=True)
+
+    paths = {symbol_from_path(path): path for path in args.data}
+    offsets = csv_offsets(paths) if args.follow else None
+    dataframes, timeframe = load_dataframes(args)
+    if args.until:
+        dataframes = {symbol: df.loc[:args.until] for symbol, df in dataframes.items()}
+    history_bars = sum(len(df) for df in dataframes.values())
+    tz = next(iter(dataframes.values())).index.tz
+
+    started = time.perf_counter()
+
+    def on_live():
+        print(f"Live after {history_bars} history bars in {time.perf_counter() - started:.1f}s; "
+              f"waiting for bars (Ctrl-C to stop)", file=sys.stderr)
+
+    hub = LiveBars(list(dataframes), max_bars=args.max_bars, on_live=on_live)
+    try:
+        cerebro = build_cerebro(dataframes, timeframe, args.cash, args.commission / 100.0, args.slippage,
+                                stdstats=False, portfolio=args.portfolio, live=hub, analytics=args.analytics,
+                                ring=args.ring_buffer)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    cerebro.addstrategy(StratClass, **params)
+    try:
+        trade_log = TradeLog(write=None if args.log else sys.stderr.write, path=args.log)
+    except OSError as e:
+        print(f"Cannot open the log file: {e}", file=sys.stderr)
+        return 2
+
+    try:
+        if args.follow:
+            follow_csv_files(paths, offsets, hub, tz=tz, poll=args.poll)
+        else:
+            host, _, port = args.connect.rpartition(':')
+            connect_bar_stream(host or "127.0.0.1", int(port), hub, tz=tz)
+    except (OSError, ValueError) as e:
+        print(f"Cannot start the live source: {e}", file=sys.stderr)
+        trade_log.close()
+        return 2
+
+    interrupt = signal.signal(signal.SIGINT, lambda *_: hub.stop())
+    try:
+        with trade_logging(trade_log):
+            strat = cerebro.run()[0]
+    finally:
+        signal.signal(signal.SIGINT, interrupt)
+        hub.stop()
+
+    history_seconds = hub.live_since - started if hub.live_since is not None else None
+    summary = collect_results(strat, cerebro, args.rolling_window)
+    if not args.analytics:
+        summary.pop('analytics', None)
+    output = {
+        'strategy': args.strategy,
+        'params': params,
+        'symbols': list(dataframes),
+        'timeframe': timeframe,
+        'engine': "backtrader-live",
+        'results': summary,
+        'live': {
+            'history_bars': history_bars,
+            'history_seconds': history_seconds,
+            'bars_received': hub.received,
+            'bars_skipped': sum(data.skipped for data in strat.datas if isinstance(data, LiveData)),
+            'bars_ignored': hub.ignored,
+            'latency': latency_stats(strat.analyzers.latency.get_analysis()['latency']),
+        },
+    }
+    if args.ring_buffer:
+        output['memory'] = buffer_usage(strat)
+    print(json.dumps(output, indent=2))
+    return 0
+
+
+def cmd_batch(args):
+    import csv
+    import signal
+
+    from .batch import BATCH_COLUMNS, BatchQueue, batch_files
+    from .data import DataCache
+    from .optimize import rank_sweep_results
+
+    strategies = {}
+    used = set()
+    for name in dict.fromkeys(args.strategy):
+        # One set of --param for every strategy: each takes the ones it has
+        resolved = resolve_strategy(name, args.param, partial=True)
+        if resolved is None:
+            return 2
+        StratClass, params = resolved
+        used.update(k for k, _ in args.param if k in params)
+        if 'printlog' in params:
+            params['printlog'] = False
+        strategies[name] = (StratClass, params)
+    unused = sorted({k for k, _ in args.param} - used)
+    if unused:
+        print(f"No strategy takes the parameter(s): {', '.join(unused)}", file=sys.stderr)
+        return 2
+
+    try:
+        paths = batch_files(args.data)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    store = open_results_store(args)
+    batch = BatchQueue(paths, strategies, timeframe=args.timeframe,
+                       settings=(args.cash, args.commission / 100.0, args.slippage), vectorized=args.vectorized,
+                       max_workers=args.workers, loaders=args.loaders,
+                       cache=None if args.no_cache else DataCache(), compact=args.compact, store=store)
+    print(f"Running {len(batch)} backtests: {len(paths)} files x {len(strategies)} strategies "
+          f"on {batch.max_workers} workers (Ctrl-C stops"
+          + ("; runs in the results store are not run again)" if store is not None else ")"), file=sys.stderr)
+
+    out = writer = None
+    if args.out:
+        try:
+            out = open(args.out, 'w', newline='')
+        except OSError as e:
+            print(f"Cannot write {args.out}: {e}", file=sys.stderr)
+            return 2
+        writer = csv.DictWriter(out, fieldnames=BATCH_COLUMNS + ['timeframe', 'path'], extrasaction='ignore')
+        writer.writeheader()
+
+    def on_result(row, done, total):
+        if row['error']:
+            status = f"failed: {row['error']}"
+        else:
+            sharpe = "n/a" if row.get('sharpe') is None else f"{row['sharpe']:.2f}"
+            status = (f"sharpe {sharpe}, net PnL {row['pnl_net']:.2f}, {row['total_trades']} trades"
+                      + (" (stored)" if row['from_store'] else f" in {row['seconds']:.1f}s"))
+        print(f"[{done}/{total}] {row['symbol']} {row['strategy']}: {status}", file=sys.stderr)
+        if writer is not None:
+            writer.writerow(row)
+            out.flush()
+
+    interrupt = signal.signal(signal.SIGINT, lambda *_: batch.cancel())
+    try:
+        results = batch.run(on_result=on_result)
+    finally:
+        signal.signal(signal.SIGINT, interrupt)
+        if out is not None:
+            out.close()
+
+    ranked = rank_sweep_results(results, args.rank_by)
+    failed = int(ranked['error'].notna().sum()) if not ranked.empty else 0
+    print(json.dumps({
+        'strategies': {name: params for name, (_, params) in strategies.items()},
+        'files': len(paths),
+        'runs': json.loads(ranked.to_json(orient='records')),
+        'failed': failed,
+        'cancelled': len(results) < len(batch),
+    }, indent=2))
+    return 1 if failed else 0
+
+
+def cmd_scan(args):
+    import time
+
+    from .batch import batch_files
+    from .scanner import scan_signals, scan_window
+
+    resolved = resolve_strategy(args.strategy, args.param)
+    if resolved is None:
+        return 2
+    StratClass, params = resolved
+    try:
+        bars = scan_window(StratClass, params)
+        paths = batch_files(args.data)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    started = time.perf_counter()
+    signals, errors = scan_signals(paths, StratClass, params, max_workers=args.workers)
+    seconds = time.perf_counter() - started
+    counts = signals['signal'].value_counts()
+    print(f"Scanned {len(paths)} files in {seconds:.2f}s (last {bars} bars of each): "
+          f"{counts.get('buy', 0)} buy, {counts.get('close', 0)} close, {len(errors)} unreadable",
+          file=sys.stderr)
+
+    if args.signal != "both":
+        signals = signals[signals['signal'] == args.signal]
+    if args.limit is not None:
+        signals = signals.groupby('signal', sort=False).head(args.limit)
+    print(json.dumps({
+        'strategy': args.strategy,
+        'params': params,
+        'window': bars,
+        'files': len(paths),
+        'seconds': seconds,
+        'signals': json.loads(signals.to_json(orient='records')),
+        'errors': errors,
+    }, indent=2))
+    return 0
+
+
+def cmd_replay(args):
+    from .live import replay_bars
+
+    dataframes, _ = load_dataframes(args)
+    if args.start:
+        dataframes = {symbol: df.loc[args.start:] for symbol, df in dataframes.items()}
+    total = sum(len(df) for df in dataframes.values())
+
+    def ready(port):
+        print(f"Serving {total} bars on {args.host}:{port}; waiting for a client", file=sys.stderr)
+
+    try:
+        sent = replay_bars(dataframes, args.port, args.interval, host=args.host, ready=ready)
+    except (OSError, ValueError) as e:
+        print(f"Cannot replay: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    print(f"Sent {sent} of {total} bars.", file=sys.stderr)
+    return 0
+
+
+def cmd_walkforward(args):
+    from .optimize import expand_grid, parse_param_range
+    from .walkforward import run_walk_forward
+
+    resolved = resolve_strategy(args.strategy)
+    if resolved is None:
+        return 2
+    StratClass, params = resolved
+    ranges = {k: [v] for k, v in params.items()}
+    for name, spec in args.param_ranges:
+        if name not in params:
+            print(f"Unknown parameter for {args.strategy}: {name}", file=sys.stderr)
+            return 2
+        try:
+            ranges[name] = parse_param_range(spec, params[name])
+        except ValueError as e:
+            print(f"Invalid range for {name}: {e}", file=sys.stderr)
+            return 2
+
+    dataframes, _ = load_dataframes(args)
+    symbol, df = next(iter(dataframes.items()))
+    try:
+        folds, oos = run_walk_forward(df, StratClass, expand_grid(ranges), args.train, args.test, args.step,
+                                      args.rank_by, args.cash, args.commission / 100.0, args.slippage,
+                                      max_workers=args.workers)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    for number, reason in folds.loc[folds['skipped'].notna(), ['fold', 'skipped']].itertuples(index=False):
+        print(f"Fold {number} skipped: {reason}", file=sys.stderr)
+    if oos is not None:
+        oos = {k: v for k, v in oos.items() if k not in ('index', 'equity')}
+    print(json.dumps({
+        'strategy': args.strategy,
+        'symbol': symbol,
+        'folds': json.loads(folds.to_json(orient='records', date_format='iso')),
+        'out_of_sample': oos,
+    }, indent=2))
+    return 0
+
+
+def cmd_results(args):
+    store = open_results_store(args)
+    if store is None:
+        return 2
+
+    if args.clear:
+        count = len(store)
+        store.clear()
+        print(f"Removed {count} runs.", file=sys.stderr)
+        return 0
+    try:
+        if args.delete is not None:
+            store.run(args.delete)
+            store.delete(args.delete)
+            print(f"Removed run #{args.delete}.", file=sys.stderr)
+            return 0
+        if args.show is not None:
+            from backtrader.utils import num2date
+
+            record = store.run(args.show)
+            equity = record.pop('equity')
+            if equity is not None:
+                record['bars'] = len(equity['value'])
+                record['trades'] = [{'symbol': symbol, 'closed': num2date(closed).isoformat(), 'pnl_net': pnl}
+                                    for (symbol, closed), pnl in zip(equity['closes'], equity['trades'])]
+            record['created'] = datetime.datetime.fromtimestamp(record['created']).isoformat()
+            print(json.dumps(record, indent=2))
+            return 0
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 2
+
+    runs = store.query(strategy=args.strategy, symbol=args.symbol, sort_by=args.sort, ascending=args.ascending,
+                       limit=args.limit)
+    runs['params'] = runs['params'].map(json.loads)
+    print(runs.to_json(orient='records', date_format='iso', indent=2))
+    return 0
+
+
+def cmd_strategies(args):
+    from .registry import PLUGIN_DIR, strategy_registry
+
+    registry = strategy_registry()
+    listing = []
+    status = 0
+    for info in registry:
+        entry = {'name': info.name, 'source': "bundled" if info.bundled else info.path, 'doc': info.doc}
+        if args.load:
+            try:
+                info.load()
+            except ValueError as e:
+                entry['error'] = str(e)
+                status = 1
+        entry.update(complete=info.static, params=info.schema())
+        listing.append(entry)
+    print(json.dumps({
+        'plugin_dir': PLUGIN_DIR,
+        'strategies': listing,
+        'skipped': [{'path': path, 'reason': reason} for path, reason in registry.errors],
+    }, indent=2))
+    return status
+
+
+def cmd_bench(args):
+    from .bench import (BENCH_PRESETS, bench_cases, compare_reports, format_report, load_report,
+                        parse_count, run_benchmarks, save_report)
+    from .registry import strategy_names
+
+    strategies = args.strategy or strategy_names(plugins=False)
+    if any(resolve_strategy(name) is None for name in strategies):
+        return 2
+
+    preset = BENCH_PRESETS[args.preset]
+    try:
+        bars = [parse_count(n) for n in args.bars] if args.bars else preset['bars']
+        symbols = [parse_count(n) for n in args.symbols] if args.symbols else preset['symbols']
+        max_total_bars = parse_count(args.max_total_bars) if args.max_total_bars else preset['max_total_bars']
+        baseline = load_report(args.baseline) if args.baseline else None
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    engines = ("backtrader", "vectorized") if args.vectorized else ("backtrader",)
+    cases = bench_cases(strategies, args.timeframe or preset['timeframes'], bars, symbols, engines,
+                        max_total_bars)
+    if not cases:
+        print("No benchmark cases within --max-total-bars.", file=sys.stderr)
+        return 2
+
+    def progress(done, total, result):
+        status = result.get('error') or ", ".join(f"{k} {v:.3f}s" for k, v in result['stages'].items())
+        print(f"[{done}/{total}] {result['id']}: {status}", file=sys.stderr)
+
+    report = run_benchmarks(cases, repeat=max(1, args.repeat), plot=not args.no_plot, progress=progress)
+    save_report(report, args.out)
+    print(format_report(report))
+
+    if baseline is None:
+        return 0
+    regressions = compare_reports(report, baseline, threshold=args.threshold / 100.0)
+    for r in regressions:
+        print(f"REGRESSION {r['id']} {r['metric']}: {r['baseline']:.3f} -> {r['current']:.3f} "
+              f"({(r['ratio'] - 1.0) * 100:+.0f}%)")
+    if not regressions:
+        print(f"No regressions against {args.baseline}.")
+    return 1 if regressions else 0
+
+
+def cmd_gui(args):
+    from .gui import main as gui_main
+
+    gui_main()
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
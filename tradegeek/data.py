@@ -0,0 +1,412 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from .profiling import stage
+
+
+# --------------------------------------------------------------
+# DATA LOADING & CACHE
+# --------------------------------------------------------------
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".tradegeek", "cache")
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+# Entry directories are written under "<entry>.tmp<random>" and renamed into
+# place; evict removes ones left behind for longer than this (seconds)
+CACHE_TMP_SUFFIX = ".tmp"
+CACHE_TMP_MAX_AGE = 3600
+
+
+# Columns bt.feeds.PandasData reads (matched case-insensitively)
+FEED_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'openinterest')
+LOAD_CHUNK_ROWS = 250_000
+# First read when reading a file backwards from its end
+TAIL_BLOCK_BYTES = 16 * 1024
+# Largest price whose float32 rounding error stays under half a cent
+FLOAT32_PRICE_MAX = 2 ** 24 * 0.005
+
+
+def _date_column(columns):
+    for name in ('Date', 'Datetime'):
+        if name in columns:
+            return name
+    raise ValueError("No 'Date' or 'Datetime' column found.")
+
+
+def symbol_from_path(file_path):
+    """
+    Symbol name for a data file: its base name without the extension.
+    """
+    return os.path.basename(file_path).split('.')[0]
+
+
+def is_read_only(values):
+    """
+    Whether the memory behind the array ``values`` (a view of it, as
+    Series.to_numpy returns) cannot be written.
+    """
+    while isinstance(values.base, np.ndarray):
+        values = values.base
+    return not values.flags.writeable
+
+
+def freeze_frame(df):
+    """
+    ``df`` with every column in a read-only array (copied unless it is
+    read-only already), so pandas refuses to edit it in place. Loaded and
+    resampled frames are frozen: their fingerprint (see
+    indicators.data_fingerprint) is computed once and must stay true.
+    """
+    columns = {}
+    for name in df.columns:
+        values = df[name].to_numpy()
+        if not is_read_only(values):
+            values = values.copy()
+            values.flags.writeable = False
+        columns[name] = values
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def _frozen(columns, index):
+    for values in columns.values():
+        values.flags.writeable = False
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def read_price_csv(file_path):
+    """
+    Parse a price CSV into a DataFrame indexed by its Date/Datetime column.
+    Raises ValueError if neither column exists.
+    """
+    df = pd.read_csv(file_path)
+    date_col = _date_column(df.columns)
+    df[date_col] = pd.to_datetime(df[date_col])
+    df.set_index(date_col, inplace=True)
+    return df
+
+
+def _float32_ok(name, values):
+    """
+    Volume/openinterest must survive float32 exactly; prices only need to
+    stay within half a cent.
+    """
+    if not len(values):
+        return True
+    if name.lower() in ('volume', 'openinterest'):
+        return bool(np.array_equal(values.astype(np.float32), values, equal_nan=True))
+    return bool(np.nanmax(np.abs(values), initial=0.0) <= FLOAT32_PRICE_MAX)
+
+
+def read_price_csv_chunked(file_path, chunksize=LOAD_CHUNK_ROWS):
+    """
+    Memory-lean variant of read_price_csv for large files.
+
+    Reads ``chunksize`` rows at a time, parses timestamps per chunk and keeps
+    only the columns PandasData consumes. Each column is stored as float32
+    unless a value would lose precision (see _float32_ok), in which case
+    that column is read again as float64.
+    """
+    header = pd.read_csv(file_path, nrows=0).columns
+    date_col = _date_column(header)
+    keep = [c for c in header if c.lower() in FEED_COLUMNS]
+
+    index_parts = []
+    parts = {c: [] for c in keep}
+    wide = set()  # columns that need float64
+
+    reader = pd.read_csv(file_path, usecols=[date_col] + keep, chunksize=chunksize,
+                         dtype={c: np.float64 for c in keep})
+    for chunk in reader:
+        index_parts.append(pd.DatetimeIndex(pd.to_datetime(chunk[date_col])))
+        for c in keep:
+            values = chunk[c].to_numpy()
+            if c not in wide and not _float32_ok(c, values):
+                wide.add(c)
+            parts[c].append(values if c in wide else values.astype(np.float32))
+        del chunk
+
+    if not index_parts:
+        raise ValueError("File has no rows.")
+
+    columns = {}
+    for c in keep:
+        if c in wide and parts[c][0].dtype == np.float32:
+            # Earlier chunks were already narrowed; re-read just this column.
+            parts[c] = None
+            columns[c] = pd.read_csv(file_path, usecols=[c], dtype={c: np.float64})[c].to_numpy()
+        else:
+            columns[c] = np.concatenate(parts[c])
+            parts[c] = None
+
+    index = index_parts[0].append(index_parts[1:]) if len(index_parts) > 1 else index_parts[0]
+    return _frozen(columns, index.rename(date_col))
+
+
+def read_price_tail(file_path, rows, columns=FEED_COLUMNS, block=TAIL_BLOCK_BYTES):
+    """
+    The last ``rows`` rows of a price CSV, read backwards from the end of
+    the file (``block`` bytes first, twice as much on each further read),
+    so the cost does not grow with the file's length. Returns (dates,
+    values): the Date/Datetime fields as written and {column name:
+    float64 array} for the ``columns`` present (matched case-insensitively;
+    empty fields become NaN).
+
+    Plain rows are split in one go, several times faster than read_csv on
+    a few hundred rows; files with quoted fields go through read_csv.
+    Raises ValueError for a missing date column or a malformed row.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        start = f.tell()
+        pos = f.seek(0, os.SEEK_END)
+        tail = b''
+        # One newline more than rows: the first line read may be cut
+        while pos > start and tail.count(b'\n') <= rows:
+            size = min(block, pos - start)
+            pos -= size
+            f.seek(pos)
+            tail = f.read(size) + tail
+            block *= 2
+    lines = tail.splitlines()
+    if pos > start:
+        lines = lines[1:]
+    lines = [line for line in lines if line.strip()][-rows:] if rows > 0 else []
+    wanted = {name.lower() for name in columns}
+
+    if b'"' in header or b'"' in tail:
+        df = pd.read_csv(io.BytesIO(header + b'\n'.join(lines)))
+        date_col = _date_column(df.columns)
+        return (df[date_col].astype(str).tolist(),
+                {c: df[c].to_numpy(dtype=np.float64) for c in df.columns if c.lower() in wanted})
+
+    names = [name.strip() for name in header.decode('utf-8-sig').split(',')]
+    date_pos = names.index(_date_column(names))
+    width = len(names)
+    if not lines:
+        return [], {name: np.empty(0) for name in names if name.lower() in wanted}
+    fields = b','.join(lines).split(b',')
+    if len(fields) != width * len(lines):
+        raise ValueError(f"Rows without {width} fields at the end of {file_path}")
+    dates = [field.decode('utf-8').strip() for field in fields[date_pos::width]]
+    values = {}
+    for i, name in enumerate(names):
+        if name.lower() not in wanted:
+            continue
+        column = fields[i::width]
+        try:
+            values[name] = np.fromiter(map(float, column), np.float64, len(column))
+        except ValueError:
+            values[name] = np.array([float(v) if v.strip() else np.nan for v in column], dtype=np.float64)
+    return dates, values
+
+
+def load_price_data(file_path, cache=None, compact=False, profile=None, measure=False):
+    """
+    Load one price file, going through ``cache`` (a DataCache) if given.
+    ``compact`` uses read_price_csv_chunked instead of read_price_csv.
+    A RunProfile in ``profile`` gets the 'load.cache_read', 'load.parse'
+    and 'load.cache_write' times.
+
+    The frame is frozen (see freeze_frame). Returns (df, info) where info
+    holds 'cached', 'bytes' (size of the
+    resulting frame) and 'peak_bytes'. With ``measure`` that is the peak
+    traced allocation while loading, else None: tracemalloc slows the
+    load down and traces the whole process, so only measure from one
+    thread at a time.
+    """
+    tracing = measure and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    try:
+        df = None
+        if cache is not None:
+            with stage(profile, 'load.cache_read'):
+                df = cache.load(file_path, compact=compact)
+        cached = df is not None
+        if not cached:
+            with stage(profile, 'load.parse'):
+                df = read_price_csv_chunked(file_path) if compact else read_price_csv(file_path)
+            if cache is not None:
+                with stage(profile, 'load.cache_write'):
+                    try:
+                        df = cache.store(file_path, df, compact=compact)
+                    except OSError:
+                        pass  # unwritable cache dir or full disk: keep the parsed frame
+        df = freeze_frame(df)
+        peak = tracemalloc.get_traced_memory()[1] if tracing else None
+    finally:
+        if tracing:
+            tracemalloc.stop()
+
+    info = {
+        'cached': cached,
+        'bytes': int(df.memory_usage(index=True, deep=True).sum()),
+        'peak_bytes': peak,
+    }
+    return df, info
+
+
+class DataCache:
+    """
+    Columnar on-disk copy of parsed CSVs: one .npy file per column plus the
+    int64 datetime index, so a reload skips read_csv and to_datetime.
+
+    Each source file gets one entry directory (named by a hash of its path)
+    whose meta.json records the mtime and size it was built from; an entry
+    whose source changed is treated as a miss and rebuilt. Entries are
+    evicted least-recently-used once the cache exceeds ``max_bytes``.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _entry_dir(self, file_path):
+        digest = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest)
+
+    @staticmethod
+    def _stamp(file_path):
+        st = os.stat(file_path)
+        return st.st_mtime_ns, st.st_size
+
+    def load(self, file_path, compact=False):
+        """
+        Return the cached DataFrame for ``file_path`` or None on a miss.
+        ``compact`` must match the mode the entry was stored with.
+        """
+        entry = self._entry_dir(file_path)
+        meta_path = os.path.join(entry, 'meta.json')
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            mtime_ns, size = self._stamp(file_path)
+            if meta['mtime_ns'] != mtime_ns or meta['size'] != size:
+                return None
+            if meta.get('compact', False) != compact:
+                return None
+
+            index = pd.DatetimeIndex(np.load(os.path.join(entry, 'index.npy')), name=meta['index_name'])
+            if meta['tz']:
+                index = index.tz_localize('UTC').tz_convert(meta['tz'])
+            columns = {name: np.load(os.path.join(entry, f'col{i}.npy'))
+                       for i, name in enumerate(meta['columns'])}
+        except (OSError, ValueError, KeyError):
+            return None
+
+        os.utime(meta_path)  # mark as recently used for eviction
+        return _frozen(columns, index)
+
+    def store(self, file_path, df, compact=False):
+        """
+        Write ``df`` (as returned by read_price_csv) into the cache and
+        return it in cached form: numeric columns as float64 (float32
+        columns from a compact load stay float32), other columns dropped, so
+        a hit and a miss hand back the same frame.
+
+        Raises OSError if the entry cannot be written; nothing is left
+        behind in that case.
+        """
+        entry = self._entry_dir(file_path)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # A fresh directory per call: loader threads and GUI jobs may store
+        # the same file at the same time
+        tmp = tempfile.mkdtemp(prefix=os.path.basename(entry) + CACHE_TMP_SUFFIX, dir=self.cache_dir)
+        try:
+            df = self._write_entry(tmp, file_path, df, compact)
+            shutil.rmtree(entry, ignore_errors=True)
+            try:
+                os.replace(tmp, entry)
+            except OSError:
+                if not os.path.isdir(entry):
+                    raise
+                # another thread put the same file in place meanwhile
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+        return df
+
+    def _write_entry(self, tmp, file_path, df, compact):
+        index = df.index
+        tz = str(index.tz) if index.tz is not None else None
+        if tz:
+            index = index.tz_convert('UTC').tz_localize(None)
+        np.save(os.path.join(tmp, 'index.npy'), index.to_numpy(dtype='datetime64[ns]'))
+
+        columns = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+        dtypes = {c: np.float32 if df[c].dtype == np.float32 else np.float64 for c in columns}
+        df = _frozen({c: df[c].to_numpy(dtype=dtypes[c], copy=True) for c in columns}, df.index)
+        for i, name in enumerate(columns):
+            np.save(os.path.join(tmp, f'col{i}.npy'), df[name].to_numpy())
+
+        mtime_ns, size = self._stamp(file_path)
+        meta = {
+            'path': os.path.abspath(file_path),
+            'mtime_ns': mtime_ns,
+            'size': size,
+            'index_name': df.index.name,
+            'tz': tz,
+            'columns': [str(c) for c in columns],
+            'compact': compact,
+        }
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        return df
+
+    def invalidate(self, file_path):
+        shutil.rmtree(self._entry_dir(file_path), ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def entries(self):
+        """
+        List (entry_dir, bytes, last_used) for every cache entry.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return []
+        result = []
+        for name in os.listdir(self.cache_dir):
+            if CACHE_TMP_SUFFIX in name:
+                continue  # still being written (see store)
+            entry = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry, 'meta.json')
+            try:
+                size = sum(e.stat().st_size for e in os.scandir(entry) if e.is_file())
+                result.append((entry, size, os.path.getmtime(meta_path)))
+            except OSError:
+                continue  # not an entry, or replaced or evicted meanwhile (another loader thread)
+        return result
+
+    def total_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """
+        Drop least-recently-used entries until the cache fits ``max_bytes``,
+        and temp directories of stores that died more than
+        CACHE_TMP_MAX_AGE seconds ago.
+        """
+        if os.path.isdir(self.cache_dir):
+            cutoff = time.time() - CACHE_TMP_MAX_AGE
+            for name in os.listdir(self.cache_dir):
+                path = os.path.join(self.cache_dir, name)
+                try:
+                    if CACHE_TMP_SUFFIX in name and os.path.getmtime(path) < cutoff:
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    continue  # renamed into place or removed meanwhile
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            entry, size, _ = entries.pop(0)
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
@@ -0,0 +1,730 @@
+import math
+import time
+from array import array
+
+import backtrader as bt
+import numpy as np
+from backtrader.linebuffer import LineBuffer
+from backtrader.utils import date2num
+
+from .analytics import FILL_DTYPE, TRADE_DTYPE, date_numbers, run_metrics
+from .data import FEED_COLUMNS
+from .resample import is_coarser, resample_to
+from .shared import SharedFrame, attach, shared_dataframe
+
+
+# --------------------------------------------------------------
+# BACKTEST ENGINE
+# (shared by the GUI run, the CLI and the optimizer workers)
+# --------------------------------------------------------------
+
+# Timeframe name -> (Backtrader timeframe, compression), finest first as
+# in resample.RESAMPLE_RULES
+TIMEFRAMES = {
+    "Minutes": (bt.TimeFrame.Minutes, 1),
+    "5 Minutes": (bt.TimeFrame.Minutes, 5),
+    "15 Minutes": (bt.TimeFrame.Minutes, 15),
+    "Hourly": (bt.TimeFrame.Minutes, 60),
+    "4 Hours": (bt.TimeFrame.Minutes, 240),
+    "Daily": (bt.TimeFrame.Days, 1),
+    "Weekly": (bt.TimeFrame.Weeks, 1),
+}
+
+
+class ArrayPandasData(bt.feeds.PandasData):
+    """
+    PandasData that copies the columns into plain lists once in start()
+    instead of reading every value through DataFrame.iloc. Delivers the
+    same bars; loading hundreds of feeds is otherwise dominated by iloc.
+
+    ``base`` is set on the extra-timeframe feeds of build_cerebro: the
+    traded feed they are a coarser view of. With ``ring`` (ring-buffer
+    runs) the numeric columns are read in place through memoryviews, as
+    SharedArrayData does, since the lists would cost four times the
+    DataFrame itself.
+
+    In a ring-buffer run a feed ahead of the others loads its next bar and
+    takes it back on every step. Backtrader's rewind() leaves the index of
+    a full ring buffer on its last slot, still showing that bar, and
+    loading it has pushed the oldest bar out. So the buffers get a spare
+    slot, as when replaying, and the bar is dropped and loaded again on
+    the next step.
+    """
+    params = (('base', None), ('ring', False))
+
+    def start(self):
+        super().start()
+        df = self.p.dataname
+
+        self._columns = []
+        for datafield in self.getlinealiases():
+            if datafield == 'datetime':
+                continue
+            colindex = self._colmapping[datafield]
+            if colindex is None:
+                continue
+            column = df.iloc[:, colindex]
+            if self.p.ring and column.dtype.kind in 'biuf':
+                values = memoryview(np.ascontiguousarray(column.to_numpy()))
+            else:
+                values = column.tolist()
+            self._columns.append((getattr(self.lines, datafield), values))
+
+        coldtime = self._colmapping['datetime']
+        if coldtime is None and self.p.ring:
+            self._datetimes = memoryview(date_numbers(df.index))
+            return
+        if coldtime is None:
+            tstamps = df.index.to_pydatetime()
+        else:
+            tstamps = [t.to_pydatetime() for t in df.iloc[:, coldtime]]
+        self._datetimes = [date2num(dt) for dt in tstamps]
+
+    def qbuffer(self, savemem=0, replaying=False):
+        super().qbuffer(savemem=savemem, replaying=True)
+
+    def rewind(self, size=1):
+        if self.lines.datetime.mode != LineBuffer.QBuffer:
+            return super().rewind(size)
+        self._unload(size)
+        self.backwards(size=size, force=True)
+
+    def _unload(self, size):
+        self._idx -= size
+
+    def _load(self):
+        self._idx += 1
+        idx = self._idx
+        if idx >= len(self._datetimes):
+            return False
+
+        for line, values in self._columns:
+            line[0] = values[idx]
+        self.lines.datetime[0] = self._datetimes[idx]
+        return True
+
+
+class CancellablePandasData(ArrayPandasData):
+    """
+    PandasData that stops delivering bars once ``cancel`` is set, so a
+    cancelled run does not sit through the rest of the preload.
+    """
+    params = (('cancel', None),)
+
+    def _load(self):
+        if self.p.cancel is not None and self.p.cancel.is_set():
+            return False
+        return super()._load()
+
+
+class SharedArrayData(bt.feed.DataBase):
+    """
+    Feed over a shared.SharedFrame (``dataname``): bars are read straight
+    from the shared-memory arrays, so a worker process holds neither a
+    DataFrame nor a per-run copy of the columns. Columns are matched to
+    the lines by name, case-insensitively, as PandasData does.
+
+    ``base`` and ``cancel`` work as on ArrayPandasData and
+    CancellablePandasData.
+    """
+    params = (('base', None), ('cancel', None))
+
+    def start(self):
+        super().start()
+        self._idx = -1
+        _, datetimes, columns = attach(self.p.dataname)
+        by_name = {name.lower(): values for name, values in columns.items()}
+
+        self._columns = []
+        for datafield in self.getlinealiases():
+            values = by_name.get(datafield)
+            if datafield == 'datetime' or values is None:
+                continue
+            # memoryview items are plain Python floats, like the lists of
+            # ArrayPandasData
+            self._columns.append((getattr(self.lines, datafield), memoryview(values)))
+        self._datetimes = memoryview(datetimes)
+
+    def _load(self):
+        if self.p.cancel is not None and self.p.cancel.is_set():
+            return False
+        self._idx += 1
+        idx = self._idx
+        if idx >= len(self._datetimes):
+            return False
+
+        for line, values in self._columns:
+            line[0] = values[idx]
+        self.lines.datetime[0] = self._datetimes[idx]
+        return True
+
+
+class LiveData(ArrayPandasData):
+    """
+    Feed for the live mode. Delivers the bars of its DataFrame (the
+    history) like ArrayPandasData, then the bars ``hub`` (a live.LiveBars)
+    receives for the feed's symbol, as they arrive. Bars not newer than
+    the last one delivered are skipped and counted in ``skipped``.
+
+    A live feed makes Cerebro run bar by bar without preloading, so the
+    strategy and its indicators keep their state and every new bar costs
+    a single next() step however long the history is. ``arrivals`` holds
+    the arrival times of the bars delivered since LiveLatency took them.
+    """
+    params = (('hub', None), ('qcheck', 0.5))
+
+    def islive(self):
+        return True
+
+    def haslivedata(self):
+        return self.p.hub.has_bars(self._name)
+
+    def start(self):
+        super().start()
+        self._live = False
+        self._lastdt = self._datetimes[-1] if len(self._datetimes) else -math.inf
+        self._fields = [getattr(self.lines, name) for name in FEED_COLUMNS]
+        # A live bar taken back in a ring-buffer run, to deliver again
+        self._pushback = None
+        self.arrivals = []
+        self.skipped = 0
+
+    def _unload(self, size):
+        if not self._live:
+            return super()._unload(size)
+        self._pushback = (self.lines.datetime[0], [line[0] for line in self._fields], self.arrivals.pop())
+
+    def _load(self):
+        hub = self.p.hub
+        if not self._live:
+            if hub.stopped:
+                return False
+            if super()._load():
+                return True
+            self._live = True
+            self.put_notification(self.LIVE)
+
+        if self._pushback is not None:
+            (dt, values, arrival), self._pushback = self._pushback, None
+        else:
+            while True:
+                bar = hub.take(self._name, self._qcheck)
+                if not bar:
+                    # None: nothing yet, False: the hub is closed
+                    return bar
+                dt, values, arrival = bar
+                if dt > self._lastdt:
+                    break
+                self.skipped += 1
+
+        self._lastdt = dt
+        for line, value in zip(self._fields, values):
+            line[0] = value
+        self.lines.datetime[0] = dt
+        self.arrivals.append(arrival)
+        return True
+
+
+def timeframe_feed_name(symbol, timeframe):
+    """
+    Name of the feed carrying ``symbol`` at an extra ``timeframe``.
+    """
+    return f"{symbol}@{timeframe}"
+
+
+def traded_datas(datas):
+    """
+    The feeds a strategy trades: all but the extra-timeframe feeds.
+    """
+    return [data for data in datas if getattr(data.p, 'base', None) is None]
+
+
+class EqualWeightSizer(bt.Sizer):
+    """
+    Portfolio sizing: each entry gets an equal share of the current
+    portfolio value (one slot per loaded feed), limited by the cash still
+    free. ``reserve`` keeps a fraction of each slot back so a gap up to the
+    next open does not get the order rejected for margin.
+    """
+    params = (('reserve', 0.02),)
+
+    def _getsizing(self, comminfo, cash, data, isbuy):
+        price = data.close[0]
+        if price <= 0:
+            return 0
+        slot = self.broker.getvalue() / len(traded_datas(self.strategy.datas))
+        budget = min(slot, cash) * (1.0 - self.p.reserve)
+        size = int(budget // price)
+        while size > 0 and size * price + comminfo.getcommission(size, price) > budget:
+            size -= 1
+        return size
+
+
+class SymbolTrades(bt.Analyzer):
+    """
+    Closed-trade statistics per feed name: trades, won, lost and net PnL
+    (won counts pnlcomm >= 0, like TradeAnalyzer).
+    """
+
+    def start(self):
+        self.rets = {data._name: dict(trades=0, won=0, lost=0, pnl_net=0.0)
+                     for data in traded_datas(self.datas)}
+
+    def notify_trade(self, trade):
+        if not trade.isclosed:
+            return
+        stats = self.rets[trade.data._name]
+        stats['trades'] += 1
+        if trade.pnlcomm >= 0:
+            stats['won'] += 1
+        else:
+            stats['lost'] += 1
+        stats['pnl_net'] += trade.pnlcomm
+
+
+def build_cerebro(dataframes, timeframe, initial_cash, commission, slippage_pct, stdstats=True,
+                  cancel=None, portfolio=False, extra_timeframes=(), live=None, analytics=False, ring=False):
+    """
+    Create a Cerebro with the broker settings, one PandasData feed per
+    symbol and the three analyzers used for reporting. Passing ``cancel``
+    (a threading.Event) makes the feeds stop loading once it is set.
+
+    ``analytics=True`` replaces those analyzers (and SymbolTrades) with
+    RunRecorder: collect_results then computes the same figures, and the
+    wider analytics.run_metrics set, once after the run.
+
+    ``dataframes`` should already be at ``timeframe`` (see
+    resample.resample_dataframes). Each of ``extra_timeframes`` (coarser
+    timeframe names) adds, after the traded feeds, one resampled feed per
+    symbol named by timeframe_feed_name(); strategies reach it with
+    TradeGeekStrategy.timeframe(data, name).
+
+    The values of ``dataframes`` may also be shared.SharedFrame handles
+    (as in the optimizer workers, which do not use ``ring``); those get a
+    SharedArrayData feed.
+
+    ``portfolio=True`` prepares a run where the strategy trades every feed
+    (pass ``portfolio=True`` to the strategy as well): positions are sized
+    with EqualWeightSizer, per-symbol stats are collected, and only the
+    first feed is plotted so charts stay usable with hundreds of symbols.
+
+    With ``live`` (a live.LiveBars) every symbol gets a LiveData feed that
+    continues its DataFrame with the bars arriving at the hub, and the
+    LiveLatency analyzer is added as 'latency'. Extra timeframes are not
+    available then.
+
+    ``ring=True`` bounds the memory of a run (Backtrader's exactbars=1):
+    every line, from the feeds to the indicators, becomes a ring buffer
+    as long as the longest lookback reading it and the feeds read their
+    DataFrames in place. The equity curve and the trades are kept by
+    RunRecorder, which such a run always gets, and buffer_usage() tells
+    what the lines saved. On TRIM_HISTORY_VERSION TrimHistory also drops
+    finished orders; on other Backtrader releases the order history still
+    grows with the number of orders. Bars are processed one at a time,
+    without the indicator cache, and cerebro.plot() draws nothing.
+    """
+    cerebro = bt.Cerebro(stdstats=stdstats, exactbars=int(ring))
+    cerebro.broker.setcash(initial_cash)
+    cerebro.broker.setcommission(commission=commission)
+
+    if slippage_pct > 0:
+        cerebro.broker.set_slippage_perc(slippage_pct / 100.0)
+
+    if live is not None and extra_timeframes:
+        raise ValueError("Extra timeframes are not available in live mode")
+    for extra in extra_timeframes:
+        if not is_coarser(extra, timeframe):
+            raise ValueError(f"Extra timeframe {extra} is not coarser than {timeframe}")
+
+    def make_feed(df, tf_name, **kwargs):
+        timeframe_bt, compression = TIMEFRAMES.get(tf_name, TIMEFRAMES["Minutes"])
+        if live is not None:
+            return LiveData(dataname=df, timeframe=timeframe_bt, compression=compression, hub=live, ring=ring,
+                            **kwargs)
+        if isinstance(df, SharedFrame):
+            return SharedArrayData(dataname=df, timeframe=timeframe_bt, compression=compression,
+                                   cancel=cancel, **kwargs)
+        if ring:
+            kwargs['ring'] = True
+        if cancel is None:
+            return ArrayPandasData(dataname=df, timeframe=timeframe_bt, compression=compression, **kwargs)
+        return CancellablePandasData(dataname=df, timeframe=timeframe_bt, compression=compression,
+                                     cancel=cancel, **kwargs)
+
+    for symbol, df in dataframes.items():
+        data_feed = make_feed(df, timeframe)
+        if portfolio and len(cerebro.datas) > 0:
+            data_feed.plotinfo.plot = False
+        cerebro.adddata(data_feed, name=symbol)
+
+    for base in list(cerebro.datas):
+        source = base.p.dataname
+        if isinstance(source, SharedFrame):
+            source = shared_dataframe(source)
+        for extra in extra_timeframes:
+            data_feed = make_feed(resample_to(source, extra), extra, base=base)
+            data_feed.plotinfo.plot = False
+            cerebro.adddata(data_feed, name=timeframe_feed_name(base._name, extra))
+
+    if live is not None:
+        # First, so it times the strategy rather than the other analyzers
+        cerebro.addanalyzer(LiveLatency, _name='latency')
+    if portfolio:
+        cerebro.addsizer(EqualWeightSizer)
+    if ring and trim_history_supported():
+        cerebro.addanalyzer(TrimHistory, _name='trimhistory')
+    if analytics or ring:
+        cerebro.addanalyzer(RunRecorder, portfolio=portfolio, ring=ring, _name='recorder')
+        return cerebro
+    if portfolio:
+        cerebro.addanalyzer(SymbolTrades, _name='symbols')
+
+    cerebro.addanalyzer(bt.analyzers.SharpeRatio, _name='sharpe')
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name='drawdown')
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name='tradeanalyzer')
+    return cerebro
+
+
+class RunProgress(bt.Analyzer):
+    """
+    Calls ``callback(bars_done)`` every ``every`` bars and stops the run
+    once ``cancel`` (a threading.Event) is set.
+    """
+    params = (
+        ('callback', None),
+        ('cancel', None),
+        ('every', 1000),
+    )
+
+    def start(self):
+        self.bars = 0
+
+    def next(self):
+        self.bars += 1
+        if self.bars % self.p.every == 0:
+            if self.p.callback is not None:
+                self.p.callback(self.bars)
+            if self.p.cancel is not None and self.p.cancel.is_set():
+                self.strategy.env.runstop()
+
+
+class EquityCurve(bt.Analyzer):
+    """
+    Portfolio value after every bar plus the fills on the first feed, for
+    the embedded chart. ``datetime`` holds Backtrader date numbers;
+    ``trades`` the net PnL of every closed trade (all feeds) in closing
+    order, for the Monte Carlo analysis, and ``closes`` the feed name and
+    date number each of them closed at.
+    """
+
+    def start(self):
+        self.rets = dict(datetime=[], value=[], fills=[], trades=[], closes=[])
+
+    def next(self):
+        self.rets['datetime'].append(self.strategy.datetime[0])
+        self.rets['value'].append(self.strategy.broker.getvalue())
+
+    def notify_order(self, order):
+        if order.status == order.Completed and order.data is self.datas[0]:
+            self.rets['fills'].append((order.data.num2date(order.executed.dt), order.executed.price,
+                                       order.isbuy()))
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            self.rets['trades'].append(trade.pnlcomm)
+            self.rets['closes'].append((trade.data._name, trade.dtclose))
+
+
+class RunRecorder(bt.Analyzer):
+    """
+    Records a run once for analytics.run_metrics: the portfolio value after
+    every bar, and the fills and closed trades of the traded feeds, in
+    compact arrays. A bar costs two appends, where SharpeRatio, DrawDown
+    and TradeAnalyzer each do their bookkeeping in Python.
+
+    The exposure (gross position value over portfolio value, per bar and
+    per feed) is worked out in stop() from the fills and the feeds' close
+    lines. The analysis is the record: 'initial_cash', 'symbols',
+    'portfolio', 'datetime', 'value', 'exposure', 'symbol_exposure',
+    'fills' (analytics.FILL_DTYPE), 'trades' (analytics.TRADE_DTYPE) and
+    'opened', the number of trades opened.
+
+    With ``ring`` the close lines are ring buffers and cannot be read back
+    in stop(), so next() adds up the value of the open positions instead.
+    """
+    params = (('portfolio', False), ('ring', False))
+
+    def start(self):
+        self._datas = traded_datas(self.datas)
+        self._ids = {id(data): i for i, data in enumerate(self._datas)}
+        self._datetime = array('d')
+        self._value = array('d')
+        self._fills = []
+        self._trades = []
+        self._open = {}
+        self._opened = 0
+        self._initial_cash = self.strategy.broker.getvalue()
+        # Ring runs only: gross position value per bar, the per-feed sums
+        # of held value over portfolio value, and feed index -> position
+        self._gross = array('d') if self.p.ring else None
+        self._held_share = [0.0] * len(self._datas)
+        self._positions = {}
+
+    def next(self):
+        value = self.strategy.broker.getvalue()
+        self._datetime.append(self.strategy.datetime[0])
+        self._value.append(value)
+        if self._gross is None:
+            return
+        gross = 0.0
+        for i, size in self._positions.items():
+            held = abs(size) * self._datas[i].close[0]
+            gross += held
+            self._held_share[i] += held / value if value else math.nan
+        self._gross.append(gross)
+
+    def notify_order(self, order):
+        if order.status == order.Completed:
+            executed = order.executed
+            symbol = self._ids.get(id(order.data), -1)
+            self._fills.append((executed.dt, symbol, executed.size, executed.price, executed.comm))
+            if self._gross is not None and symbol >= 0:
+                size = self._positions.pop(symbol, 0.0) + executed.size
+                if size != 0.0:
+                    self._positions[symbol] = size
+
+    def notify_trade(self, trade):
+        if trade.justopened:
+            self._opened += 1
+            self._open[trade.ref] = (trade.size, trade.price)
+        if trade.isclosed:
+            size, price = self._open.pop(trade.ref, (math.nan, math.nan))
+            self._trades.append((self._ids.get(id(trade.data), -1), trade.dtopen, trade.dtclose, trade.barlen,
+                                 size, price, trade.pnl, trade.pnlcomm))
+
+    def _held_from_fills(self, fills, datetimes, value):
+        # Gross position value per bar and the mean share of each feed
+        gross = np.zeros(len(value))
+        symbol_exposure = np.zeros(len(self._datas))
+        for i, data in enumerate(self._datas):
+            own = fills[fills['symbol'] == i]
+            if not len(own):
+                continue
+            # Position after each bar, valued at the feed's last close
+            position = np.concatenate(([0.0], np.cumsum(own['size'])))
+            position = position[np.searchsorted(own['datetime'], datetimes, side='right')]
+            closes = np.asarray(data.close.array)
+            last = np.searchsorted(np.asarray(data.datetime.array), datetimes, side='right') - 1
+            held = np.where(position != 0.0, np.abs(position) * closes[np.maximum(last, 0)], 0.0)
+            gross += held
+            with np.errstate(divide='ignore', invalid='ignore'):
+                symbol_exposure[i] = np.mean(held / value)
+        return gross, symbol_exposure
+
+    def stop(self):
+        datetimes = np.frombuffer(self._datetime, dtype=np.float64)
+        value = np.frombuffer(self._value, dtype=np.float64)
+        # Orders on extra-timeframe feeds are not counted
+        fills = np.array(self._fills, dtype=FILL_DTYPE)
+        fills = fills[fills['symbol'] >= 0]
+        trades = np.array(self._trades, dtype=TRADE_DTYPE)
+        if self._gross is None:
+            gross, symbol_exposure = self._held_from_fills(fills, datetimes, value)
+        else:
+            gross = np.frombuffer(self._gross, dtype=np.float64)
+            symbol_exposure = np.array(self._held_share) / max(len(value), 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            exposure = gross / value
+
+        self.rets = dict(
+            initial_cash=self._initial_cash,
+            symbols=[data._name for data in self._datas],
+            portfolio=self.p.portfolio,
+            datetime=datetimes,
+            value=value,
+            exposure=exposure,
+            symbol_exposure=symbol_exposure,
+            fills=fills,
+            trades=trades[trades['symbol'] >= 0],
+            opened=self._opened,
+        )
+
+
+# The Backtrader release TrimHistory is tested against; it prunes private
+# state, so other releases run without it
+TRIM_HISTORY_VERSION = "1.9.78.123"
+
+
+def trim_history_supported():
+    return getattr(bt, '__version__', None) == TRIM_HISTORY_VERSION
+
+
+class TrimHistory(bt.Analyzer):
+    """
+    For ring-buffer runs: Backtrader keeps every order it handled, in the
+    broker and in the strategy, and every closed trade until the run
+    ends, so a busy strategy grows with its order count where the lines
+    no longer grow. Every ``every`` bars the finished orders and all but
+    the last trade of each trade id (the only one that can be open) are
+    dropped; RunRecorder has recorded them by then.
+
+    This prunes Backtrader's private state (broker.orders,
+    strategy._orders and strategy._trades), so build_cerebro only adds it
+    on TRIM_HISTORY_VERSION.
+    """
+    params = (('every', 1000),)
+
+    def start(self):
+        self._bars = 0
+
+    def next(self):
+        self._bars += 1
+        if self._bars % self.p.every:
+            return
+        strategy = self.strategy
+        broker = strategy.broker
+        # The broker looks orders up there only to report their status,
+        # and falls back to the order itself
+        broker.orders = [order for order in broker.orders if order.alive()]
+        # Already notified
+        strategy._orders = []
+        for trades in strategy._trades.values():
+            for tradeid, history in trades.items():
+                if len(history) > 1:
+                    trades[tradeid] = history[-1:]
+
+
+class LiveLatency(bt.Analyzer):
+    """
+    Seconds from the arrival of each live bar to the end of the strategy
+    step that processed it, by which time its orders are placed, in
+    ``latency``. Also flushes the strategy's trade log after such a step,
+    so live decisions are written at once rather than on the next event.
+    """
+
+    def start(self):
+        self.rets = dict(latency=array('d'))
+        self._feeds = [data for data in self.datas if isinstance(data, LiveData)]
+        self._sink = getattr(self.strategy, '_sink', None)
+
+    def next(self):
+        now = time.perf_counter()
+        latency = self.rets['latency']
+        fresh = False
+        for data in self._feeds:
+            if data.arrivals:
+                latency.extend(now - arrival for arrival in data.arrivals)
+                data.arrivals.clear()
+                fresh = True
+        if fresh and self._sink is not None:
+            self._sink.flush()
+
+
+class StageProfiler(bt.Analyzer):
+    """
+    Splits cerebro.run() into the RUN_PARTS of ``profile``. Hooks in at
+    start(), which runs after the feeds are preloaded and the strategy is
+    built but before any bar is processed.
+    """
+    params = (('profile', None),)
+
+    def start(self):
+        profile = self.p.profile
+        strategy = self.strategy
+        profile.wrap(strategy, '_once', 'run.indicators')
+        for attr in ('prenext', 'nextstart', 'next'):
+            profile.wrap(strategy, attr, 'run.strategy')
+        for attr in ('notify_order', 'notify_trade'):
+            profile.wrap(strategy, attr, 'run.notify')
+        for attr in ('_next_analyzers', '_next_observers'):
+            profile.wrap(strategy, attr, 'run.analyzers')
+
+
+def instrument_cerebro(cerebro, profile):
+    """
+    Time the parts of the coming cerebro.run() into ``profile`` (call it
+    after all feeds are added). Does nothing when ``profile`` is None.
+    """
+    if profile is None:
+        return
+    for data in cerebro.datas:
+        profile.wrap(data, '_start', 'run.preload')
+        profile.wrap(data, 'preload', 'run.preload')
+    profile.wrap(cerebro, '_brokernotify', 'run.broker')
+    cerebro.addanalyzer(StageProfiler, profile=profile, _name='stageprofiler')
+
+
+def buffer_usage(strat):
+    """
+    Line values a finished run holds against those it would hold keeping
+    every bar, over all the line buffers of its feeds, indicators and
+    observers: 'lines', 'kept', 'full', plus 'in_place', the feed column
+    values ring-buffer feeds read from their DataFrames rather than copy.
+    'saved_mb' prices a line value at 8 bytes (array('d')) and a copied
+    one at 32 (list slot plus float).
+    """
+    kept = full = count = in_place = 0
+    seen = set()
+    stack = [strat] + list(strat.datas)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        for line in obj.lines:
+            if isinstance(line, LineBuffer) and id(line) not in seen:
+                seen.add(id(line))
+                count += 1
+                kept += len(line.array)
+                full += len(line)
+        for group in getattr(obj, '_lineiterators', {}).values():
+            stack.extend(group)
+
+    for data in strat.datas:
+        if getattr(data.p, 'ring', False):
+            views = [values for _, values in data._columns] + [data._datetimes]
+            in_place += sum(len(values) for values in views if isinstance(values, memoryview))
+    saved = max(full - kept, 0) * 8 + in_place * 32
+    return {'lines': count, 'kept': kept, 'full': full, 'in_place': in_place, 'saved_mb': saved / 1e6}
+
+
+def format_buffer_usage(usage):
+    return (f"Ring buffer: kept {usage['kept']:,} of {usage['full']:,} values in {usage['lines']} lines, "
+            f"read {usage['in_place']:,} feed values in place; ~{usage['saved_mb']:,.0f} MB saved\n")
+
+
+def collect_results(strat, cerebro, window=None):
+    """
+    Flatten the analyzer output of a finished strategy into a plain dict.
+    Portfolio runs also get 'per_symbol': symbol -> trade stats.
+
+    A run built with ``analytics=True`` gets the same keys from its
+    RunRecorder, plus 'analytics' (see analytics.run_metrics, which takes
+    the rolling ``window``).
+    """
+    recorder = getattr(strat.analyzers, 'recorder', None)
+    if recorder is not None:
+        summary = run_metrics(recorder.get_analysis(), window)
+        summary['final_value'] = cerebro.broker.getvalue()
+        return summary
+
+    sharpe_analyzer = strat.analyzers.sharpe.get_analysis()
+    drawdown_analyzer = strat.analyzers.drawdown.get_analysis()
+    trade_analyzer = strat.analyzers.tradeanalyzer.get_analysis()
+
+    total = trade_analyzer.get('total', {})
+    summary = {
+        'final_value': cerebro.broker.getvalue(),
+        'sharpe': sharpe_analyzer.get('sharperatio'),
+        'max_drawdown': drawdown_analyzer.max.drawdown,
+        'drawdown_len': drawdown_analyzer.max.len,
+        'total_trades': total.get('total', 0),
+        'won': trade_analyzer.get('won', {}).get('total', 0),
+        'lost': trade_analyzer.get('lost', {}).get('total', 0),
+        'pnl_net': trade_analyzer.get('pnl', {}).get('net', {}).get('total', 0.0),
+    }
+
+    symbols = getattr(strat.analyzers, 'symbols', None)
+    if symbols is not None:
+        summary['per_symbol'] = symbols.get_analysis()
+    return summary
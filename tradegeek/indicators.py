@@ -0,0 +1,242 @@
+import hashlib
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from .data import FEED_COLUMNS, is_read_only
+
+
+# --------------------------------------------------------------
+# INDICATOR CACHE
+# (computed indicator lines shared by consecutive runs and strategies)
+# --------------------------------------------------------------
+
+INDICATOR_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+
+class IndicatorCache:
+    """
+    In-process LRU of computed indicator lines, bounded by the bytes held.
+    Keys come from _indicator_key(); values are (minperiod, line arrays).
+    """
+
+    def __init__(self, max_bytes=INDICATOR_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, minperiod, lines):
+        size = sum(line.itemsize * len(line) for line in lines)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= sum(line.itemsize * len(line) for line in old[1])
+            self._entries[key] = (minperiod, lines)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= sum(line.itemsize * len(line) for line in evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# One cache per process: the GUI/CLI process and each sweep worker.
+INDICATOR_CACHE = IndicatorCache()
+
+# id(DataFrame) -> (weakref to it, its layout, fingerprint). DataFrames
+# are not hashable, and the fingerprint must not outlive the frame it
+# describes.
+_FINGERPRINTS = {}
+
+
+def _layout(df, columns):
+    """
+    The index object and the memory of each of ``columns`` of ``df``, or
+    None if a column can be written in place: only a frame whose layout is
+    unchanged and read-only still holds the bars it was hashed from.
+    """
+    arrays = [df[c].to_numpy() for c in columns]
+    if not all(is_read_only(values) for values in arrays):
+        return None
+    return df.index, [(values.__array_interface__['data'][0], values.shape, values.strides, values.dtype)
+                      for values in arrays]
+
+
+def data_fingerprint(df):
+    """
+    Content hash of a loaded price DataFrame (index and the FEED_COLUMNS
+    it has).
+
+    It is computed once per frozen DataFrame (see data.freeze_frame; every
+    loaded frame is), whose bars cannot be edited in place. Replacing a
+    column or the index of such a frame is noticed, and a frame with
+    writable columns is hashed again on every call.
+    """
+    # Only what the feed reads: other columns (a symbol, notes) are kept
+    # by read_price_csv but dropped by the data cache, and the bytes of an
+    # object column are pointers, different on every load
+    columns = [c for c in df.columns if str(c).lower() in FEED_COLUMNS]
+    layout = _layout(df, columns)
+    known = _FINGERPRINTS.get(id(df))
+    if (layout is not None and known is not None and known[0]() is df
+            and known[1][0] is layout[0] and known[1][1] == layout[1]):
+        return known[2]
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr([str(c).lower() for c in columns]).encode())
+    # In nanoseconds whatever the index's unit: read_csv parses to
+    # microseconds, the data cache hands back nanoseconds
+    digest.update(df.index.as_unit('ns').asi8.tobytes())
+    for col in columns:
+        values = df[col].to_numpy()
+        if values.dtype.kind in 'biuf':
+            # As the feed gets them, so integer volume parsed from the CSV
+            # and the cache's float64 copy match
+            digest.update(values.astype(np.float64, copy=False).tobytes())
+        else:
+            digest.update(pd.util.hash_array(values).tobytes())
+    fingerprint = digest.hexdigest()
+
+    if layout is not None:
+        key = id(df)
+        _FINGERPRINTS[key] = (weakref.ref(df, lambda _, key=key: _FINGERPRINTS.pop(key, None)), layout,
+                              fingerprint)
+    return fingerprint
+
+
+def _feed_key(feed):
+    if feed.islive() or not feed.buflen():
+        # Grows while it runs, or is not preloaded (ring-buffer runs): its
+        # indicators are computed bar by bar
+        return None
+    source = getattr(feed.p, 'dataname', None)
+    if hasattr(source, 'columns'):
+        return data_fingerprint(source), feed.buflen()
+    # shared.SharedFrame: fingerprinted when it was shared
+    fingerprint = getattr(source, 'fingerprint', None)
+    if fingerprint is None:
+        return None
+    return fingerprint, feed.buflen()
+
+
+def _source_key(obj):
+    if isinstance(obj, bt.AbstractDataBase):
+        return _feed_key(obj)
+    # Another cached indicator (None if it could not be keyed either)
+    return getattr(obj, '_cache_key', None)
+
+
+def _input_key(data):
+    """
+    Cache key part for one indicator input: a feed, a cached indicator,
+    or a single line of either (e.g. ``data.close``, ``macd.signal``).
+    Anything else, such as a line operation, cannot be keyed.
+    """
+    if not isinstance(data, bt.LineSeriesStub):
+        return _source_key(data)
+
+    line = data.lines[0]
+    owner = getattr(line, '_owner', None)
+    owner_key = _source_key(owner)
+    if owner_key is None:
+        return None
+    for idx, owner_line in enumerate(owner.lines):
+        if owner_line is line:
+            return owner_key + (idx,)
+    return None
+
+
+def _indicator_key(ind):
+    inputs = tuple(_input_key(data) for data in ind.datas)
+    if not inputs or None in inputs:
+        return None
+    params = tuple((name, getattr(ind.p, name)) for name in ind.p._getkeys())
+    return ind.__class__.__name__, params, inputs
+
+
+def _cached(indcls):
+    """
+    Subclass a Backtrader indicator so that, when the same indicator was
+    computed before on the same data, it replays the stored lines instead
+    of building and running its sub-indicators. Results are stored after a
+    runonce (vectorized) calculation.
+    """
+
+    class Cached(indcls):
+        # Keep the moving averages from replacing their originals in
+        # bt.ind.MovAv
+        _notregister = True
+
+        def __init__(self):
+            self._cache_key = _indicator_key(self)
+            self._cache_hit = None
+            if self._cache_key is not None:
+                self._cache_hit = INDICATOR_CACHE.get(self._cache_key)
+
+            if self._cache_hit is None:
+                super().__init__()
+            else:
+                self.updateminperiod(self._cache_hit[0])
+                # Per instance: overriding next() on the class would make
+                # the indicator metaclass swap in once_via_next
+                self.prenext = self.nextstart = self.next = self._replay
+
+        def _once(self):
+            if self._cache_hit is None:
+                super()._once()
+                if self._cache_key is not None:
+                    INDICATOR_CACHE.put(self._cache_key, self._minperiod,
+                                        tuple(array('d', line.array) for line in self.lines))
+                return
+
+            self.forward(size=self._clock.buflen())
+            for line, values in zip(self.lines, self._cache_hit[1]):
+                line.array[:] = values
+            self.home()
+            for line in self.lines:
+                line.oncebinding()
+
+        def _replay(self):
+            idx = len(self) - 1
+            for line, values in zip(self.lines, self._cache_hit[1]):
+                line[0] = values[idx]
+
+    Cached.__name__ = Cached.__qualname__ = indcls.__name__
+    return Cached
+
+
+# Drop-in replacements for the bt.ind classes the bundled strategies use
+SMA = _cached(bt.ind.SMA)
+RSI = _cached(bt.ind.RSI)
+BollingerBands = _cached(bt.ind.BollingerBands)
+MACD = _cached(bt.ind.MACD)
+Stochastic = _cached(bt.ind.Stochastic)
+CrossOver = _cached(bt.ind.CrossOver)
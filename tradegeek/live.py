@@ -0,0 +1,289 @@
+import math
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from backtrader.utils import date2num
+
+from .data import FEED_COLUMNS, _date_column
+
+
+# --------------------------------------------------------------
+# LIVE MODE
+# (bars pushed into a running Cerebro as they arrive, from local stand-in feeds)
+# --------------------------------------------------------------
+
+LIVE_POLL_SECONDS = 0.01
+REPLAY_PORT = 9750
+
+
+class LiveBars:
+    """
+    Hand-over point between the bar sources, which run in their own
+    threads, and the engine.LiveData feeds of a running Cerebro. put()
+    queues a bar for its symbol together with the time it arrived and the
+    symbol's feed take()s it on its next step.
+
+    close() ends the run once the queued bars are processed; stop() ends
+    it at once, skipping the rest of the history as well. With
+    ``max_bars`` the hub closes by itself after that many bars.
+    ``on_live`` is called (from the Cerebro thread) once every feed is
+    through its history.
+    """
+
+    def __init__(self, symbols, max_bars=None, on_live=None):
+        self.max_bars = max_bars
+        self.on_live = on_live
+        self.received = 0
+        self.ignored = 0  # malformed bars and those of symbols without a feed
+        self.closed = False
+        self.stopped = False
+        self.live_since = None
+
+        self._pending = {symbol: deque() for symbol in symbols}
+        self._count = 0
+        self._waiting = set(self._pending)
+        self._cond = threading.Condition()
+
+    def put(self, symbol, dt, values, arrival=None):
+        """
+        Queue one bar: ``dt`` as a Backtrader date number and ``values`` in
+        data.FEED_COLUMNS order. ``arrival`` (time.perf_counter()) defaults
+        to now. Returns False if the bar was dropped.
+        """
+        if arrival is None:
+            arrival = time.perf_counter()
+        with self._cond:
+            pending = self._pending.get(symbol)
+            if pending is None or self.closed:
+                self.ignored += 1
+                return False
+            pending.append((dt, values, arrival))
+            self._count += 1
+            self.received += 1
+            if self.max_bars is not None and self.received >= self.max_bars:
+                self.closed = True
+            self._cond.notify_all()
+        return True
+
+    def take(self, symbol, timeout=0.0):
+        """
+        The next bar of ``symbol`` as (date number, values, arrival), or
+        None if there is none. Bars that came in during the history count
+        as arriving when the feeds went live, so the latencies measure the
+        live steps rather than the warm-up. Waits up to ``timeout`` seconds but returns
+        as soon as a bar of any symbol comes in, so a waiting feed never
+        holds back the others. False once the hub is closed and drained.
+        """
+        with self._cond:
+            if self._waiting:
+                self._waiting.discard(symbol)
+                if not self._waiting:
+                    self.live_since = time.perf_counter()
+                    if self.on_live is not None:
+                        self.on_live()
+            if self.stopped:
+                return False
+            pending = self._pending[symbol]
+            if not pending and not self.closed and timeout > 0:
+                self._cond.wait_for(lambda: self._count or self.closed, timeout)
+            if pending:
+                self._count -= 1
+                dt, values, arrival = pending.popleft()
+                return dt, values, max(arrival, self.live_since)
+            return False if self.closed else None
+
+    def has_bars(self, symbol):
+        return bool(self._pending[symbol])
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self.closed = self.stopped = True
+            self._cond.notify_all()
+
+
+class BarParser:
+    """
+    Turns CSV rows of a price file with ``header`` (its column names) into
+    (date number, values) for LiveBars.put(), reading the columns the way
+    the loaders do. Naive timestamps are taken to be in ``tz``, the
+    timezone of the history, if it has one.
+    """
+
+    def __init__(self, header, tz=None):
+        columns = [name.strip() for name in header]
+        self._date = columns.index(_date_column(columns))
+        lower = [name.lower() for name in columns]
+        self._fields = [lower.index(name) if name in lower else None for name in FEED_COLUMNS]
+        self.tz = tz
+
+    def parse(self, fields):
+        stamp = pd.Timestamp(fields[self._date].strip())
+        if stamp.tzinfo is None and self.tz is not None:
+            stamp = stamp.tz_localize(self.tz)
+        values = tuple(math.nan if i is None else float(fields[i]) for i in self._fields)
+        return date2num(stamp.to_pydatetime()), values
+
+
+def _start_thread(target, name):
+    thread = threading.Thread(target=target, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def _put_row(hub, symbol, parser, row, arrival):
+    if not row.strip():
+        return
+    try:
+        dt, values = parser.parse(row.split(','))
+    except (ValueError, IndexError):
+        hub.ignored += 1  # malformed row
+        return
+    hub.put(symbol, dt, values, arrival)
+
+
+def csv_offsets(paths):
+    """
+    The current sizes of the files in {symbol: path}, for
+    follow_csv_files(). Take them before loading the history: rows
+    appended while it loads are then read twice, and the feed skips the
+    second copy rather than missing them.
+    """
+    return {symbol: os.path.getsize(path) for symbol, path in paths.items()}
+
+
+def follow_csv_files(paths, offsets, hub, tz=None, poll=LIVE_POLL_SECONDS):
+    """
+    Stand-in live source: poll the price CSVs ``paths`` ({symbol: path})
+    every ``poll`` seconds and put every complete row appended after
+    ``offsets`` (see csv_offsets) into ``hub``. Runs in a daemon thread
+    until the hub is closed; returns the thread.
+    """
+    files = {}
+    for symbol, path in paths.items():
+        with open(path) as f:
+            header = f.readline().split(',')
+        files[symbol] = [path, offsets[symbol], BarParser(header, tz)]
+
+    def run():
+        while not hub.closed:
+            for symbol, state in files.items():
+                path, offset, parser = state
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    continue
+                if size < offset:
+                    # Rewritten: follow it from its new end
+                    state[1] = size
+                if size <= offset:
+                    continue
+                with open(path, 'rb') as f:
+                    f.seek(offset)
+                    chunk = f.read(size - offset)
+                arrival = time.perf_counter()
+                end = chunk.rfind(b'\n') + 1
+                state[1] = offset + end
+                for row in chunk[:end].decode().splitlines():
+                    _put_row(hub, symbol, parser, row, arrival)
+            time.sleep(poll)
+
+    return _start_thread(run, "tradegeek-follow")
+
+
+def connect_bar_stream(host, port, hub, tz=None):
+    """
+    Stand-in live source: read bars from a replay_bars() server (or
+    anything speaking its format) and put them into ``hub``. Raises
+    OSError if the server cannot be reached. The hub is closed when the
+    stream ends. Returns the reader thread.
+    """
+    sock = socket.create_connection((host, port))
+    stream = sock.makefile('r')
+
+    def run():
+        try:
+            header = stream.readline().rstrip('\n').split(',')
+            parser = BarParser(header[1:], tz)
+            for row in stream:
+                arrival = time.perf_counter()
+                if hub.closed:
+                    break
+                symbol, _, rest = row.rstrip('\n').partition(',')
+                _put_row(hub, symbol, parser, rest, arrival)
+        except (OSError, ValueError):
+            pass
+        finally:
+            stream.close()
+            sock.close()
+            hub.close()
+
+    return _start_thread(run, "tradegeek-stream")
+
+
+def replay_bars(dataframes, port=REPLAY_PORT, interval=1.0, host="127.0.0.1", ready=None):
+    """
+    Serve the bars of {symbol: DataFrame} to one connecting client, in time
+    order and ``interval`` seconds apart per timestamp, as a local stand-in
+    for a live feed.
+
+    The stream is CSV text: a header line 'Symbol,<index name>,<columns>'
+    and then one row per bar; every frame must have the same columns.
+    ``ready(port)`` is called once the server listens. Returns the number
+    of bars sent.
+    """
+    frames = []
+    columns = None
+    for symbol, df in dataframes.items():
+        if columns is None:
+            columns = list(df.columns)
+        elif list(df.columns) != columns:
+            raise ValueError(f"{symbol} does not have the columns {', '.join(columns)}")
+        frames.append(df.assign(Symbol=symbol))
+    if not frames:
+        return 0
+    bars = pd.concat(frames).sort_index(kind='stable')
+    index_name = bars.index.name or "Datetime"
+    stamps = bars.index.to_numpy()
+    times = [stamp.isoformat() for stamp in bars.index]
+    values = bars[columns].to_numpy(dtype=np.float64).tolist()
+    symbols = bars['Symbol'].tolist()
+
+    with socket.create_server((host, port)) as server:
+        if ready is not None:
+            ready(server.getsockname()[1])
+        conn, _ = server.accept()
+        with conn:
+            conn.sendall(f"Symbol,{index_name},{','.join(columns)}\n".encode())
+            sent = 0
+            for i, row in enumerate(values):
+                if i and stamps[i] != stamps[i - 1]:
+                    time.sleep(interval)
+                line = f"{symbols[i]},{times[i]}," + ",".join(repr(v) for v in row) + "\n"
+                try:
+                    conn.sendall(line.encode())
+                except OSError:
+                    break
+                sent += 1
+    return sent
+
+
+def latency_stats(latency):
+    """
+    Summary in milliseconds of the LiveLatency seconds of a run.
+    """
+    values = np.asarray(latency, dtype=np.float64) * 1000.0
+    if not len(values):
+        return {'bars': 0, 'mean_ms': None, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+    p50, p99 = np.percentile(values, [50.0, 99.0])
+    return {'bars': len(values), 'mean_ms': float(values.mean()), 'p50_ms': float(p50),
+            'p99_ms': float(p99), 'max_ms': float(values.max())}
@@ -0,0 +1,219 @@
+import math
+
+import numpy as np
+
+
+# --------------------------------------------------------------
+# MONTE CARLO
+# (thousands of resampled equity paths from the trades or bars of one run)
+# --------------------------------------------------------------
+
+# Method key -> label. The trade methods resample the closed-trade PnLs,
+# the block bootstrap resamples runs of consecutive bar returns.
+MC_METHODS = {
+    "shuffle": "Trade shuffle",
+    "bootstrap": "Trade bootstrap",
+    "block": "Block bootstrap (bar returns)",
+}
+
+# Statistic -> label, in report order
+MC_METRICS = (
+    ('final_value', "Final value"),
+    ('max_drawdown', "Max drawdown %"),
+    ('sharpe', "Sharpe (annualized)"),
+)
+
+# Rough cap on the working arrays of one batch of paths
+MC_BATCH_BYTES = 64 * 1024 * 1024
+
+
+def backtest_samples(equity, initial_cash):
+    """
+    Monte Carlo input from the EquityCurve analysis of a Backtrader run:
+    the closed-trade PnLs, the value after every bar and the years the
+    run covers.
+    """
+    dt = equity['datetime']
+    # Backtrader date numbers count days
+    years = (dt[-1] - dt[0]) / 365.25 if len(dt) > 1 else 0.0
+    return {
+        'initial_cash': initial_cash,
+        'trade_pnls': np.asarray(equity['trades'], dtype=np.float64),
+        'values': np.asarray(equity['value'], dtype=np.float64),
+        'years': years,
+    }
+
+
+def vectorized_samples(df, summary, initial_cash):
+    """
+    Monte Carlo input from a run_vectorized(..., with_trades=True) summary.
+    """
+    years = (df.index[-1] - df.index[0]).total_seconds() / (365.25 * 86400) if len(df) > 1 else 0.0
+    return {
+        'initial_cash': initial_cash,
+        'trade_pnls': np.asarray(summary['trade_pnls'], dtype=np.float64),
+        'values': np.asarray(summary['equity'], dtype=np.float64),
+        'years': years,
+    }
+
+
+def _path_stats(equity, returns, initial_cash, steps_per_year):
+    """
+    Final value, max drawdown (%) and annualized Sharpe of every path:
+    rows of ``equity`` (the value after each step, starting from
+    ``initial_cash``) and of ``returns`` (the return of each step). Rows
+    that hit zero equity are ruined: their Sharpe is NaN. Overwrites
+    ``returns``.
+    """
+    ruined = (equity <= 0.0).any(axis=1)
+
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.maximum(peak, initial_cash, out=peak)
+    np.divide(equity, peak, out=peak)
+    drawdown = 100.0 * (1.0 - np.minimum(peak.min(axis=1), 1.0))
+
+    n = returns.shape[1]
+    mean = returns.sum(axis=1) / n
+    returns -= mean[:, None]
+    std = np.sqrt(np.einsum('ij,ij->i', returns, returns) / n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = mean / std * math.sqrt(steps_per_year)
+    sharpe[ruined | ~(std > 0.0)] = np.nan
+    return equity[:, -1].copy(), np.minimum(drawdown, 100.0), sharpe, ruined
+
+
+def _trade_paths(pnls, initial_cash):
+    """
+    Equity and per-trade returns of rows of trade PnLs.
+    """
+    equity = initial_cash + np.cumsum(pnls, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = pnls / (equity - pnls)
+    return equity, returns
+
+
+def _interval(values, level):
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        return {'mean': None, 'median': None, 'low': None, 'high': None}
+    tail = 50.0 * (1.0 - level)
+    low, median, high = np.percentile(finite, [tail, 50.0, 100.0 - tail])
+    return {'mean': float(finite.mean()), 'median': float(median), 'low': float(low), 'high': float(high)}
+
+
+def run_monte_carlo(samples, method="shuffle", simulations=10_000, level=0.95, block=None, seed=None,
+                    progress=None, cancel=None):
+    """
+    Resample one run ``simulations`` times and return the distribution of
+    its final value, max drawdown and Sharpe with ``level`` confidence
+    intervals. ``samples`` comes from backtest_samples() or
+    vectorized_samples().
+
+    - 'shuffle' reorders the closed trades. The final value cannot change
+      and only the path (drawdown) does.
+    - 'bootstrap' draws the trades with replacement.
+    - 'block' draws runs of ``block`` consecutive bar returns with
+      replacement (default: cube root of the bar count). This keeps
+      volatility clustering and includes open positions.
+
+    The paths are generated in NumPy batches of whole arrays. The Sharpe
+    is the annualized mean/stddev of the per-step returns without a
+    risk-free rate, and the 'observed' figures of the real run use the same
+    definitions, so they are comparable with the intervals (they differ
+    from collect_results' SharpeRatio). ``progress`` and ``cancel`` work
+    as in run_parameter_sweep; a cancelled run returns None.
+    """
+    if method not in MC_METHODS:
+        raise ValueError(f"Unknown Monte Carlo method '{method}'. Choose from: {', '.join(MC_METHODS)}")
+    if simulations < 1:
+        raise ValueError("Need at least one simulation")
+    if not 0.0 < level < 1.0:
+        raise ValueError(f"Confidence level must be between 0 and 1, got {level}")
+
+    initial_cash = samples['initial_cash']
+    if method == "block":
+        values = np.concatenate(([initial_cash], samples['values']))
+        steps = values[1:] / values[:-1] - 1.0
+        if len(steps) < 2:
+            raise ValueError("Need at least two bars for a block bootstrap")
+        block = min(int(block or max(1, round(len(steps) ** (1.0 / 3.0)))), len(steps))
+        observed = initial_cash * np.cumprod(1.0 + steps)[None, :], steps[None, :].copy()
+        # Every run of ``block`` bars, as a view
+        blocks = np.lib.stride_tricks.sliding_window_view(steps, block)
+    else:
+        steps = samples['trade_pnls']
+        if len(steps) < 2:
+            raise ValueError("Need at least two closed trades to resample")
+        observed = _trade_paths(steps[None, :], initial_cash)
+
+    n = len(steps)
+    steps_per_year = n / samples['years'] if samples['years'] > 0 else 1.0
+    rng = np.random.default_rng(seed)
+    batch = max(1, MC_BATCH_BYTES // (8 * n * 3))
+
+    results = {name: np.empty(simulations) for name, _ in MC_METRICS}
+    ruined = np.empty(simulations, dtype=bool)
+    done = 0
+    while done < simulations:
+        size = min(batch, simulations - done)
+        if method == "shuffle":
+            pnls = rng.permuted(np.broadcast_to(steps, (size, n)), axis=1)
+            equity, returns = _trade_paths(pnls, initial_cash)
+        elif method == "bootstrap":
+            equity, returns = _trade_paths(steps[rng.integers(0, n, (size, n))], initial_cash)
+        else:
+            starts = rng.integers(0, n - block + 1, (size, -(-n // block)))
+            returns = blocks[starts].reshape(size, -1)[:, :n]
+            equity = np.cumprod(returns + 1.0, axis=1)
+            equity *= initial_cash
+
+        chunk = slice(done, done + size)
+        (results['final_value'][chunk], results['max_drawdown'][chunk], results['sharpe'][chunk],
+         ruined[chunk]) = _path_stats(equity, returns, initial_cash, steps_per_year)
+        done += size
+        if progress is not None:
+            progress(done, simulations)
+        if cancel is not None and cancel.is_set():
+            return None
+
+    final, drawdown, sharpe, _ = _path_stats(*observed, initial_cash, steps_per_year)
+    results.update(
+        method=method,
+        simulations=simulations,
+        steps=n,
+        level=level,
+        block=block if method == "block" else None,
+        observed={'final_value': float(final[0]), 'max_drawdown': float(drawdown[0]),
+                  'sharpe': None if np.isnan(sharpe[0]) else float(sharpe[0])},
+        intervals={name: _interval(results[name], level) for name, _ in MC_METRICS},
+        loss_probability=float((results['final_value'] < initial_cash).mean()),
+        ruin_probability=float(ruined.mean()),
+    )
+    return results
+
+
+def monte_carlo_summary(result):
+    """
+    The JSON-ready part of a run_monte_carlo result (everything but the
+    per-simulation arrays).
+    """
+    return {k: v for k, v in result.items() if k not in dict(MC_METRICS)}
+
+
+def format_monte_carlo(result):
+    """
+    Text report for the log pane: observed value and interval per metric.
+    """
+    pct = f"{result['level'] * 100:g}%"
+    method = MC_METHODS[result['method']]
+    if result['block']:
+        method += f", {result['block']}-bar blocks"
+    lines = [f"Monte Carlo: {result['simulations']:,} x {method} over {result['steps']} steps",
+             f"  {'':<22}{'observed':>12}{'median':>12}{pct + ' low':>12}{pct + ' high':>12}"]
+    for name, label in MC_METRICS:
+        interval = result['intervals'][name]
+        cells = [result['observed'][name], interval['median'], interval['low'], interval['high']]
+        lines.append(f"  {label:<22}" + "".join(f"{'-':>12}" if v is None else f"{v:>12.2f}" for v in cells))
+    lines.append(f"  P(loss) {result['loss_probability'] * 100:.1f}%, "
+                 f"P(ruin) {result['ruin_probability'] * 100:.1f}%")
+    return "\n".join(lines) + "\n"
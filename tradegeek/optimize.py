@@ -0,0 +1,211 @@
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .engine import build_cerebro, collect_results
+from .shared import SharedMarketData, shared_dataframe
+from .store import run_keys
+from .vectorized import run_vectorized, vectorized_unsupported
+
+
+# --------------------------------------------------------------
+# OPTIMIZATION
+# (parallel parameter sweeps)
+# --------------------------------------------------------------
+
+SWEEP_RANK_KEYS = {
+    "Sharpe": ('sharpe', False),
+    "Net PnL": ('pnl_net', False),
+    "Max DrawDown": ('max_drawdown', True),
+}
+
+
+def parse_param_range(text, default):
+    """
+    Parse a sweep range for one parameter.
+
+    Accepted forms: "5..50" (inclusive, step 1), "5..50:5", "0.5..3.0:0.5",
+    a comma separated list "10,20,30", or a single value. An empty string
+    keeps the default.
+    """
+    text = str(text).strip()
+    if not text:
+        return [default]
+
+    def cast(val):
+        val = val.strip()
+        if val.lower() in ['true', 'false']:
+            return val.lower() == 'true'
+        return float(val) if '.' in val else int(val)
+
+    if '..' in text:
+        bounds, _, step_str = text.partition(':')
+        start_str, stop_str = bounds.split('..', 1)
+        start, stop = cast(start_str), cast(stop_str)
+        step = cast(step_str) if step_str.strip() else 1
+        if step <= 0:
+            raise ValueError(f"Step must be positive in '{text}'")
+        if stop < start:
+            raise ValueError(f"Range end is below range start in '{text}'")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return [start + i * step for i in range(count)]
+        return [round(start + i * step, 10) for i in range(count)]
+
+    return [cast(v) for v in text.split(',') if v.strip()]
+
+
+def expand_grid(ranges):
+    """
+    Turn {param: [values]} into the list of every parameter combination.
+    """
+    names = list(ranges)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(ranges[n] for n in names))]
+
+
+# Per-process state for sweep workers, filled once by _sweep_init. The
+# workers get shared.SharedFrame handles, not DataFrames: every worker
+# reads the one copy of the bars the parent put in shared memory.
+_SWEEP_STATE = {}
+
+
+def _sweep_init(frames, strat_class, timeframe, initial_cash, commission, slippage_pct,
+                vectorized=False, extra_timeframes=()):
+    _SWEEP_STATE.update(
+        frames=frames,
+        strat_class=strat_class,
+        timeframe=timeframe,
+        initial_cash=initial_cash,
+        commission=commission,
+        slippage_pct=slippage_pct,
+        vectorized=vectorized,
+        extra_timeframes=extra_timeframes,
+    )
+
+
+def _sweep_run(params):
+    state = _SWEEP_STATE
+    if state['vectorized']:
+        try:
+            df = shared_dataframe(next(iter(state['frames'].values())))
+            result = run_vectorized(df, state['strat_class'], params, state['initial_cash'],
+                                    state['commission'], state['slippage_pct'])
+            del result['equity']
+            result.update(error=None, engine="vectorized", params=params)
+            return result
+        except ValueError:
+            pass  # fall through to the Backtrader run
+        except Exception as e:
+            return {'error': str(e), 'engine': "vectorized", 'params': params}
+    try:
+        # Recorded and measured after the run rather than by the per-bar
+        # analyzers; only the collect_results figures are kept
+        cerebro = build_cerebro(state['frames'], state['timeframe'], state['initial_cash'],
+                                state['commission'], state['slippage_pct'], stdstats=False,
+                                extra_timeframes=state['extra_timeframes'], analytics=True)
+        cerebro.addstrategy(state['strat_class'], **params)
+        strat = cerebro.run()[0]
+        result = collect_results(strat, cerebro)
+        del result['analytics']
+        result['error'] = None
+    except Exception as e:
+        result = {'error': str(e)}
+    result.update(engine="backtrader", params=params)
+    return result
+
+
+def run_parameter_sweep(dataframes, strat_class, combos, timeframe, initial_cash, commission,
+                        slippage_pct, max_workers=None, progress=None, vectorized=False,
+                        cancel=None, extra_timeframes=(), store=None):
+    """
+    Run every parameter combination on a process pool and return the
+    results as a DataFrame (one row per combination, unranked).
+
+    With ``vectorized`` the bundled strategies go through run_vectorized
+    when there is one feed and no extra timeframe, falling back to
+    Backtrader for anything it rejects (see vectorized_unsupported).
+
+    ``progress`` is called as progress(done, total) while results arrive.
+    Setting ``cancel`` (a threading.Event) drops the queued combinations and
+    returns what has finished so far. ``extra_timeframes`` is passed on to
+    build_cerebro.
+
+    With a ``store`` (a store.ResultsStore) combinations already in it are
+    not run again, and every new successful run is recorded in it.
+
+    The data is copied into shared memory once for the whole pool (see
+    shared.SharedMarketData) and released when the sweep returns.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    total = len(combos)
+    rows = []
+    vectorized = vectorized and vectorized_unsupported(strat_class, dataframes,
+                                                       extra_timeframes=extra_timeframes) is None
+
+    keys = {}
+    if store is not None:
+        settings = (initial_cash, commission, slippage_pct)
+        for i, params in enumerate(combos):
+            keys[i] = run_keys(dataframes, strat_class, params, timeframe, settings, vectorized,
+                               extra_timeframes=extra_timeframes)
+        stored = store.get_many(key for engine_keys in keys.values() for key in engine_keys.values())
+        pending = []
+        for i, params in enumerate(combos):
+            found = next((stored[key] for key in keys[i].values() if key in stored), None)
+            if found is None:
+                pending.append(i)
+            else:
+                engine, summary = found
+                row = dict(params)
+                row.update(summary, engine=engine, error=None)
+                rows.append(row)
+        if rows and progress is not None:
+            progress(len(rows), total)
+    else:
+        pending = list(range(total))
+    if not pending:
+        return pd.DataFrame(rows)
+
+    chunksize = max(1, len(pending) // (max_workers * 4))
+    try:
+        with SharedMarketData(dataframes) as shared, \
+                ProcessPoolExecutor(max_workers=max_workers,
+                                    initializer=_sweep_init,
+                                    initargs=(shared.frames, strat_class, timeframe, initial_cash,
+                                              commission, slippage_pct, vectorized,
+                                              extra_timeframes)) as executor:
+            results = executor.map(_sweep_run, [combos[i] for i in pending], chunksize=chunksize)
+            for i, result in zip(pending, results):
+                params = result.pop('params')
+                if store is not None and result['error'] is None:
+                    engine = result['engine']
+                    store.put(keys[i][engine], strat_class.__name__, engine, list(dataframes), timeframe, params,
+                              settings, {k: v for k, v in result.items() if k not in ('error', 'engine')},
+                              commit=False)
+                row = dict(params)
+                row.update(result)
+                rows.append(row)
+                if progress is not None:
+                    progress(len(rows), total)
+                if cancel is not None and cancel.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    break
+    finally:
+        if store is not None:
+            store.commit()
+
+    return pd.DataFrame(rows)
+
+
+def rank_sweep_results(results, rank_by="Sharpe"):
+    """
+    Sort sweep results best-first. Failed runs and runs without a Sharpe
+    ratio (e.g. no trades) sink to the bottom.
+    """
+    column, ascending = SWEEP_RANK_KEYS.get(rank_by, SWEEP_RANK_KEYS["Sharpe"])
+    if results.empty or column not in results.columns:
+        return results
+    return results.sort_values(column, ascending=ascending, na_position='last').reset_index(drop=True)
@@ -0,0 +1,9 @@
+"""
+Package the plugin strategy files are imported into, as
+``tradegeek.plugins.<file name>``, so that worker processes can unpickle
+plugin classes by name. Its path is registry.PLUGIN_DIR; a registry over
+other directories adds them when it loads a strategy from one.
+"""
+from ..registry import PLUGIN_DIR
+
+__path__ = [PLUGIN_DIR]
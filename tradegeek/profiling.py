@@ -0,0 +1,173 @@
+import contextlib
+import cProfile
+import datetime
+import json
+import os
+import time
+
+
+# --------------------------------------------------------------
+# STAGE TIMING & PROFILING
+# (opt-in: every hook below is a shared no-op when profile is None)
+# --------------------------------------------------------------
+
+PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".tradegeek", "profiles")
+
+_NO_STAGE = contextlib.nullcontext()
+
+# Parts of cerebro.run() timed by engine.instrument_cerebro, in report order.
+# Whatever they do not cover (strategy setup, advancing the feeds) is
+# reported as 'run.other'.
+RUN_PARTS = (
+    ('run.preload', "feed preload"),
+    ('run.indicators', "indicators"),
+    ('run.strategy', "strategy next()"),
+    ('run.notify', "notify_order/notify_trade"),
+    ('run.analyzers', "analyzers/observers"),
+    ('run.broker', "broker (order matching)"),
+    ('run.other', "setup, feed clock"),
+)
+
+
+class RunProfile:
+    """
+    Wall-clock seconds and call counts per named stage of one load or run.
+
+    Stages are plain names ('load', 'build', 'run', 'analyze', 'plot');
+    the parts of a Backtrader run measured by engine.instrument_cerebro are
+    prefixed 'run.'. ``bars`` (total bars over all feeds) gives the
+    throughput. With ``cprofile_path`` set, the capture() sections are
+    also recorded with cProfile and written to that file.
+    """
+
+    def __init__(self, label="", cprofile_path=None):
+        self.label = label
+        self.cprofile_path = cprofile_path
+        self.bars = 0
+        self.stages = {}
+        self._depth = 0
+
+    def add(self, name, seconds, calls=1):
+        entry = self.stages.setdefault(name, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += calls
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def wrap(self, obj, attr, name):
+        """
+        Time every call of ``obj.attr`` as stage ``name`` by shadowing the
+        method on the instance. Calls nested in another wrapped call (e.g.
+        a prenext() that calls next()) count towards the outer one only.
+        """
+        method = getattr(obj, attr)
+
+        def timed(*args, **kwargs):
+            if self._depth:
+                return method(*args, **kwargs)
+            self._depth += 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - start)
+                self._depth -= 1
+
+        setattr(obj, attr, timed)
+
+    def to_dict(self):
+        stages = {name: {'seconds': seconds, 'calls': calls}
+                  for name, (seconds, calls) in self.stages.items()}
+        run = self.stages.get('run')
+        if run is not None and any(name.startswith('run.') for name in self.stages):
+            measured = sum(seconds for name, (seconds, _) in self.stages.items()
+                           if name.startswith('run.'))
+            stages['run.other'] = {'seconds': max(run[0] - measured, 0.0), 'calls': 1}
+        run_seconds = run[0] if run is not None else 0.0
+        return {
+            'label': self.label,
+            'bars': self.bars,
+            'bars_per_second': self.bars / run_seconds if self.bars and run_seconds > 0 else None,
+            'stages': stages,
+            'cprofile': self.cprofile_path,
+        }
+
+    def format(self):
+        """
+        Text summary for the log pane: one line per stage with its share of
+        the total, the parts of a stage ('load.parse', 'run.next', ...)
+        indented below it with their share of that stage.
+        """
+        report = self.to_dict()
+        stages = report['stages']
+        labels = dict(RUN_PARTS)
+        total = sum(stats['seconds'] for name, stats in stages.items() if '.' not in name)
+
+        lines = [f"Profile{': ' + self.label if self.label else ''}"]
+        for name, stats in stages.items():
+            if '.' in name:
+                continue
+            lines.append(_profile_line(name, stats['seconds'], total, indent=2))
+            parts = [part for part, _ in RUN_PARTS] if name == 'run' else sorted(stages)
+            for part in parts:
+                if part in stages and part.startswith(name + '.'):
+                    label = labels.get(part, part.partition('.')[2])
+                    lines.append(_profile_line(label, stages[part]['seconds'], stats['seconds'], indent=4))
+        if report['bars_per_second'] is not None:
+            lines.append(f"  {report['bars']} bars, {report['bars_per_second']:,.0f} bars/s")
+        if self.cprofile_path:
+            lines.append(f"  cProfile stats written to {self.cprofile_path}")
+        return "\n".join(lines) + "\n"
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def _profile_line(label, seconds, total, indent):
+    share = 100.0 * seconds / total if total > 0 else 0.0
+    return f"{' ' * indent}{label:<{34 - indent}}{seconds:>10.3f} s{share:>7.1f}%"
+
+
+def stage(profile, name):
+    """
+    ``with stage(profile, 'load'):`` times the block when profiling and
+    does nothing when ``profile`` is None.
+    """
+    return _NO_STAGE if profile is None else profile.stage(name)
+
+
+def cprofile_path(label, directory=PROFILE_DIR):
+    """
+    Fresh file name for a cProfile capture: <directory>/<timestamp>-<label>.prof.
+    """
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+    return os.path.join(directory, f"{stamp}-{label}.prof")
+
+
+@contextlib.contextmanager
+def _cprofile(path):
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def capture(profile):
+    """
+    Record the block with cProfile (current thread only) into
+    ``profile.cprofile_path``; a no-op when not profiling or no path is set.
+    """
+    if profile is None or not profile.cprofile_path:
+        return _NO_STAGE
+    return _cprofile(profile.cprofile_path)
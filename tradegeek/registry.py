@@ -0,0 +1,514 @@
+import ast
+import hashlib
+import importlib
+import json
+import os
+import sys
+import threading
+
+
+# --------------------------------------------------------------
+# STRATEGY REGISTRY
+# (bundled and plugin strategies found by reading their source; imported only when used)
+# --------------------------------------------------------------
+
+PLUGIN_DIR = os.path.join(os.path.expanduser("~"), ".tradegeek", "strategies")
+INDEX_PATH = os.path.join(os.path.expanduser("~"), ".tradegeek", "strategy-index.json")
+INDEX_VERSION = 1
+
+# Plugin files are imported as submodules of this package (see
+# tradegeek/plugins/__init__.py), imported on the first plugin load
+PLUGIN_PACKAGE = "tradegeek.plugins"
+
+_BUNDLED_MODULE = "tradegeek.strategies"
+_BUNDLED_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "strategies.py")
+
+# Backtrader classes a strategy can derive from directly
+_BT_STRATEGIES = ('Strategy', 'SignalStrategy')
+
+# Params the runner sets itself (the portfolio toggle); never shown
+HIDDEN_PARAMS = ('portfolio',)
+
+# Defaults the GUI and the CLI use instead of the class's own
+RUN_DEFAULTS = {'printlog': False}
+
+
+def _plugin_package(directory):
+    package = importlib.import_module(PLUGIN_PACKAGE)
+    if directory not in package.__path__:
+        package.__path__.append(directory)
+    return package
+
+# Plugin module name -> hash of the source it was imported from
+_SOURCE_HASHES = {}
+_SOURCE_LOCK = threading.Lock()
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _module_source(module):
+    """
+    Hash of the source of the plugin module ``module``, as it was when
+    imported: taken just before the import (see StrategyInfo.load), or
+    from the module's file for plugin modules imported some other way.
+    """
+    with _SOURCE_LOCK:
+        if module not in _SOURCE_HASHES:
+            loaded = sys.modules.get(module)
+            path = getattr(loaded, '__file__', None)
+            _SOURCE_HASHES[module] = _file_hash(path) if path else None
+        return _SOURCE_HASHES[module]
+
+
+def strategy_source(strat_class):
+    """
+    Hash of the plugin source ``strat_class`` runs, i.e. of every plugin
+    file its class hierarchy comes from, or None for bundled strategies.
+    Part of the results store's run keys, so editing a plugin stops its
+    earlier runs from matching.
+    """
+    modules = dict.fromkeys(cls.__module__ for cls in strat_class.__mro__
+                            if cls.__module__.startswith(PLUGIN_PACKAGE + "."))
+    if not modules:
+        return None
+    return ":".join(str(_module_source(module)) for module in modules)
+
+
+def param_type(default):
+    """
+    Schema type of a param with ``default``: 'bool', 'int', 'float', 'str'
+    or 'any' (None and everything else).
+    """
+    for kind in (bool, int, float, str):
+        if isinstance(default, kind):
+            return kind.__name__
+    return 'any'
+
+
+def parse_param_value(val_str, default):
+    """
+    Convert a parameter typed as text: floats (anything with a '.'), ints
+    and true/false. Falls back to ``default`` when it is none of those.
+    """
+    try:
+        if '.' in val_str:
+            return float(val_str)
+        return int(val_str)
+    except ValueError:
+        if val_str.lower() in ['true', 'false']:
+            return val_str.lower() == 'true'
+        return default
+
+
+def parse_param(spec, value):
+    """
+    Value of the param described by ``spec`` (a schema entry) from user
+    input: text is converted to the param's type, falling back to
+    parse_param_value() and then to the default. Values that are not text
+    are taken as they are.
+    """
+    if not isinstance(value, str):
+        return value
+    text = value.strip()
+    kind = spec['type']
+    try:
+        if kind == 'bool':
+            if text.lower() in ('true', 'false'):
+                return text.lower() == 'true'
+        elif kind == 'int':
+            return int(text)
+        elif kind == 'float':
+            return float(text)
+        elif kind == 'str':
+            return text
+    except ValueError:
+        pass
+    return parse_param_value(text, spec['default'])
+
+
+def _literal(node):
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+
+
+def _base_name(node):
+    # bt.Strategy -> 'Strategy', Strategy -> 'Strategy'
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _param_pairs(value):
+    """
+    A literal ``params`` value as a list of (name, default), or None if it
+    is not in one of the forms Backtrader takes.
+    """
+    if isinstance(value, dict):
+        value = list(value.items())
+    if not isinstance(value, (tuple, list)):
+        return None
+    pairs = []
+    for item in value:
+        if isinstance(item, (tuple, list)) and len(item) == 2 and isinstance(item[0], str):
+            pairs.append((item[0], item[1]))
+        elif isinstance(item, str):
+            pairs.append((item, None))
+        else:
+            return None
+    return pairs
+
+
+def scan_source(path):
+    """
+    The classes defined at the top level of the Python file ``path``,
+    read with ast (nothing is imported): one dict per class with its
+    'name', 'bases', own 'params' and 'sweep_ranges' ('params' is None
+    when they are not literals) and the first line of its 'doc'.
+    """
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+    classes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        params, sweep_ranges = [], {}
+        for stmt in node.body:
+            if not isinstance(stmt, ast.Assign) or len(stmt.targets) != 1:
+                continue
+            target = stmt.targets[0]
+            if not isinstance(target, ast.Name):
+                continue
+            if target.id == 'params':
+                params = _param_pairs(_literal(stmt.value))
+            elif target.id == 'sweep_ranges':
+                ranges = _literal(stmt.value)
+                if isinstance(ranges, dict):
+                    sweep_ranges = {str(k): str(v) for k, v in ranges.items()}
+        doc = ast.get_docstring(node) or ""
+        classes.append({
+            'name': node.name,
+            'bases': [_base_name(base) for base in node.bases],
+            'params': params,
+            'sweep_ranges': sweep_ranges,
+            'doc': doc.strip().split("\n")[0],
+        })
+    return classes
+
+
+class StrategyInfo:
+    """
+    One registered strategy: its name (the class name), the module it
+    comes from and its parameter schema, as read from the source. The
+    class itself is imported on the first load().
+
+    ``params`` holds (name, default) in the order the GUI shows them: the
+    class's own params first, then the inherited ones; HIDDEN_PARAMS are
+    left out. ``static`` is False when the source did not tell the whole
+    schema (params that are not literals, or a base class from elsewhere);
+    load() then takes it from the class.
+    """
+
+    def __init__(self, name, module, path, params, sweep_ranges=None, doc="", bundled=False, static=True):
+        self.name = name
+        self.module = module
+        self.path = path
+        self.params = list(params)
+        self.sweep_ranges = dict(sweep_ranges or {})
+        self.doc = doc
+        self.bundled = bundled
+        self.static = static
+        self._cls = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"StrategyInfo({self.name!r}, {self.module!r})"
+
+    @property
+    def loaded(self):
+        return self._cls is not None
+
+    def load(self):
+        """
+        Import the strategy's module (once) and return the class. Raises
+        ValueError if it cannot be imported or does not define the class.
+        """
+        with self._lock:
+            if self._cls is None:
+                try:
+                    if not self.bundled:
+                        _plugin_package(os.path.dirname(self.path))
+                        with _SOURCE_LOCK:
+                            if self.module not in sys.modules:
+                                _SOURCE_HASHES[self.module] = _file_hash(self.path)
+                    module = importlib.import_module(self.module)
+                    cls = getattr(module, self.name)
+                except Exception as e:
+                    raise ValueError(f"Cannot load strategy '{self.name}' from {self.path}: {e}") from e
+                # The class has the final word; the order read from the
+                # source is kept
+                pairs = cls.params._getpairs()
+                known = [(name, pairs[name]) for name, _ in self.params if name in pairs]
+                self.params = known + [(name, default) for name, default in pairs.items()
+                                       if name not in dict(known) and name not in HIDDEN_PARAMS]
+                self.static = True
+                self._cls = cls
+            return self._cls
+
+    def schema(self):
+        """
+        One dict per param: 'name', 'default', 'type' (see param_type) and
+        'range', the parse_param_range text a sweep starts from (None if
+        the strategy suggests none). Defaults are the run defaults (see
+        RUN_DEFAULTS).
+        """
+        schema = []
+        for name, default in self.params:
+            default = RUN_DEFAULTS.get(name, default)
+            schema.append({'name': name, 'default': default, 'type': param_type(default),
+                           'range': self.sweep_ranges.get(name)})
+        return schema
+
+    def defaults(self):
+        return {spec['name']: spec['default'] for spec in self.schema()}
+
+
+class StrategyRegistry:
+    """
+    The bundled strategies plus every strategy class in the .py files of
+    ``plugin_dirs`` (default: PLUGIN_DIR), found without importing them.
+
+    A class counts as a strategy when it derives, directly or through
+    other scanned classes, from bt.Strategy; classes other classes in the
+    same file derive from count as bases and are not listed. Plugin files
+    are imported as ``tradegeek.plugins.<file name>`` once one of their
+    strategies is loaded.
+
+    What each file holds is kept in an index at ``index_path`` and only
+    files whose size or mtime changed are read again, so startup stays a
+    directory listing plus a stat per file. Files that cannot be read and
+    names already taken are skipped and noted in ``errors``.
+    """
+
+    def __init__(self, plugin_dirs=None, index_path=INDEX_PATH):
+        self.plugin_dirs = [PLUGIN_DIR] if plugin_dirs is None else list(plugin_dirs)
+        self.index_path = index_path
+        self.errors = []
+        self._strategies = {}
+        self._lock = threading.Lock()
+        self._scanned = False
+
+    def _read_index(self):
+        if not self.index_path:
+            return {}
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get('version') != INDEX_VERSION:
+            return {}
+        return index.get('files', {})
+
+    def _write_index(self, files):
+        if not self.index_path:
+            return
+        tmp = f"{self.index_path}.tmp{os.getpid()}"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+            with open(tmp, 'w') as f:
+                json.dump({'version': INDEX_VERSION, 'files': files}, f)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            pass  # the index only saves time
+
+    def _sources(self):
+        """
+        (module, path, bundled) of every file to scan, bundled first.
+        """
+        sources = [(_BUNDLED_MODULE, _BUNDLED_PATH, True)]
+        for directory in self.plugin_dirs:
+            try:
+                entries = sorted(os.scandir(directory), key=lambda entry: entry.name)
+            except OSError:
+                continue
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                if ext == '.py' and stem.isidentifier() and not stem.startswith('_') and entry.is_file():
+                    sources.append((f"{PLUGIN_PACKAGE}.{stem}", entry.path, False))
+        return sources
+
+    def scan(self):
+        """
+        (Re)read the strategies. Called on first use; call it again to
+        pick up new plugin files.
+        """
+        with self._lock:
+            cached = self._read_index()
+            files = {}
+            errors = []
+            found = []
+            for module, path, bundled in self._sources():
+                try:
+                    st = os.stat(path)
+                    stamp = [st.st_mtime_ns, st.st_size]
+                    entry = cached.get(path)
+                    if entry is None or entry['stamp'] != stamp:
+                        entry = {'stamp': stamp, 'classes': [
+                            dict(c, params=None if c['params'] is None else repr(c['params']))
+                            for c in scan_source(path)]}
+                except (OSError, SyntaxError, ValueError) as e:
+                    errors.append((path, str(e)))
+                    continue
+                files[path] = entry
+                for c in entry['classes']:
+                    params = None if c['params'] is None else ast.literal_eval(c['params'])
+                    found.append((module, path, bundled, dict(c, params=params)))
+            # Without a plugin dir there is only the bundled file to read
+            if files != cached and any(os.path.isdir(d) for d in self.plugin_dirs):
+                self._write_index(files)
+            self._strategies = self._resolve(found, errors)
+            self.errors = errors
+            self._scanned = True
+
+    @staticmethod
+    def _resolve(found, errors):
+        """
+        Turn the scanned classes into StrategyInfo, following each class's
+        bases by name for the params it inherits.
+        """
+        by_name = {}
+        for module, path, bundled, c in found:
+            by_name.setdefault(c['name'], (module, path, bundled, c))
+
+        # name -> (is a strategy, params, sweep ranges, static)
+        resolved = {}
+
+        def resolve(name, seen=()):
+            if name in resolved:
+                return resolved[name]
+            if name in _BT_STRATEGIES and name not in by_name:
+                return True, [], {}, True
+            if name not in by_name or name in seen:
+                return None
+            c = by_name[name][3]
+            strategy, static = False, c['params'] is not None
+            params, ranges = [], {}
+            for base in c['bases']:
+                info = resolve(base, seen + (name,)) if base else None
+                if info is None:
+                    static = False
+                    continue
+                is_strategy, base_params, base_ranges, base_static = info
+                strategy = strategy or is_strategy
+                static = static and base_static
+                params = [p for p in params if p[0] not in dict(base_params)] + base_params
+                ranges.update(base_ranges)
+            own = c['params'] or []
+            own_names = dict(own)
+            # Own params first, then the inherited ones
+            params = own + [p for p in params if p[0] not in own_names]
+            ranges.update(c['sweep_ranges'])
+            resolved[name] = (strategy, params, ranges, static)
+            return resolved[name]
+
+        bases = {(path, base) for _, path, _, c in found for base in c['bases']}
+        strategies = {}
+        for module, path, bundled, c in found:
+            name = c['name']
+            info = resolve(name) if by_name[name][1] == path else None
+            if (path, name) in bases or name.startswith('_'):
+                continue
+            if info is None:
+                errors.append((path, f"strategy name {name} is already taken"))
+                continue
+            is_strategy, params, ranges, static = info
+            if not is_strategy:
+                continue
+            strategies[name] = StrategyInfo(
+                name, module, path, [p for p in params if p[0] not in HIDDEN_PARAMS], ranges, c['doc'],
+                bundled, static)
+        return strategies
+
+    def _ensure(self):
+        if not self._scanned:
+            self.scan()
+
+    def names(self, plugins=True):
+        """
+        Strategy names, the bundled ones first; only those with
+        ``plugins=False``.
+        """
+        self._ensure()
+        return [name for name, info in self._strategies.items() if plugins or info.bundled]
+
+    def get(self, name):
+        self._ensure()
+        try:
+            return self._strategies[name]
+        except KeyError:
+            raise KeyError(f"Unknown strategy '{name}'. Choose from: {', '.join(self._strategies)}") from None
+
+    def __contains__(self, name):
+        self._ensure()
+        return name in self._strategies
+
+    def __iter__(self):
+        self._ensure()
+        return iter(list(self._strategies.values()))
+
+    def __len__(self):
+        self._ensure()
+        return len(self._strategies)
+
+
+_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
+
+def strategy_registry():
+    """
+    The process-wide StrategyRegistry over PLUGIN_DIR, scanned on first
+    use.
+    """
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = StrategyRegistry()
+        return _REGISTRY
+
+
+def strategy_names(plugins=True):
+    return strategy_registry().names(plugins)
+
+
+def strategy_info(strat_name):
+    """
+    The StrategyInfo of a strategy name. Raises KeyError for an unknown
+    name.
+    """
+    return strategy_registry().get(strat_name)
+
+
+def get_strategy_and_params(strat_name, overrides=None):
+    """
+    Look up a strategy by name (see strategy_info), load its class and
+    merge the values in ``overrides`` (text, as typed, or values) into its
+    defaults. Raises KeyError for an unknown name and ValueError if the
+    strategy cannot be imported.
+    """
+    info = strategy_info(strat_name)
+    StratClass = info.load()
+    overrides = overrides or {}
+
+    final_params = {}
+    for spec in info.schema():
+        name = spec['name']
+        final_params[name] = parse_param(spec, overrides[name]) if name in overrides else spec['default']
+    return StratClass, final_params
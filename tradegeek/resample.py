@@ -0,0 +1,174 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .data import freeze_frame
+from .indicators import data_fingerprint
+
+
+# --------------------------------------------------------------
+# RESAMPLING
+# (minute/hourly data aggregated to the timeframe of the run, cached per symbol)
+# --------------------------------------------------------------
+
+# Timeframe name -> (pandas resample rule, nominal bar length). The names
+# are the keys of engine.TIMEFRAMES, finest first.
+RESAMPLE_RULES = {
+    "Minutes": ("1min", pd.Timedelta(minutes=1)),
+    "5 Minutes": ("5min", pd.Timedelta(minutes=5)),
+    "15 Minutes": ("15min", pd.Timedelta(minutes=15)),
+    "Hourly": ("1h", pd.Timedelta(hours=1)),
+    "4 Hours": ("4h", pd.Timedelta(hours=4)),
+    "Daily": ("1D", pd.Timedelta(days=1)),
+    "Weekly": ("W", pd.Timedelta(days=7)),
+}
+
+# How each OHLCV column combines; any other numeric column keeps its last value
+_AGGREGATION = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'openinterest': 'last',
+}
+
+# Timeframe choice that runs the data at the resolution it was loaded with
+AS_LOADED = "As loaded"
+
+RESAMPLE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+
+def infer_timeframe(df):
+    """
+    The coarsest timeframe whose bars are no longer than the typical
+    (median) spacing of ``df``; None with fewer than two rows.
+    """
+    if len(df) < 2:
+        return None
+    spacing = df.index.to_series().diff().median()
+    name = None
+    for candidate, (_, length) in RESAMPLE_RULES.items():
+        if length <= spacing:
+            name = candidate
+    return name or "Minutes"
+
+
+def resample_ohlcv(df, timeframe):
+    """
+    Aggregate ``df`` to ``timeframe`` bars: first open, highest high,
+    lowest low, last close, summed volume. Empty periods are dropped.
+
+    Each bar is stamped with the time of the last source bar in it, not
+    the start of the period, so a coarser feed running alongside the
+    source never shows a bar before all of it has happened.
+    """
+    rule = RESAMPLE_RULES[timeframe][0]
+    columns = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+    how = {c: _AGGREGATION.get(c.lower(), 'last') for c in columns}
+    # float32 volumes from a compact load would lose precision once summed
+    source = df[columns].astype({c: np.float64 for c in columns if how[c] == 'sum'})
+
+    bars = source.resample(rule).agg(how)
+    stamps = df.index.to_series().resample(rule).max()
+    filled = stamps.notna().to_numpy()
+    bars = bars[filled]
+    bars.index = pd.DatetimeIndex(stamps[filled], name=df.index.name)
+    return bars.astype({c: df[c].dtype for c in columns if how[c] != 'sum'})
+
+
+class ResampleCache:
+    """
+    In-process LRU of resampled frames keyed by (source fingerprint,
+    timeframe), bounded by the bytes held.
+    """
+
+    def __init__(self, max_bytes=RESAMPLE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            df = self._entries.get(key)
+            if df is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return df
+
+    def put(self, key, df):
+        size = int(df.memory_usage(index=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= int(old.memory_usage(index=True).sum())
+            self._entries[key] = df
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= int(evicted.memory_usage(index=True).sum())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# One cache per process, like INDICATOR_CACHE
+RESAMPLE_CACHE = ResampleCache()
+
+
+def is_coarser(timeframe, than):
+    return RESAMPLE_RULES[timeframe][1] > RESAMPLE_RULES[than][1]
+
+
+def resample_to(df, timeframe, cache=RESAMPLE_CACHE):
+    """
+    ``df`` at ``timeframe``: resampled when its bars are finer, otherwise
+    returned as is (nothing is upsampled). The same source frame and
+    timeframe are aggregated once per process; later calls return the
+    cached frame object, so indicator cache keys stay stable too.
+    """
+    source = infer_timeframe(df)
+    if source is None or not is_coarser(timeframe, source):
+        return df
+
+    key = (data_fingerprint(df), timeframe)
+    resampled = cache.get(key) if cache is not None else None
+    if resampled is None:
+        resampled = freeze_frame(resample_ohlcv(df, timeframe))
+        if cache is not None:
+            cache.put(key, resampled)
+    return resampled
+
+
+def resolve_timeframe(dataframes, timeframe):
+    """
+    The timeframe name a run uses: ``timeframe`` itself, or for AS_LOADED
+    (or None) the timeframe of the first symbol's data.
+    """
+    if timeframe not in (None, AS_LOADED):
+        return timeframe
+    df = next(iter(dataframes.values()), None)
+    return (infer_timeframe(df) if df is not None else None) or "Daily"
+
+
+def resample_dataframes(dataframes, timeframe, cache=RESAMPLE_CACHE):
+    """
+    resample_to() for every symbol of a {symbol: DataFrame} dict.
+    """
+    return {symbol: resample_to(df, timeframe, cache) for symbol, df in dataframes.items()}
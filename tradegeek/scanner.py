@@ -0,0 +1,205 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .data import read_price_tail, symbol_from_path
+from .strategies import (SmaCross, RsiStrategy, SmaRsiCombo, BollingerBandStrategy,
+                         MACDStrategy, MyNewStrategy)
+from .vectorized import VECTOR_SIGNALS, ema, first_valid, rsi, sma, sma_pair
+
+
+# --------------------------------------------------------------
+# SIGNAL SCANNER
+# (the latest entry/exit state of a strategy across many files, from their last bars only)
+# --------------------------------------------------------------
+
+# Weight an exponential smoothing's seed keeps at the end of a scan
+# window. The scanned value differs from the full-history one by this
+# fraction of the seed's error, far below any threshold the rules test.
+SETTLE_WEIGHT = 1e-9
+
+
+def _settle_bars(alpha):
+    return math.ceil(math.log(SETTLE_WEIGHT) / math.log(1.0 - alpha))
+
+
+def _ema_bars(period):
+    return period + _settle_bars(2.0 / (1.0 + period))
+
+
+def _rsi_bars(period):
+    # The first bar only gives the first difference
+    return 1 + period + _settle_bars(1.0 / period)
+
+
+# Strategy class -> bars of history the last bar's signal depends on. A
+# cross also compares with the bar before, hence the + 1.
+SCAN_WINDOWS = {
+    SmaCross: lambda p: p['slow_period'] + 1,
+    RsiStrategy: lambda p: _rsi_bars(p['rsi_period']),
+    SmaRsiCombo: lambda p: max(p['slow_period'] + 1, _rsi_bars(p['rsi_period'])),
+    BollingerBandStrategy: lambda p: p['period'],
+    MACDStrategy: lambda p: (max(_ema_bars(p['fast_period']), _ema_bars(p['slow_period']))
+                             + _ema_bars(p['signal_period']) + 1),
+    MyNewStrategy: lambda p: max(p['stoch_period'] + p['stoch_d_period'] + p['stoch_dslow_period'] - 1,
+                                 p['sma_period']) + 1,
+}
+
+
+def _gap(a, b, c):
+    return 100.0 * abs(a[-1] - b[-1]) / c[-1]
+
+
+def _smacross_strength(o, h, l, c, p, signal):
+    return _gap(*sma_pair(c, p['fast_period'], p['slow_period']), c)
+
+
+def _rsi_strength(o, h, l, c, p, signal):
+    last = rsi(c, p['rsi_period'])[-1]
+    return p['rsi_lower'] - last if signal == 'buy' else last - p['rsi_upper']
+
+
+def _smarsi_strength(o, h, l, c, p, signal):
+    last = rsi(c, p['rsi_period'])[-1]
+    if signal == 'close' and last > p['rsi_upper']:
+        return last - p['rsi_upper']
+    return _gap(*sma_pair(c, p['fast_period'], p['slow_period']), c)
+
+
+def _bollinger_strength(o, h, l, c, p, signal):
+    period = p['period']
+    mid = sma(c, period)[-1]
+    dev = p['devfactor'] * math.sqrt(abs(sma(c * c, period)[-1] - mid * mid))
+    beyond = (mid - dev) - c[-1] if signal == 'buy' else c[-1] - (mid + dev)
+    return 100.0 * beyond / c[-1]
+
+
+def _macd_strength(o, h, l, c, p, signal):
+    macd = ema(c, p['fast_period']) - ema(c, p['slow_period'])
+    return _gap(macd, ema(macd, p['signal_period']), c)
+
+
+def _stoch_strength(o, h, l, c, p, signal):
+    return _gap(c, sma(c, p['sma_period']), c)
+
+
+# Strategy class -> how far past its trigger the last bar is, for ranking:
+# the gap a cross opened or the distance of the close from the band or
+# SMA (in % of the close), or RSI points beyond the threshold.
+SCAN_STRENGTH = {
+    SmaCross: _smacross_strength,
+    RsiStrategy: _rsi_strength,
+    SmaRsiCombo: _smarsi_strength,
+    BollingerBandStrategy: _bollinger_strength,
+    MACDStrategy: _macd_strength,
+    MyNewStrategy: _stoch_strength,
+}
+
+
+def scan_window(strat_class, params):
+    """
+    Bars a scan reads from the end of each file for this strategy.
+    Raises ValueError for strategies without a vectorized rule.
+    """
+    if strat_class not in SCAN_WINDOWS:
+        raise ValueError(f"{strat_class.__name__} has no vectorized signal rule to scan with")
+    return SCAN_WINDOWS[strat_class](params)
+
+
+def scan_file(path, strat_class, params, bars):
+    """
+    The signal of the last bar of one file: a dict with 'symbol', 'signal'
+    ('buy', 'close' or None), 'strength' (see SCAN_STRENGTH), the bar's
+    'date' and 'close', and the 'bars' read (all of them when the file
+    holds fewer than ``bars``, so the signal is that of a full run).
+    """
+    dates, columns = read_price_tail(path, bars, columns=('open', 'high', 'low', 'close'))
+    arrays = {name.lower(): values for name, values in columns.items()}
+    try:
+        o, h, l, c = (arrays[name] for name in ('open', 'high', 'low', 'close'))
+    except KeyError as e:
+        raise ValueError(f"No '{e.args[0]}' column") from None
+    row = {'symbol': symbol_from_path(path), 'signal': None, 'strength': None,
+           'date': dates[-1] if dates else None, 'close': float(c[-1]) if len(c) else None,
+           'bars': len(c), 'path': path}
+    if not len(c):
+        return row
+
+    entry, exit_, indicators = VECTOR_SIGNALS[strat_class](o, h, l, c, params)
+    # Still in the indicators' warm-up on the last bar
+    if max([0] + [first_valid(arr) for arr in indicators]) >= len(c):
+        return row
+    signal = 'buy' if entry[-1] else 'close' if exit_[-1] else None
+    if signal is not None:
+        row.update(signal=signal, strength=float(SCAN_STRENGTH[strat_class](o, h, l, c, params, signal)))
+    return row
+
+
+# Per-process state for scan workers, filled once by _scan_init
+_SCAN_STATE = {}
+
+
+def _scan_init(strat_class, params, bars):
+    _SCAN_STATE.update(strat_class=strat_class, params=params, bars=bars)
+
+
+def _scan_one(path):
+    state = _SCAN_STATE
+    try:
+        return scan_file(path, state['strat_class'], state['params'], state['bars'])
+    except (OSError, ValueError) as e:
+        return {'symbol': symbol_from_path(path), 'path': path, 'error': str(e)}
+
+
+def scan_signals(paths, strat_class, params, max_workers=None, progress=None, cancel=None):
+    """
+    Scan every file of ``paths`` for the current signal of ``strat_class``
+    (one of the VECTOR_SIGNALS strategies), reading only the trailing
+    window its indicators need (scan_window) instead of running a
+    backtest.
+
+    Returns (signals, errors): a DataFrame of the files whose last bar
+    triggers, buys before closes and each strongest first, and a list of
+    {'symbol', 'path', 'error'} for the files that could not be read.
+
+    Files are spread over ``max_workers`` processes (with one, this
+    process scans them itself). ``progress`` is called as progress(done, total);
+    setting ``cancel`` (a threading.Event) stops the scan and returns
+    what was scanned.
+    """
+    bars = scan_window(strat_class, params)
+    max_workers = max_workers or os.cpu_count() or 1
+    total = len(paths)
+    rows, errors = [], []
+
+    def collect(results):
+        for done, row in enumerate(results, 1):
+            if 'error' in row:
+                errors.append(row)
+            elif row['signal'] is not None:
+                rows.append(row)
+            if progress is not None and (done % 100 == 0 or done == total):
+                progress(done, total)
+            if cancel is not None and cancel.is_set():
+                return
+
+    if max_workers == 1:
+        _scan_init(strat_class, params, bars)
+        collect(map(_scan_one, paths))
+    else:
+        chunksize = max(1, min(256, total // (max_workers * 8)))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_scan_init,
+                                 initargs=(strat_class, params, bars)) as executor:
+            collect(executor.map(_scan_one, paths, chunksize=chunksize))
+            if cancel is not None and cancel.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    signals = pd.DataFrame(rows, columns=['symbol', 'signal', 'strength', 'date', 'close', 'bars', 'path'])
+    if len(signals):
+        signals['side'] = np.where(signals['signal'] == 'buy', 0, 1)
+        signals = signals.sort_values(['side', 'strength'], ascending=[True, False], kind='stable') \
+            .drop(columns='side').reset_index(drop=True)
+    return signals, errors
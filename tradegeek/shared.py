@@ -0,0 +1,166 @@
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from backtrader.utils import date2num
+
+from .indicators import data_fingerprint
+
+
+# --------------------------------------------------------------
+# SHARED MARKET DATA
+# (one copy of the loaded bars in shared memory, attached zero-copy by workers)
+# --------------------------------------------------------------
+
+class SharedFrame:
+    """
+    Picklable handle to one price DataFrame held in shared memory. Worker
+    processes receive these instead of the DataFrames and read the bars
+    through attach() or shared_dataframe().
+
+    The block holds the int64 nanosecond index, the Backtrader date
+    numbers of the bars and every numeric column, back to back. Columns
+    keep their dtype (float32 columns of a compact load stay float32).
+    """
+
+    def __init__(self, shm_name, rows, layout, index_name, tz, fingerprint):
+        self.shm_name = shm_name
+        self.rows = rows
+        # (name, dtype string, byte offset) per array in the block
+        self.layout = layout
+        self.index_name = index_name
+        self.tz = tz
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return self.rows
+
+
+def _aligned(offset):
+    return -(-offset // 8) * 8
+
+
+class SharedMarketData:
+    """
+    Copies {symbol: DataFrame} into shared memory once. ``frames`` maps
+    each symbol to its SharedFrame for passing to worker processes.
+
+    Use as a context manager (or call close()) and only leave it once the
+    workers are done: closing unlinks the memory.
+    """
+
+    def __init__(self, dataframes):
+        self._blocks = []
+        self.frames = {}
+        try:
+            for symbol, df in dataframes.items():
+                self.frames[symbol] = self._share(df)
+        except BaseException:
+            self.close()
+            raise
+
+    def _share(self, df):
+        rows = len(df)
+        index = df.index
+        tz = str(index.tz) if index.tz is not None else None
+        stamps = index.tz_convert('UTC').tz_localize(None) if tz else index
+        # The same conversion as ArrayPandasData, so both feeds deliver
+        # identical bar times
+        datetimes = np.array([date2num(dt) for dt in index.to_pydatetime()], dtype=np.float64)
+
+        arrays = [('__index__', stamps.to_numpy(dtype='datetime64[ns]').view(np.int64)),
+                  ('__datetime__', datetimes)]
+        for name in df.columns:
+            if pd.api.types.is_numeric_dtype(df[name]):
+                values = df[name].to_numpy()
+                if values.dtype != np.float32:
+                    values = values.astype(np.float64)
+                arrays.append((str(name), values))
+
+        layout = []
+        offset = 0
+        for name, values in arrays:
+            offset = _aligned(offset)
+            layout.append((name, values.dtype.str, offset))
+            offset += values.nbytes
+
+        block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self._blocks.append(block)
+        _OWNED[block.name] = block
+        for (name, dtype, start), (_, values) in zip(layout, arrays):
+            np.ndarray(rows, dtype=dtype, buffer=block.buf, offset=start)[:] = values
+
+        return SharedFrame(block.name, rows, layout, index.name, tz, data_fingerprint(df))
+
+    def close(self):
+        for block in self._blocks:
+            _OWNED.pop(block.name, None)
+            _ATTACHED.pop(block.name, None)
+            try:
+                block.close()
+            except BufferError:
+                pass  # still viewed in this process; unlinking is enough
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Blocks created by this process, by shm name
+_OWNED = {}
+
+# Worker side: shm name -> (SharedMemory, index, datetimes, columns, DataFrame
+# or None). Attached once per process and kept until it exits.
+_ATTACHED = {}
+
+
+def _open_block(name):
+    if name in _OWNED:
+        return _OWNED[name]
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching registers the block again, but with the
+    # resource tracker of the parent: it was started when the block was
+    # created, before the pool. Only the parent's close() unregisters it.
+    return shared_memory.SharedMemory(name=name)
+
+
+def attach(frame):
+    """
+    Read-only NumPy views of a SharedFrame: (index as int64 nanoseconds,
+    Backtrader date numbers, {column name: values}).
+    """
+    entry = _ATTACHED.get(frame.shm_name)
+    if entry is None:
+        block = _open_block(frame.shm_name)
+        views = {}
+        for name, dtype, offset in frame.layout:
+            view = np.ndarray(frame.rows, dtype=dtype, buffer=block.buf, offset=offset)
+            view.flags.writeable = False
+            views[name] = view
+        index = views.pop('__index__')
+        datetimes = views.pop('__datetime__')
+        entry = _ATTACHED[frame.shm_name] = [block, index, datetimes, views, None]
+    return entry[1], entry[2], entry[3]
+
+
+def shared_dataframe(frame):
+    """
+    The DataFrame of a SharedFrame, built over the shared arrays without
+    copying them (a tz-aware index is the one exception). Returns the same
+    object on every call in a process, so the resample and indicator
+    caches keep hitting.
+    """
+    index, _, columns = attach(frame)
+    entry = _ATTACHED[frame.shm_name]
+    if entry[4] is None:
+        dt_index = pd.DatetimeIndex(index.view('datetime64[ns]'), name=frame.index_name, copy=False)
+        if frame.tz:
+            dt_index = dt_index.tz_localize('UTC').tz_convert(frame.tz)
+        entry[4] = pd.DataFrame(columns, index=dt_index, copy=False)
+    return entry[4]
@@ -0,0 +1,350 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from backtrader.utils import date2num, num2date
+
+from .analytics import date_numbers
+from .indicators import data_fingerprint
+from .registry import strategy_source
+
+
+# --------------------------------------------------------------
+# RESULTS STORE
+# (every run's inputs, analyzer summary, equity curve and trades in SQLite)
+# --------------------------------------------------------------
+
+STORE_PATH = os.path.join(os.path.expanduser("~"), ".tradegeek", "results.sqlite")
+
+# Part of every run key: bump it when a change to the engines or the
+# strategies alters results, so older runs stop matching.
+STORE_VERSION = 1
+
+# collect_results keys kept in columns of their own
+RESULT_COLUMNS = ('final_value', 'sharpe', 'max_drawdown', 'drawdown_len', 'total_trades', 'won', 'lost',
+                  'pnl_net')
+
+# Columns runs can be sorted by; each has an index, alone and after the strategy
+SORT_COLUMNS = ('final_value', 'sharpe', 'max_drawdown', 'pnl_net', 'total_trades', 'created')
+
+# Params that do not change results
+_IGNORED_PARAMS = ('printlog',)
+
+_FILL_DTYPE = np.dtype([('datetime', 'f8'), ('price', 'f8'), ('isbuy', 'i1')])
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL,
+    strategy TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    symbols TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    params TEXT NOT NULL,
+    initial_cash REAL NOT NULL,
+    commission REAL NOT NULL,
+    slippage REAL NOT NULL,
+    portfolio INTEGER NOT NULL,
+    final_value REAL,
+    sharpe REAL,
+    max_drawdown REAL,
+    drawdown_len INTEGER,
+    total_trades INTEGER,
+    won INTEGER,
+    lost INTEGER,
+    pnl_net REAL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS run_symbols (
+    symbol TEXT NOT NULL,
+    run_id INTEGER NOT NULL,
+    PRIMARY KEY (symbol, run_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS curves (
+    run_id INTEGER PRIMARY KEY,
+    datetime BLOB NOT NULL,
+    value BLOB NOT NULL,
+    fills BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    run_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    symbol TEXT NOT NULL,
+    closed REAL NOT NULL,
+    pnl_net REAL NOT NULL,
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
+{"".join(f"CREATE INDEX IF NOT EXISTS runs_{c} ON runs ({c});" for c in SORT_COLUMNS)}
+{"".join(f"CREATE INDEX IF NOT EXISTS runs_strategy_{c} ON runs (strategy, {c});" for c in SORT_COLUMNS)}
+"""
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def run_key(dataframes, strat_class, params, timeframe, settings, engine, portfolio=False, extra_timeframes=()):
+    """
+    Hash of everything that decides a run's results: the content of each
+    feed's DataFrame (as run, i.e. after resampling), the strategy class
+    (for a plugin, the source it was imported from; see
+    registry.strategy_source) and its params, the timeframes, (cash,
+    commission, slippage) and the engine.
+    """
+    inputs = {
+        'version': STORE_VERSION,
+        'data': [(symbol, data_fingerprint(df)) for symbol, df in dataframes.items()],
+        'strategy': strat_class.__name__,
+        'params': {k: v for k, v in params.items() if k not in _IGNORED_PARAMS},
+        'timeframe': timeframe,
+        'extra_timeframes': list(extra_timeframes),
+        'settings': list(settings),
+        'engine': engine,
+        'portfolio': bool(portfolio),
+    }
+    # Bundled strategies change with the package, i.e. with STORE_VERSION
+    source = strategy_source(strat_class)
+    if source is not None:
+        inputs['source'] = source
+    text = json.dumps(inputs, sort_keys=True, default=_json_default)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def run_keys(dataframes, strat_class, params, timeframe, settings, vectorized, portfolio=False,
+             extra_timeframes=()):
+    """
+    {engine: run_key} for the engines a run may end up on, in the order to
+    look them up. A run asked for ``vectorized`` that run_vectorized
+    rejects falls back to Backtrader, and is stored under that engine's key.
+    """
+    engines = ("vectorized", "backtrader") if vectorized else ("backtrader",)
+    return {engine: run_key(dataframes, strat_class, params, timeframe, settings, engine, portfolio,
+                            extra_timeframes)
+            for engine in engines}
+
+
+def vectorized_equity(df, summary, symbol):
+    """
+    A run_vectorized(..., with_trades=True) summary in the shape of the
+    EquityCurve analysis, so both engines are stored (and shown) alike.
+    """
+    index = df.index
+    datetimes = date_numbers(index)
+    fills = [(index[i].to_pydatetime(), float(price), True)
+             for i, price in zip(summary['buys'], summary['buy_prices'])]
+    fills += [(index[i].to_pydatetime(), float(price), False)
+              for i, price in zip(summary['sells'], summary['sell_prices'])]
+    fills.sort(key=lambda fill: fill[0])
+    return {
+        'datetime': datetimes,
+        'value': np.asarray(summary['equity'], dtype=np.float64),
+        'fills': fills,
+        'trades': list(summary['trade_pnls']),
+        'closes': [(symbol, datetimes[i]) for i in summary['sells'][:len(summary['trade_pnls'])]],
+    }
+
+
+class ResultsStore:
+    """
+    SQLite database of finished runs, keyed by run_key(). Each run keeps
+    its inputs, the collect_results summary (the main figures also in
+    indexed columns), and optionally the equity curve, fills and closed
+    trades in the EquityCurve shape, so a stored run can be shown again
+    exactly like a fresh one.
+
+    Safe to share between threads; every call holds the store's lock.
+    """
+
+    def __init__(self, path=None):
+        self.path = path = path or STORE_PATH
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def put(self, key, strategy, engine, symbols, timeframe, params, settings, summary, portfolio=False,
+            equity=None, commit=True):
+        """
+        Record one run under ``key`` (replacing an earlier one) and return
+        its id. ``equity`` is an EquityCurve analysis (with 'closes'), or
+        vectorized_equity(); without it only the summary is kept.
+        """
+        initial_cash, commission, slippage = settings
+        params = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS}
+        # The per-bar arrays of a vectorized summary go in with ``equity``
+        summary = {k: v for k, v in summary.items() if not isinstance(v, (np.ndarray, list))}
+        row = (key, time.time(), strategy, engine, ",".join(symbols), timeframe,
+               json.dumps(params, sort_keys=True, default=_json_default), initial_cash, commission, slippage,
+               int(bool(portfolio)),
+               *(summary.get(c) for c in RESULT_COLUMNS),
+               json.dumps(summary, default=_json_default))
+        with self._lock:
+            db = self._db
+            run_id = db.execute(
+                f"INSERT INTO runs (key, created, strategy, engine, symbols, timeframe, params, initial_cash, "
+                f"commission, slippage, portfolio, {', '.join(RESULT_COLUMNS)}, summary) "
+                f"VALUES ({', '.join('?' * (12 + len(RESULT_COLUMNS)))}) "
+                f"ON CONFLICT (key) DO UPDATE SET "
+                + ", ".join(f"{c} = excluded.{c}" for c in ('created', 'engine', *RESULT_COLUMNS, 'summary'))
+                + " RETURNING id", row).fetchone()[0]
+            db.executemany("INSERT OR IGNORE INTO run_symbols (symbol, run_id) VALUES (?, ?)",
+                           [(symbol, run_id) for symbol in symbols])
+            if equity is not None:
+                self._put_equity(run_id, equity)
+            if commit:
+                db.commit()
+        return run_id
+
+    def _put_equity(self, run_id, equity):
+        fills = np.array([(date2num(dt), price, isbuy) for dt, price, isbuy in equity['fills']],
+                         dtype=_FILL_DTYPE)
+        self._db.execute(
+            "INSERT OR REPLACE INTO curves (run_id, datetime, value, fills) VALUES (?, ?, ?, ?)",
+            (run_id, np.asarray(equity['datetime'], dtype=np.float64).tobytes(),
+             np.asarray(equity['value'], dtype=np.float64).tobytes(), fills.tobytes()))
+        self._db.execute("DELETE FROM trades WHERE run_id = ?", (run_id,))
+        self._db.executemany(
+            "INSERT INTO trades (run_id, seq, symbol, closed, pnl_net) VALUES (?, ?, ?, ?, ?)",
+            [(run_id, seq, symbol, float(closed), float(pnl))
+             for seq, ((symbol, closed), pnl) in enumerate(zip(equity['closes'], equity['trades']))])
+
+    def commit(self):
+        with self._lock:
+            self._db.commit()
+
+    def get(self, key, curves=False):
+        """
+        The stored run for ``key`` as a dict (see run()), or None. With
+        ``curves`` a run stored without its equity curve counts as missing.
+        """
+        with self._lock:
+            row = self._db.execute("SELECT id FROM runs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            has_curve = self._db.execute("SELECT 1 FROM curves WHERE run_id = ?", (row[0],)).fetchone()
+        if curves and has_curve is None:
+            return None
+        return self.run(row[0])
+
+    def get_many(self, keys):
+        """
+        {key: (engine, summary)} of the stored runs among ``keys``.
+        """
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            # Within SQLite's default limit on query parameters
+            for start in range(0, len(keys), 900):
+                chunk = keys[start:start + 900]
+                rows = self._db.execute(
+                    f"SELECT key, engine, summary FROM runs WHERE key IN ({', '.join('?' * len(chunk))})", chunk)
+                found.update((key, (engine, json.loads(summary))) for key, engine, summary in rows)
+        return found
+
+    def run(self, run_id):
+        """
+        One stored run: its inputs, 'summary' and, if it was stored with
+        one, 'equity' in the EquityCurve shape (else None).
+        """
+        with self._lock:
+            db = self._db
+            cursor = db.execute("SELECT * FROM runs WHERE id = ?", (run_id,))
+            row = cursor.fetchone()
+            if row is None:
+                raise KeyError(f"No stored run {run_id}")
+            record = dict(zip([d[0] for d in cursor.description], row))
+            curve = db.execute("SELECT datetime, value, fills FROM curves WHERE run_id = ?", (run_id,)).fetchone()
+            trades = db.execute("SELECT symbol, closed, pnl_net FROM trades WHERE run_id = ? ORDER BY seq",
+                                (run_id,)).fetchall()
+
+        record['symbols'] = record['symbols'].split(",")
+        record['params'] = json.loads(record['params'])
+        record['portfolio'] = bool(record['portfolio'])
+        record['summary'] = json.loads(record.pop('summary'))
+        for c in RESULT_COLUMNS:
+            del record[c]
+        record['equity'] = None
+        if curve is not None:
+            fills = np.frombuffer(curve[2], dtype=_FILL_DTYPE)
+            record['equity'] = {
+                'datetime': np.frombuffer(curve[0], dtype=np.float64),
+                'value': np.frombuffer(curve[1], dtype=np.float64),
+                'fills': [(num2date(dt), price, bool(isbuy)) for dt, price, isbuy in fills.tolist()],
+                'trades': [pnl for _, _, pnl in trades],
+                'closes': [(symbol, closed) for symbol, closed, _ in trades],
+            }
+        return record
+
+    def query(self, strategy=None, symbol=None, sort_by='sharpe', ascending=False, limit=100, **ranges):
+        """
+        Stored runs as a DataFrame, one row per run with its inputs and the
+        RESULT_COLUMNS, sorted by ``sort_by`` (one of SORT_COLUMNS; runs
+        where it is empty come last) and cut to ``limit`` rows. Filter on
+        the strategy, a symbol the run traded, and ranges of result
+        columns given as e.g. ``sharpe=(0.5, None)`` (low, high, inclusive).
+        """
+        if sort_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by '{sort_by}'. Choose from: {', '.join(SORT_COLUMNS)}")
+        where, args = [], []
+        if strategy is not None:
+            where.append("strategy = ?")
+            args.append(strategy)
+        if symbol is not None:
+            where.append("id IN (SELECT run_id FROM run_symbols WHERE symbol = ?)")
+            args.append(symbol)
+        for column, (low, high) in ranges.items():
+            if column not in RESULT_COLUMNS:
+                raise ValueError(f"Cannot filter on '{column}'. Choose from: {', '.join(RESULT_COLUMNS)}")
+            if low is not None:
+                where.append(f"{column} >= ?")
+                args.append(low)
+            if high is not None:
+                where.append(f"{column} <= ?")
+                args.append(high)
+
+        columns = ("id, created, strategy, engine, symbols, timeframe, params, initial_cash, commission, "
+                   "slippage, portfolio, " + ", ".join(RESULT_COLUMNS))
+        order = "ASC NULLS LAST" if ascending else "DESC"
+        sql = (f"SELECT {columns} FROM runs {'WHERE ' + ' AND '.join(where) if where else ''} "
+               f"ORDER BY {sort_by} {order}, id LIMIT ?")
+        with self._lock:
+            cursor = self._db.execute(sql, args + [-1 if limit is None else limit])
+            names = [d[0] for d in cursor.description]
+            rows = cursor.fetchall()
+        runs = pd.DataFrame(rows, columns=names)
+        runs['created'] = pd.to_datetime(runs['created'], unit='s')
+        runs['portfolio'] = runs['portfolio'].astype(bool)
+        return runs
+
+    def delete(self, run_id):
+        with self._lock:
+            for table, column in (('runs', 'id'), ('run_symbols', 'run_id'), ('curves', 'run_id'),
+                                  ('trades', 'run_id')):
+                self._db.execute(f"DELETE FROM {table} WHERE {column} = ?", (run_id,))
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            for table in ('runs', 'run_symbols', 'curves', 'trades'):
+                self._db.execute(f"DELETE FROM {table}")
+            self._db.commit()
+
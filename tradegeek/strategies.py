@@ -0,0 +1,321 @@
+import contextlib
+import threading
+
+import backtrader as bt
+
+from .engine import timeframe_feed_name, traded_datas
+from .indicators import SMA, RSI, BollingerBands, CrossOver, MACD, Stochastic
+from .tradelog import BUY, REJECTED, SELL, TRADE, format_event
+
+
+# --------------------------------------------------------------
+# STRATEGIES
+# --------------------------------------------------------------
+
+# Per-thread log destination. Runs attach a tradelog.TradeLog here (see
+# trade_logging) and the strategies record their events into it; with
+# only a writer attached (see log_to), or nothing, each line is written or
+# printed.
+_LOG_TARGET = threading.local()
+
+
+def strategy_log(line):
+    write = getattr(_LOG_TARGET, 'write', None)
+    (write or print)(line)
+
+
+@contextlib.contextmanager
+def trade_logging(sink):
+    """
+    Send the log of the strategies run in this thread to ``sink`` (a
+    TradeLog) for the duration of the block, then close it.
+    """
+    previous = getattr(_LOG_TARGET, 'sink', None)
+    _LOG_TARGET.sink = sink
+    try:
+        yield sink
+    finally:
+        _LOG_TARGET.sink = previous
+        sink.close()
+
+
+@contextlib.contextmanager
+def log_to(write):
+    """
+    Write the log lines of the strategies run in this thread with
+    ``write(line)`` instead of printing them, for the duration of the block.
+    """
+    previous = getattr(_LOG_TARGET, 'write', None)
+    _LOG_TARGET.write = write
+    try:
+        yield
+    finally:
+        _LOG_TARGET.write = previous
+
+
+class TradeGeekStrategy(bt.Strategy):
+    """
+    Shared plumbing for the bundled strategies. Subclasses build the
+    indicators for one feed in ``indicators(data)`` and decide on them in
+    ``entry(data, ind)`` / ``exit(data, ind)``.
+
+    By default only the first feed is traded, as before. With
+    ``portfolio=True`` every loaded feed gets its own indicators and
+    position, and order sizes come from the Cerebro's sizer. Feeds added
+    for extra timeframes are never traded; see timeframe().
+
+    ``params`` and ``sweep_ranges`` (param -> the range a parameter sweep
+    starts from, in optimize.parse_param_range syntax) are read from the
+    source by the registry, so keep both literal.
+    """
+    params = (
+        ('portfolio', False),
+        ('printlog', True),
+    )
+
+    def __init__(self):
+        traded = traded_datas(self.datas)
+        feeds = traded if self.p.portfolio else traded[:1]
+        # (data, indicators, bars needed before its indicators are valid)
+        self.books = []
+        # Per book, the indicators to check one by one before trading:
+        # those of a book using extra timeframes warm up on the bars of
+        # their own feed, which bar counts of ``data`` do not reflect.
+        self._warmup = []
+        for data in feeds:
+            self._uses_timeframes = False
+            ind = self.indicators(data)
+            minperiod = max((i._minperiod for i in ind.values()), default=1)
+            self.books.append((data, ind, minperiod))
+            self._warmup.append(tuple(ind.values()) if self._uses_timeframes else ())
+        self._seen = [0] * len(self.books)
+
+        self._sink = getattr(_LOG_TARGET, 'sink', None) if self.p.printlog else None
+        if self._sink is not None:
+            self._sink.prefix_symbols = self.p.portfolio
+
+    def timeframe(self, data, name):
+        """
+        The feed of ``data``'s symbol at the extra timeframe ``name``, for
+        use in indicators(). The run must have been built with that
+        timeframe in build_cerebro(extra_timeframes=...).
+        """
+        self._uses_timeframes = True
+        try:
+            return self.getdatabyname(timeframe_feed_name(data._name, name))
+        except KeyError:
+            raise ValueError(f"No {name} feed for {data._name}; add {name} to the extra timeframes") from None
+
+    def indicators(self, data):
+        raise NotImplementedError
+
+    def entry(self, data, ind):
+        raise NotImplementedError
+
+    def exit(self, data, ind):
+        raise NotImplementedError
+
+    def prenext(self):
+        # Feeds with a shorter history hold back next(); trade the ones
+        # that are already warmed up.
+        if self.p.portfolio:
+            self.next()
+
+    def next(self):
+        portfolio = self.p.portfolio
+        seen = self._seen
+        warmup = self._warmup
+        for i, (data, ind, minperiod) in enumerate(self.books):
+            if portfolio:
+                bars = len(data)
+                # Not warmed up yet, or no new bar for this feed on this step
+                if bars < minperiod or bars == seen[i]:
+                    continue
+                seen[i] = bars
+            if warmup[i] and any(len(x) < x._minperiod for x in warmup[i]):
+                continue
+
+            if not self.getposition(data).size:
+                if self.entry(data, ind):
+                    self.buy(data=data)
+            elif self.exit(data, ind):
+                self.close(data=data)
+
+    def log(self, txt, dt=None, data=None):
+        if self.params.printlog:
+            data = self.datas[0] if data is None else data
+            line_dt = dt or data.datetime.date(0)
+            if self.p.portfolio:
+                txt = f'{data._name}: {txt}'
+            line = f'[{line_dt.isoformat()}] {txt}'
+            if self._sink is not None:
+                self._sink.message(data.datetime[0], self._sink.symbol_id(data._name), line)
+            else:
+                strategy_log(line)
+
+    def log_event(self, event, data, price=float('nan'), size=float('nan'), pnl=float('nan'),
+                  pnl_net=float('nan')):
+        """
+        Log an order or trade event: recorded as is when a TradeLog is
+        attached (no formatting on the run thread), otherwise formatted and
+        passed to log().
+        """
+        if not self.params.printlog:
+            return
+        if self._sink is not None:
+            self._sink.record(data.datetime[0], self._sink.symbol_id(data._name), event, price, size, pnl,
+                              pnl_net)
+        else:
+            self.log(format_event(event, price, pnl), data=data)
+
+    def notify_order(self, order):
+        if order.status in [order.Submitted, order.Accepted]:
+            return
+        if order.status in [order.Completed]:
+            self.log_event(BUY if order.isbuy() else SELL, order.data, order.executed.price,
+                           order.executed.size)
+        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
+            self.log_event(REJECTED, order.data, size=order.created.size)
+
+    def notify_trade(self, trade):
+        if trade.isclosed:
+            self.log_event(TRADE, trade.data, trade.price, pnl=trade.pnl, pnl_net=trade.pnlcomm)
+
+
+class SmaCross(TradeGeekStrategy):
+    params = (
+        ('fast_period', 10),
+        ('slow_period', 30),
+        ('printlog', True),
+    )
+    sweep_ranges = {'fast_period': '5..30:5', 'slow_period': '20..100:10'}
+
+    def indicators(self, data):
+        sma_fast = SMA(data, period=self.params.fast_period)
+        sma_slow = SMA(data, period=self.params.slow_period)
+        return dict(crossover=CrossOver(sma_fast, sma_slow))
+
+    def entry(self, data, ind):
+        return ind['crossover'][0] > 0
+
+    def exit(self, data, ind):
+        return ind['crossover'][0] < 0
+
+
+class RsiStrategy(TradeGeekStrategy):
+    params = (
+        ('rsi_period', 14),
+        ('rsi_lower', 30),
+        ('rsi_upper', 70),
+        ('printlog', True),
+    )
+    sweep_ranges = {'rsi_period': '7..21:7', 'rsi_lower': '20..40:5', 'rsi_upper': '60..80:5'}
+
+    def indicators(self, data):
+        return dict(rsi=RSI(data, period=self.params.rsi_period))
+
+    def entry(self, data, ind):
+        return ind['rsi'][0] < self.params.rsi_lower
+
+    def exit(self, data, ind):
+        return ind['rsi'][0] > self.params.rsi_upper
+
+
+class SmaRsiCombo(TradeGeekStrategy):
+    params = (
+        ('fast_period', 10),
+        ('slow_period', 30),
+        ('rsi_period', 14),
+        ('rsi_upper', 70),
+        ('rsi_lower', 30),
+        ('printlog', True)
+    )
+    sweep_ranges = {'fast_period': '5..20:5', 'slow_period': '20..60:10', 'rsi_upper': '60..80:10',
+                    'rsi_lower': '20..40:10'}
+
+    def indicators(self, data):
+        sma_fast = SMA(data, period=self.params.fast_period)
+        sma_slow = SMA(data, period=self.params.slow_period)
+        return dict(
+            rsi=RSI(data, period=self.params.rsi_period),
+            crossover=CrossOver(sma_fast, sma_slow),
+        )
+
+    def entry(self, data, ind):
+        return ind['crossover'][0] > 0 and ind['rsi'][0] < self.params.rsi_upper
+
+    def exit(self, data, ind):
+        return ind['crossover'][0] < 0 or ind['rsi'][0] > self.params.rsi_upper
+
+
+class BollingerBandStrategy(TradeGeekStrategy):
+    params = (
+        ('period', 20),
+        ('devfactor', 2.0),
+        ('printlog', True),
+    )
+    sweep_ranges = {'period': '10..40:5', 'devfactor': '1.5..3.0:0.5'}
+
+    def indicators(self, data):
+        return dict(bb=BollingerBands(data, period=self.params.period,
+                                      devfactor=self.params.devfactor))
+
+    def entry(self, data, ind):
+        return data.close[0] < ind['bb'].lines.bot[0]
+
+    def exit(self, data, ind):
+        return data.close[0] > ind['bb'].lines.top[0]
+
+
+class MACDStrategy(TradeGeekStrategy):
+    params = (
+        ('fast_period', 12),
+        ('slow_period', 26),
+        ('signal_period', 9),
+        ('printlog', True),
+    )
+    sweep_ranges = {'fast_period': '8..16:4', 'slow_period': '20..32:6', 'signal_period': '6..12:3'}
+
+    def indicators(self, data):
+        macd = MACD(
+            data,
+            period_me1=self.params.fast_period,
+            period_me2=self.params.slow_period,
+            period_signal=self.params.signal_period
+        )
+        return dict(crossover=CrossOver(macd.macd, macd.signal))
+
+    def entry(self, data, ind):
+        return ind['crossover'][0] > 0
+
+    def exit(self, data, ind):
+        return ind['crossover'][0] < 0
+
+
+class MyNewStrategy(TradeGeekStrategy):
+    params = (
+        ('stoch_period', 14),
+        ('stoch_d_period', 3),
+        ('stoch_dslow_period', 3),
+        ('sma_period', 50),
+        ('printlog', True),
+    )
+    sweep_ranges = {'stoch_period': '7..21:7', 'stoch_d_period': '3..5', 'sma_period': '20..100:20'}
+
+    def indicators(self, data):
+        stoch = Stochastic(
+            data,
+            period=self.params.stoch_period,
+            period_dfast=self.params.stoch_d_period,
+            period_dslow=self.params.stoch_dslow_period
+        )
+        return dict(
+            sma=SMA(data.close, period=self.params.sma_period),
+            cross=CrossOver(stoch.percK, stoch.percD),
+        )
+
+    def entry(self, data, ind):
+        return ind['cross'][0] > 0 and data.close[0] > ind['sma'][0]
+
+    def exit(self, data, ind):
+        return ind['cross'][0] < 0 or data.close[0] < ind['sma'][0]
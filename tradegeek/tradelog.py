@@ -0,0 +1,203 @@
+import math
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# --------------------------------------------------------------
+# TRADE LOG
+# (strategy events buffered as records, formatted and written off the run thread)
+# --------------------------------------------------------------
+
+# Event codes, indexing EVENT_NAMES
+BUY, SELL, REJECTED, TRADE, MESSAGE = range(5)
+EVENT_NAMES = ("BUY", "SELL", "REJECTED", "TRADE", "MESSAGE")
+
+# One logged event. ``datetime`` is a Backtrader date number, ``symbol``
+# an index into TradeLog.symbols and ``message`` into TradeLog.messages
+# (MESSAGE events only).
+EVENT_DTYPE = np.dtype([
+    ('datetime', 'f8'),
+    ('symbol', 'i4'),
+    ('event', 'i1'),
+    ('price', 'f8'),
+    ('size', 'f8'),
+    ('pnl', 'f8'),
+    ('pnl_net', 'f8'),
+    ('message', 'i4'),
+])
+
+LOG_CAPACITY = 4096
+LOG_FLUSH_SECONDS = 0.25
+
+# Backtrader date number of 1970-01-01
+_BT_EPOCH = 719163.0
+
+_STOP = object()
+
+
+def format_event(event, price=math.nan, pnl=math.nan):
+    """
+    The log text of one event, as the strategies have always printed it.
+    """
+    if event == BUY:
+        return f'BUY EXECUTED at Price: {price:.2f}'
+    if event == SELL:
+        return f'SELL EXECUTED at Price: {price:.2f}'
+    if event == REJECTED:
+        return 'Order Canceled/Margin/Rejected'
+    return f'Trade PnL: {pnl:.2f}'
+
+
+class TradeLog:
+    """
+    Shared sink for strategy events. record() only stores the event in a
+    preallocated ring of EVENT_DTYPE records. When the ring is full, or
+    ``interval`` seconds after the last flush, the batch is handed to a
+    writer thread. That thread formats it as the usual log lines and
+    passes the text to ``write`` (e.g. a GUI post) and appends it to the
+    file at ``path``.
+
+    Every batch is also kept for blotter()/export_blotter(). Call close()
+    (or use the TradeLog as a context manager) when the run is over: it
+    flushes the rest and waits for the writer.
+    """
+
+    def __init__(self, write=None, path=None, capacity=LOG_CAPACITY, interval=LOG_FLUSH_SECONDS):
+        self.write = write
+        self.path = path
+        self.interval = interval
+        self.symbols = []
+        self.messages = []
+        # Prefix lines with the symbol, as portfolio runs do
+        self.prefix_symbols = False
+
+        self._symbol_ids = {}
+        self._ring = np.empty(capacity, dtype=EVENT_DTYPE)
+        self._count = 0
+        self._deadline = time.monotonic() + interval
+        self._batches = []
+        self._queue = queue.Queue()
+        self._file = open(path, 'a') if path else None
+        self._writer = None
+        self._closed = False
+
+    def symbol_id(self, name):
+        sid = self._symbol_ids.get(name)
+        if sid is None:
+            sid = self._symbol_ids[name] = len(self.symbols)
+            self.symbols.append(name)
+        return sid
+
+    def record(self, dt, symbol, event, price=math.nan, size=math.nan, pnl=math.nan, pnl_net=math.nan):
+        self._append((dt, symbol, event, price, size, pnl, pnl_net, -1))
+
+    def message(self, dt, symbol, text):
+        """
+        Free text from a strategy's log(); written as is, without the date
+        and symbol prefix.
+        """
+        self.messages.append(text)
+        self._append((dt, symbol, MESSAGE, math.nan, math.nan, math.nan, math.nan, len(self.messages) - 1))
+
+    def _append(self, event):
+        count = self._count
+        self._ring[count] = event
+        self._count = count + 1
+        if self._count == len(self._ring) or time.monotonic() >= self._deadline:
+            self.flush()
+
+    def flush(self):
+        if self._count:
+            batch = self._ring[:self._count].copy()
+            self._count = 0
+            self._batches.append(batch)
+            if self.write is not None or self._file is not None:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_batches, daemon=True)
+                    self._writer.start()
+                self._queue.put((batch, self.prefix_symbols))
+        self._deadline = time.monotonic() + self.interval
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        if self._writer is not None:
+            self._queue.put(_STOP)
+            self._writer.join()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_batches(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            text = self.format_batch(*item)
+            if self._file is not None:
+                self._file.write(text)
+                self._file.flush()
+            if self.write is not None:
+                self.write(text)
+
+    def format_batch(self, batch, prefix_symbols=False):
+        """
+        Log lines for a batch of records, one per event.
+        """
+        days = np.floor(batch['datetime'] - _BT_EPOCH).astype('i8').astype('M8[D]').astype(str)
+        lines = []
+        for day, rec in zip(days.tolist(), batch.tolist()):
+            _, symbol, event, price, _, pnl, _, message = rec
+            if event == MESSAGE:
+                lines.append(self.messages[message])
+                continue
+            text = format_event(event, price, pnl)
+            if prefix_symbols:
+                text = f'{self.symbols[symbol]}: {text}'
+            lines.append(f'[{day}] {text}')
+        return "\n".join(lines) + "\n"
+
+    def blotter(self):
+        """
+        Every order fill, rejection and closed trade logged so far as a
+        DataFrame: datetime, symbol, event, price, size, pnl, pnl_net.
+        Free-text messages are left out.
+        """
+        events = np.concatenate(self._batches + [self._ring[:self._count]])
+        events = events[events['event'] != MESSAGE]
+        micros = np.round((events['datetime'] - _BT_EPOCH) * 86400e6).astype('i8')
+        return pd.DataFrame({
+            'datetime': micros.astype('M8[us]'),
+            'symbol': pd.Categorical.from_codes(events['symbol'], categories=self.symbols),
+            'event': pd.Categorical.from_codes(events['event'], categories=EVENT_NAMES),
+            'price': events['price'],
+            'size': events['size'],
+            'pnl': events['pnl'],
+            'pnl_net': events['pnl_net'],
+        })
+
+    def export_blotter(self, path):
+        """
+        Write blotter() to ``path``: Parquet for a .parquet file (needs
+        pyarrow or fastparquet), CSV otherwise. Returns the row count.
+        """
+        blotter = self.blotter()
+        if str(path).lower().endswith('.parquet'):
+            try:
+                blotter.to_parquet(path, index=False)
+            except ImportError as e:
+                raise ValueError(f"Parquet export is unavailable: {e}") from None
+        else:
+            blotter.to_csv(path, index=False)
+        return len(blotter)
@@ -0,0 +1,314 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from .analytics import drawdown_stats, yearly_sharpe
+from .strategies import (SmaCross, RsiStrategy, SmaRsiCombo, BollingerBandStrategy,
+                         MACDStrategy, MyNewStrategy)
+
+
+# --------------------------------------------------------------
+# VECTORIZED ENGINE
+# (NumPy fast path for the bundled long-only strategies)
+# --------------------------------------------------------------
+
+def _ohlc_arrays(df):
+    """
+    Pull open/high/low/close out of a loaded DataFrame as float64 arrays,
+    matching column names case-insensitively like PandasData does.
+    """
+    cols = {c.lower(): c for c in df.columns}
+    return tuple(df[cols[name]].to_numpy(dtype=np.float64) for name in ('open', 'high', 'low', 'close'))
+
+
+def first_valid(arr):
+    """Index of the first non-NaN value of ``arr``, len(arr) if none."""
+    valid = np.flatnonzero(~np.isnan(arr))
+    return valid[0] if len(valid) else len(arr)
+
+
+def sma(x, period):
+    """Simple moving average of ``x``, NaN over the first period - 1 bars."""
+    return pd.Series(x).rolling(period).mean().to_numpy()
+
+
+def _near(a, b):
+    with np.errstate(invalid='ignore'):
+        return np.abs(a - b) <= 1e-9 * np.maximum(np.abs(a), np.abs(b))
+
+
+def _sma_exact(x, period, means, mask):
+    """
+    Recompute ``means``, a moving average of ``x``, with math.fsum (as
+    Backtrader does) wherever ``mask`` is set. The rolling mean is off by
+    an ulp or so, which only matters where it is compared against a value
+    it may exactly equal.
+    """
+    means = means.copy()
+    for i in np.flatnonzero(mask):
+        if i >= period - 1:
+            means[i] = math.fsum(x[i - period + 1:i + 1]) / period
+    return means
+
+
+def _smoothing(x, period, alpha):
+    """
+    Backtrader's ExponentialSmoothing: seeded with the plain average of the
+    first ``period`` valid values, then prev * (1 - alpha) + x * alpha.
+    """
+    out = np.full(len(x), np.nan)
+    first = first_valid(x)
+    seed = first + period - 1
+    if seed >= len(x):
+        return out
+    seg = x[seed:].copy()
+    seg[0] = math.fsum(x[first:seed + 1]) / period
+    out[seed:] = pd.Series(seg).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+def ema(x, period):
+    """Exponential moving average of ``x`` as bt.ind.EMA computes it."""
+    return _smoothing(x, period, 2.0 / (1.0 + period))
+
+
+def rsi(close, period):
+    """Wilder's RSI of ``close`` as bt.ind.RSI computes it."""
+    delta = np.empty_like(close)
+    delta[0] = np.nan
+    delta[1:] = close[1:] - close[:-1]
+    up = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0))
+    down = np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0.0))
+    maup = _smoothing(up, period, 1.0 / period)
+    madown = _smoothing(down, period, 1.0 / period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100.0 - 100.0 / (1.0 + maup / madown)
+
+
+def _crossover(a, b):
+    """
+    +1/-1/0 like bt.ind.CrossOver, NaN until it has a previous non-zero
+    difference to compare against.
+    """
+    diff = a - b
+    start = max(first_valid(a), first_valid(b))
+    out = np.full(len(diff), np.nan)
+    if start + 1 >= len(diff):
+        return out
+    nzd = np.where(diff == 0.0, np.nan, diff)
+    nzd[:start] = np.nan
+    nzd[start] = diff[start]
+    nzd = pd.Series(nzd).ffill().to_numpy()
+    prev = nzd[start:-1]
+    cur_a, cur_b = a[start + 1:], b[start + 1:]
+    out[start + 1:] = (prev < 0.0) & (cur_a > cur_b)
+    out[start + 1:] -= (prev > 0.0) & (cur_a < cur_b)
+    return out
+
+
+def sma_pair(c, fast_period, slow_period):
+    """
+    The fast and slow SMAs of ``c``, summed exactly where they (nearly)
+    tie so crossovers land on the bars Backtrader finds them on.
+    """
+    sma_fast, sma_slow = sma(c, fast_period), sma(c, slow_period)
+    ties = _near(sma_fast, sma_slow)
+    return _sma_exact(c, fast_period, sma_fast, ties), _sma_exact(c, slow_period, sma_slow, ties)
+
+
+def _smacross_signals(o, h, l, c, p):
+    cross = _crossover(*sma_pair(c, p['fast_period'], p['slow_period']))
+    return cross > 0, cross < 0, [cross]
+
+
+def _rsi_signals(o, h, l, c, p):
+    rsi_line = rsi(c, p['rsi_period'])
+    return rsi_line < p['rsi_lower'], rsi_line > p['rsi_upper'], [rsi_line]
+
+
+def _smarsi_signals(o, h, l, c, p):
+    sma_fast, sma_slow = sma_pair(c, p['fast_period'], p['slow_period'])
+    rsi_line = rsi(c, p['rsi_period'])
+    cross = _crossover(sma_fast, sma_slow)
+    entry = (cross > 0) & (rsi_line < p['rsi_upper'])
+    exit_ = (cross < 0) | (rsi_line > p['rsi_upper'])
+    return entry, exit_, [sma_fast, sma_slow, rsi_line, cross]
+
+
+def _bollinger_signals(o, h, l, c, p):
+    mid = sma(c, p['period'])
+    meansq = sma(c * c, p['period'])
+    dev = p['devfactor'] * np.sqrt(np.abs(meansq - mid * mid))
+    top, bot = mid + dev, mid - dev
+    return c < bot, c > top, [bot]
+
+
+def _macd_signals(o, h, l, c, p):
+    macd = ema(c, p['fast_period']) - ema(c, p['slow_period'])
+    signal = ema(macd, p['signal_period'])
+    cross = _crossover(macd, signal)
+    return cross > 0, cross < 0, [cross]
+
+
+def _stoch_signals(o, h, l, c, p):
+    period = p['stoch_period']
+    highest = pd.Series(h).rolling(period).max().to_numpy()
+    lowest = pd.Series(l).rolling(period).min().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k_fast = 100.0 * ((c - lowest) / (highest - lowest))
+    k = sma(k_fast, p['stoch_d_period'])
+    d = sma(k, p['stoch_dslow_period'])
+    sma_line = sma(c, p['sma_period'])
+    sma_line = _sma_exact(c, p['sma_period'], sma_line, _near(c, sma_line))
+    cross = _crossover(k, d)
+    entry = (cross > 0) & (c > sma_line)
+    exit_ = (cross < 0) | (c < sma_line)
+    return entry, exit_, [sma_line, cross]
+
+
+# Strategy class -> function(open, high, low, close, params) returning the
+# entry mask, exit mask and the indicator arrays that set the warm-up.
+VECTOR_SIGNALS = {
+    SmaCross: _smacross_signals,
+    RsiStrategy: _rsi_signals,
+    SmaRsiCombo: _smarsi_signals,
+    BollingerBandStrategy: _bollinger_signals,
+    MACDStrategy: _macd_signals,
+    MyNewStrategy: _stoch_signals,
+}
+
+
+def vectorized_unsupported(strat_class, dataframes, portfolio=False, extra_timeframes=()):
+    """
+    Why a run of ``strat_class`` over ``dataframes`` cannot go through
+    run_vectorized, which trades one symbol on one timeframe, or None if
+    it can.
+    """
+    if strat_class not in VECTOR_SIGNALS:
+        return f"{strat_class.__name__} has no vectorized implementation"
+    if portfolio:
+        return "The vectorized engine trades one symbol, not a portfolio"
+    if len(dataframes) > 1:
+        return f"The vectorized engine trades one symbol, not {len(dataframes)}"
+    if extra_timeframes:
+        return "The vectorized engine takes no extra timeframes"
+    return None
+
+
+def vectorized_signals(df, strat_class, params):
+    """
+    Entry and exit masks of one of the bundled strategies over the whole of
+    ``df``, with the indicator warm-up cleared. Returns
+    (open, high, low, close, entry, exit) as arrays.
+
+    Indicators only look back, so any window of these arrays is what a run
+    with the full history before it would see.
+    """
+    signal_fn = VECTOR_SIGNALS.get(strat_class)
+    if signal_fn is None:
+        raise ValueError(f"{strat_class.__name__} has no vectorized implementation")
+
+    o, h, l, c = _ohlc_arrays(df)
+    entry, exit_, indicators = signal_fn(o, h, l, c, params)
+    start = max([0] + [first_valid(arr) for arr in indicators])
+    entry = np.asarray(entry, dtype=bool)
+    exit_ = np.asarray(exit_, dtype=bool)
+    entry[:start] = False
+    exit_[:start] = False
+    if (entry & exit_).any():
+        raise ValueError("Entry and exit signal on the same bar; use the Backtrader engine")
+    return o, h, l, c, entry, exit_
+
+
+def simulate_signals(index, o, h, l, c, entry, exit_, initial_cash, commission, slippage_pct, stake=1,
+                     with_trades=False, close_at_end=False):
+    """
+    Trade precomputed entry/exit masks, starting flat on the first bar.
+    Returns the same keys as collect_results plus the equity curve, and
+    with ``with_trades`` the fill bars and prices ('buys', 'buy_prices',
+    'sells', 'sell_prices') and the net PnL of each closed trade
+    ('trade_pnls').
+
+    ``close_at_end`` sells a position still open on the last bar at its
+    close (slipped, with commission), so every trade is closed and the
+    final value is the cash left.
+    """
+    n = len(c)
+
+    # Desired state after each bar's next(), then the position actually held
+    # from the following bar on.
+    state = np.where(entry, 1.0, np.where(exit_, 0.0, np.nan))
+    state = pd.Series(state).ffill().fillna(0.0).to_numpy()
+    held = np.zeros(n)
+    held[1:] = state[:-1]
+
+    change = np.diff(held, prepend=0.0)
+    buys = np.flatnonzero(change > 0)
+    sells = np.flatnonzero(change < 0)
+    closed_at_end = close_at_end and n > 0 and held[-1] > 0
+
+    slip = slippage_pct / 100.0
+    buy_px = o[buys] * (1 + slip) if slip else o[buys]
+    buy_px = np.minimum(buy_px, h[buys])
+    sell_px = o[sells] * (1 - slip) if slip else o[sells]
+    sell_px = np.maximum(sell_px, l[sells])
+    if closed_at_end:
+        sells = np.append(sells, n - 1)
+        sell_px = np.append(sell_px, max(c[-1] * (1 - slip), l[-1]))
+
+    buy_comm = stake * buy_px * commission
+    sell_comm = stake * sell_px * commission
+
+    flow = np.zeros(n)
+    flow[buys] -= stake * buy_px + buy_comm
+    flow[sells] += stake * sell_px - sell_comm
+    cash = initial_cash + np.cumsum(flow)
+
+    # Backtrader checks the order against the signal bar's close and rejects
+    # it for margin if cash would go negative; that path is not modelled.
+    signal_bars = buys - 1
+    if (cash[signal_bars] - stake * c[signal_bars] * (1 + commission) < 0).any():
+        raise ValueError("Order would be rejected for margin; use the Backtrader engine")
+
+    value = cash + held * stake * c
+    if closed_at_end:
+        value[-1] = cash[-1]
+
+    closed = len(sells)
+    pnlcomm = stake * (sell_px - buy_px[:closed]) - buy_comm[:closed] - sell_comm
+    won = int((pnlcomm >= 0.0).sum())
+    max_drawdown, drawdown_len = drawdown_stats(value)
+
+    summary = {
+        'final_value': float(value[-1]),
+        'sharpe': yearly_sharpe(index, value, initial_cash),
+        'max_drawdown': float(max_drawdown),
+        'drawdown_len': drawdown_len,
+        'total_trades': len(buys),
+        'won': won,
+        'lost': closed - won,
+        'pnl_net': float(pnlcomm.sum()),
+        'equity': value,
+    }
+    if with_trades:
+        summary.update(buys=buys, buy_prices=buy_px, sells=sells, sell_prices=sell_px, trade_pnls=pnlcomm)
+    return summary
+
+
+def run_vectorized(df, strat_class, params, initial_cash, commission, slippage_pct, stake=1,
+                   with_trades=False):
+    """
+    Backtest one of the bundled strategies on a single DataFrame without
+    Backtrader.
+
+    Mirrors the Backtrader run: market orders from bar i fill at the open of
+    bar i+1 (slipped by ``slippage_pct`` and capped to the bar's high/low),
+    percentage commission on both legs, ``stake`` units per trade (the
+    default sizer), and an order issued on the last bar never fills.
+    Returns the same keys as collect_results plus the equity curve (and
+    the fills with ``with_trades``, see simulate_signals).
+    """
+    o, h, l, c, entry, exit_ = vectorized_signals(df, strat_class, params)
+    return simulate_signals(df.index, o, h, l, c, entry, exit_, initial_cash, commission, slippage_pct,
+                            stake, with_trades)
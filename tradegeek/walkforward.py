@@ -0,0 +1,221 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .analytics import drawdown_stats, yearly_sharpe
+from .optimize import SWEEP_RANK_KEYS
+from .shared import SharedMarketData, shared_dataframe
+from .vectorized import VECTOR_SIGNALS, simulate_signals, vectorized_signals
+
+
+# --------------------------------------------------------------
+# WALK-FORWARD ANALYSIS
+# (optimize on a rolling train window, validate on the window after it)
+# --------------------------------------------------------------
+
+def walk_forward_windows(n_bars, train_bars, test_bars, step_bars=None):
+    """
+    Bar ranges of each fold as (train_start, test_start, test_end): the
+    fold trains on [train_start, test_start) and is tested on
+    [test_start, test_end). Folds advance by ``step_bars`` (default: one
+    test window); the last test window is cut short at the end of the data.
+    """
+    step_bars = step_bars or test_bars
+    if min(train_bars, test_bars, step_bars) < 1:
+        raise ValueError("Train, test and step lengths must be at least one bar")
+
+    windows = []
+    train_start = 0
+    # A test window needs two bars for an order to fill in it
+    while train_start + train_bars + 2 <= n_bars:
+        test_start = train_start + train_bars
+        windows.append((train_start, test_start, min(test_start + test_bars, n_bars)))
+        train_start += step_bars
+    return windows
+
+
+# Per-process state for walk-forward workers, filled once by _wf_init with
+# a DataFrame over the parent's shared-memory copy of the bars.
+_WF_STATE = {}
+
+
+def _wf_init(frame, strat_class, windows, initial_cash, commission, slippage_pct):
+    _WF_STATE.update(
+        df=shared_dataframe(frame),
+        strat_class=strat_class,
+        windows=windows,
+        initial_cash=initial_cash,
+        commission=commission,
+        slippage_pct=slippage_pct,
+    )
+
+
+def _simulate_window(index, arrays, start, end, initial_cash, commission, slippage_pct, close_at_end=False):
+    window = tuple(arr[start:end] for arr in arrays)
+    try:
+        return simulate_signals(index[start:end], *window, initial_cash, commission, slippage_pct,
+                                close_at_end=close_at_end)
+    except ValueError:
+        return None
+
+
+def _wf_run(params):
+    """
+    Score one parameter combination on every fold. The signals are
+    computed once over the full history and each train/test window is a
+    slice of them, so overlapping windows share their indicator work and
+    later windows start with their warm-up already done.
+    """
+    state = _WF_STATE
+    try:
+        arrays = vectorized_signals(state['df'], state['strat_class'], params)
+    except ValueError as e:
+        return {'params': params, 'error': str(e), 'folds': []}
+
+    index = state['df'].index
+    settings = state['initial_cash'], state['commission'], state['slippage_pct']
+    folds = []
+    for train_start, test_start, test_end in state['windows']:
+        train = _simulate_window(index, arrays, train_start, test_start, *settings)
+        test = _simulate_window(index, arrays, test_start, test_end, *settings, close_at_end=True)
+        for summary in (train, test):
+            if summary is not None:
+                del summary['equity']
+        folds.append((train, test))
+    return {'params': params, 'error': None, 'folds': folds}
+
+
+def _pick_best(results, fold, rank_by):
+    """
+    Index into ``results`` of the combination whose train window scored
+    best on ``rank_by``; None when no combination could be scored.
+    """
+    column, ascending = SWEEP_RANK_KEYS.get(rank_by, SWEEP_RANK_KEYS["Sharpe"])
+    scores = []
+    for i, result in enumerate(results):
+        train = result['folds'][fold][0] if result['folds'] else None
+        if train is not None and train[column] is not None:
+            scores.append((train[column], i))
+    if not scores:
+        return None
+    return (min if ascending else max)(scores, key=lambda s: s[0])[1]
+
+
+def run_walk_forward(df, strat_class, combos, train_bars, test_bars, step_bars=None, rank_by="Sharpe",
+                     initial_cash=10000.0, commission=0.001, slippage_pct=0.0, max_workers=None,
+                     progress=None, cancel=None):
+    """
+    Walk-forward analysis of a bundled strategy on one DataFrame: for each
+    fold pick the combination that ranks best on the train window, then
+    trade it on the following test window.
+
+    Returns (folds, oos): a DataFrame with one row per fold (window dates,
+    chosen params, train score and test results) and a dict with the
+    stitched out-of-sample run, i.e. the collect_results keys plus 'index',
+    'equity' and 'skipped_folds'. A position still open at the end of a
+    test window is sold at its last close, so every trade is closed.
+
+    A fold that adds nothing to the stitched run, because no combination
+    could be scored on its train window or its test window would have an
+    order rejected for margin, has the reason in its 'skipped' column and
+    its number in 'skipped_folds'.
+
+    Combinations run in parallel on a process pool, each covering every
+    fold. ``progress`` and ``cancel`` work as in run_parameter_sweep; a
+    cancelled run returns (None, None).
+    """
+    if strat_class not in VECTOR_SIGNALS:
+        raise ValueError(f"Walk-forward needs the vectorized engine; {strat_class.__name__} has none")
+    windows = walk_forward_windows(len(df), train_bars, test_bars, step_bars)
+    if not windows:
+        raise ValueError(f"{len(df)} bars are not enough for a {train_bars}-bar train window "
+                         f"and a test window after it")
+
+    max_workers = max_workers or os.cpu_count() or 1
+    total = len(combos)
+    chunksize = max(1, total // (max_workers * 4))
+    results = []
+
+    with SharedMarketData({'data': df}) as shared, \
+            ProcessPoolExecutor(max_workers=max_workers,
+                                initializer=_wf_init,
+                                initargs=(shared.frames['data'], strat_class, windows, initial_cash,
+                                          commission, slippage_pct)) as executor:
+        for done, result in enumerate(executor.map(_wf_run, combos, chunksize=chunksize), 1):
+            results.append(result)
+            if progress is not None:
+                progress(done, total)
+            if cancel is not None and cancel.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+                return None, None
+
+    column = SWEEP_RANK_KEYS.get(rank_by, SWEEP_RANK_KEYS["Sharpe"])[0]
+    index = df.index
+    signals = {}
+    rows = []
+    pieces = []
+    capital = initial_cash
+    for fold, (train_start, test_start, test_end) in enumerate(windows):
+        row = {
+            'fold': fold + 1,
+            'train_start': index[train_start],
+            'test_start': index[test_start],
+            'test_end': index[test_end - 1],
+            'skipped': None,
+        }
+        best = _pick_best(results, fold, rank_by)
+        if best is None:
+            row['skipped'] = "no combination could be scored on the train window"
+            rows.append(row)
+            continue
+
+        params = results[best]['params']
+        train, test = results[best]['folds'][fold]
+        row.update({k: v for k, v in params.items() if k != 'printlog'})
+        row['train_' + column] = train[column]
+        if test is not None:
+            row.update(test_sharpe=test['sharpe'], test_pnl_net=test['pnl_net'],
+                       test_max_drawdown=test['max_drawdown'], test_trades=test['total_trades'])
+        rows.append(row)
+
+        # The stitched curve takes each fold up to where the next one
+        # starts testing, so overlapping test windows are not counted twice.
+        # Each piece sells what it holds on its last bar and hands its cash
+        # on to the next one, which starts flat.
+        stitch_end = windows[fold + 1][1] if fold + 1 < len(windows) else test_end
+        stitch_end = min(stitch_end, test_end)
+        if best not in signals:
+            signals[best] = vectorized_signals(df, strat_class, params)
+        piece = _simulate_window(index, signals[best], test_start, stitch_end, capital, commission,
+                                 slippage_pct, close_at_end=True)
+        if piece is None:
+            row['skipped'] = "an order would be rejected for margin in the test window"
+            continue
+        piece['index'] = index[test_start:stitch_end]
+        pieces.append(piece)
+        capital = piece['final_value']
+
+    folds = pd.DataFrame(rows)
+    skipped = [row['fold'] for row in rows if row['skipped'] is not None]
+    if not pieces:
+        return folds, None
+
+    oos_index = pieces[0]['index'].append([p['index'] for p in pieces[1:]])
+    equity = np.concatenate([p['equity'] for p in pieces])
+    max_drawdown, drawdown_len = drawdown_stats(equity)
+    oos = {
+        'final_value': float(equity[-1]),
+        'sharpe': yearly_sharpe(oos_index, equity, initial_cash),
+        'max_drawdown': float(max_drawdown),
+        'drawdown_len': drawdown_len,
+        'total_trades': sum(p['total_trades'] for p in pieces),
+        'won': sum(p['won'] for p in pieces),
+        'lost': sum(p['lost'] for p in pieces),
+        'pnl_net': sum(p['pnl_net'] for p in pieces),
+        'skipped_folds': skipped,
+        'index': oos_index,
+        'equity': equity,
+    }
+    return folds, oos